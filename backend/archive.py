@@ -0,0 +1,228 @@
+"""
+Parquet archive tier for The Third Angle backend.
+Time entries and notifications older than the retention horizon move to zstd-compressed Parquet
+files under ARCHIVE_DIR/<collection>/day=YYYY-MM-DD/, listed in each collection's manifest.json.
+Documents are deleted from Mongo only after the manifest lists their file, so readers merge both
+tiers for archived days and skip ids the archive already holds.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from pymongo import ASCENDING
+
+ARCHIVE_DIR = Path(os.environ.get("ARCHIVE_DIR", Path(__file__).parent / "archive")) / os.environ['DB_NAME']
+ARCHIVE_RETENTION_DAYS = int(os.environ.get("ARCHIVE_RETENTION_DAYS", "90"))
+# Routes read raw documents up to 30 days back, so the horizon never comes closer than that
+ARCHIVE_MIN_RETENTION_DAYS = 31
+ARCHIVE_COMPRESSION = "zstd"
+ARCHIVE_DELETE_BATCH_SIZE = 5000
+ARCHIVE_SCHEMAS = {
+    "time_entries": pa.schema([
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("task_id", pa.string()),
+        ("description", pa.string()),
+        ("hours", pa.float64()),
+        ("date", pa.timestamp("ms")),
+        ("is_pomodoro", pa.bool_()),
+        ("is_overtime", pa.bool_()),
+        ("change_seq", pa.int64()),
+    ]),
+    "notifications": pa.schema([
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("title", pa.string()),
+        ("message", pa.string()),
+        ("type", pa.string()),
+        ("read", pa.bool_()),
+        ("created_date", pa.timestamp("ms")),
+        ("related_task_id", pa.string()),
+        ("related_user_id", pa.string()),
+        ("change_seq", pa.int64()),
+    ]),
+}
+ARCHIVE_DATE_FIELDS = {"time_entries": "date", "notifications": "created_date"}
+_archive_lock = asyncio.Lock()
+
+def day_key(date: datetime) -> str:
+    return date.strftime("%Y-%m-%d")
+
+def day_start(date: datetime) -> datetime:
+    return datetime.combine(date.date(), datetime.min.time())
+
+def archive_manifest(name: str) -> Dict[str, Any]:
+    path = ARCHIVE_DIR / name / "manifest.json"
+    if not path.exists():
+        return {"collection": name, "date_field": ARCHIVE_DATE_FIELDS[name], "days": {}}
+    return json.loads(path.read_text())
+
+def write_archive_manifest(name: str, manifest: Dict[str, Any]):
+    path = ARCHIVE_DIR / name / "manifest.json"
+    temporary = path.with_suffix(".json.tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(temporary, path)
+
+def write_archive_part(name: str, day: str, part: int, documents: List[Dict[str, Any]]) -> str:
+    """Write one Parquet file for a day; returns its path relative to the collection directory"""
+    relative = f"day={day}/part-{part:04d}.parquet"
+    path = ARCHIVE_DIR / name / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pylist(documents, schema=ARCHIVE_SCHEMAS[name])
+    pq.write_table(table, path, compression=ARCHIVE_COMPRESSION)
+    return relative
+
+def read_archive_files(name: str, files: List[str], columns: Optional[List[str]] = None, filters=None) -> pa.Table:
+    tables = [pq.read_table(ARCHIVE_DIR / name / file, columns=columns, filters=filters) for file in files]
+    return pa.concat_tables(tables) if tables else ARCHIVE_SCHEMAS[name].empty_table()
+
+def archive_filters(query: Dict[str, Any], date_field: str) -> List[tuple]:
+    """Parquet row filters for the equality and date range queries the export routes build"""
+    filters = []
+    for field, value in query.items():
+        if field == date_field:
+            if "$gte" in value:
+                filters.append((field, ">=", value["$gte"]))
+            if "$lt" in value:
+                filters.append((field, "<", value["$lt"]))
+        elif isinstance(value, dict):
+            raise ValueError(f"Archived {field} can only be filtered by equality")
+        else:
+            filters.append((field, "==", value))
+    return filters
+
+def archived_days(name: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, List[str]]:
+    """Files of the archived days overlapping [start, end), oldest day first"""
+    days = archive_manifest(name)["days"]
+    first = day_key(start) if start else ""
+    return {
+        day: days[day]["files"] for day in sorted(days)
+        if day >= first and (end is None or day < day_key(end) or (day == day_key(end) and end > day_start(end)))
+    }
+
+def archive_boundary(name: str) -> Optional[datetime]:
+    """Start of the first day after the newest archived day; older documents may be in either tier"""
+    days = archive_manifest(name)["days"]
+    return datetime.strptime(max(days), "%Y-%m-%d") + timedelta(days=1) if days else None
+
+async def archive_day(collection, day: datetime, documents: List[Dict[str, Any]], manifest: Dict[str, Any]) -> int:
+    """Append one day's documents to the archive and delete them from Mongo; returns rows written"""
+    name = collection.name
+    key = day_key(day)
+    entry = manifest["days"].setdefault(key, {"files": [], "rows": 0})
+    # A run interrupted after writing a part but before deleting leaves its documents in Mongo
+    archived_ids = set((await asyncio.to_thread(read_archive_files, name, entry["files"], ["id"])).column("id").to_pylist())
+    new_documents = [document for document in documents if document["id"] not in archived_ids]
+    if new_documents:
+        file = await asyncio.to_thread(write_archive_part, name, key, len(entry["files"]), new_documents)
+        entry["files"].append(file)
+        entry["rows"] += len(new_documents)
+        manifest["archived_date"] = datetime.utcnow().isoformat()
+        await asyncio.to_thread(write_archive_manifest, name, manifest)
+    ids = [document["id"] for document in documents]
+    for start in range(0, len(ids), ARCHIVE_DELETE_BATCH_SIZE):
+        await collection.delete_many({"id": {"$in": ids[start:start + ARCHIVE_DELETE_BATCH_SIZE]}})
+    return len(new_documents)
+
+async def archive_old_records(db, retention_days: int = ARCHIVE_RETENTION_DAYS) -> Dict[str, Any]:
+    """Move time entries and notifications older than `retention_days` days to the Parquet archive, a day at a time"""
+    if retention_days < ARCHIVE_MIN_RETENTION_DAYS:
+        raise ValueError(f"Retention must be at least {ARCHIVE_MIN_RETENTION_DAYS} days")
+    horizon = day_start(datetime.utcnow() - timedelta(days=retention_days))
+    results = {"horizon": horizon}
+    async with _archive_lock:
+        for name, date_field in ARCHIVE_DATE_FIELDS.items():
+            (ARCHIVE_DIR / name).mkdir(parents=True, exist_ok=True)
+            manifest = archive_manifest(name)
+            projection = {"_id": 0, **dict.fromkeys(ARCHIVE_SCHEMAS[name].names, 1)}
+            archived, days = 0, 0
+            while True:
+                oldest = await db[name].find_one({date_field: {"$lt": horizon}}, {"_id": 0, date_field: 1}, sort=[(date_field, ASCENDING)])
+                if oldest is None:
+                    break
+                start = day_start(oldest[date_field])
+                documents = await db[name].find(
+                    {date_field: {"$gte": start, "$lt": start + timedelta(days=1)}}, projection
+                ).sort([(date_field, ASCENDING), ("id", ASCENDING)]).to_list(None)
+                archived += await archive_day(db[name], start, documents, manifest)
+                days += 1
+            results[name] = {"archived": archived, "days": days}
+    return results
+
+async def archived_batches(collection, query: Dict[str, Any], fields: List[str], batch_size: int):
+    """Documents matching `query` from archived days, merged with that range's documents still in Mongo, oldest first"""
+    name = collection.name
+    date_field = ARCHIVE_DATE_FIELDS[name]
+    boundary = archive_boundary(name)
+    date_range = query.get(date_field, {})
+    start, end = date_range.get("$gte"), date_range.get("$lt")
+    if boundary is None or (start and start >= boundary):
+        return
+    cold_end = min(end, boundary) if end else boundary
+    filters = archive_filters(query, date_field)
+    straggler_query = {**query, date_field: {**({"$gte": start} if start else {}), "$lt": cold_end}}
+    stragglers = defaultdict(list)
+    async for document in collection.find(straggler_query, {"_id": 0, **dict.fromkeys(fields, 1)}):
+        stragglers[day_key(document[date_field])].append(document)
+
+    days = archived_days(name, start, cold_end)
+    for day in sorted(set(days) | set(stragglers)):
+        archived = (await asyncio.to_thread(read_archive_files, name, days.get(day, []), fields, filters or None)).to_pylist()
+        # A run interrupted between writing a day and deleting it leaves archived documents in Mongo too
+        archived_ids = {document["id"] for document in archived}
+        documents = archived + [document for document in stragglers[day] if document["id"] not in archived_ids]
+        documents.sort(key=lambda document: (document[date_field], document["id"]))
+        for offset in range(0, len(documents), batch_size):
+            yield documents[offset:offset + batch_size]
+
+def hot_tier_query(name: str, query: Dict[str, Any]) -> Dict[str, Any]:
+    """Restrict a query to the days after the archive, which archived_batches does not cover"""
+    boundary = archive_boundary(name)
+    if boundary is None:
+        return query
+    date_field = ARCHIVE_DATE_FIELDS[name]
+    date_range = query.get(date_field, {})
+    return {**query, date_field: {**date_range, "$gte": max(date_range.get("$gte", boundary), boundary)}}
+
+async def archived_hours_by_user(time_entries, start: datetime, end: datetime) -> Dict[str, float]:
+    """Hours per user logged in [start, end) on archived days, leaving out entries still in Mongo, which callers count there"""
+    days = archived_days("time_entries", start, end)
+    files = [file for day_files in days.values() for file in day_files]
+    if not files:
+        return {}
+    filters = [("date", ">=", start), ("date", "<", end)]
+    table = await asyncio.to_thread(read_archive_files, "time_entries", files, ["id", "user_id", "hours", "date"], filters)
+    hot_ids = await time_entries.distinct("id", {"date": {"$gte": start, "$lt": min(end, archive_boundary("time_entries"))}})
+    if hot_ids:
+        table = table.filter(pc.invert(pc.is_in(table.column("id"), value_set=pa.array(hot_ids, pa.string()))))
+    sums = table.group_by("user_id").aggregate([("hours", "sum")])
+    return dict(zip(sums.column("user_id").to_pylist(), sums.column("hours_sum").to_pylist()))
+
+def archive_summary() -> Dict[str, Any]:
+    summary = {"directory": str(ARCHIVE_DIR), "retention_days": ARCHIVE_RETENTION_DAYS}
+    for name in ARCHIVE_DATE_FIELDS:
+        manifest = archive_manifest(name)
+        days = manifest["days"]
+        files = [ARCHIVE_DIR / name / file for entry in days.values() for file in entry["files"]]
+        summary[name] = {
+            "days": len(days),
+            "rows": sum(entry["rows"] for entry in days.values()),
+            "bytes": sum(path.stat().st_size for path in files if path.exists()),
+            "oldest_day": min(days) if days else None,
+            "newest_day": max(days) if days else None,
+            "archived_date": manifest.get("archived_date")
+        }
+    return summary
+
+def clear_archive():
+    for name in ARCHIVE_DATE_FIELDS:
+        shutil.rmtree(ARCHIVE_DIR / name, ignore_errors=True)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for The Third Angle backend.
+Run from the backend directory, e.g. `python manage.py ensure-indexes`.
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+import typer
+
+import server
+from archive import ARCHIVE_MIN_RETENTION_DAYS, ARCHIVE_RETENTION_DAYS, archive_old_records
+from rollups import backfill_time_rollups
+from slow_queries import slow_query_ranking
+
+cli = typer.Typer(help="The Third Angle maintenance commands")
+
+def run(coro):
+    """Run a coroutine against the server's database and close the client afterwards"""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            server.client.close()
+    return asyncio.run(runner())
+
+def echo_json(data):
+    typer.echo(json.dumps(data, indent=2, default=str))
+
+@cli.command("ensure-indexes")
+def ensure_indexes():
+    """Create the declared indexes for every collection."""
+    echo_json(run(server.ensure_indexes()))
+
+@cli.command("index-report")
+def index_report():
+    """Explain every route's query shape and list the collection scans."""
+    report = run(server.get_index_report())
+    echo_json(report)
+    if report["collection_scans"]:
+        raise typer.Exit(code=1)
+
+@cli.command("slow-queries")
+def slow_queries(
+    limit: int = typer.Option(20, min=1, help="Number of shapes to list"),
+    hours: float = typer.Option(24, help="Only consider slow queries recorded in the last N hours"),
+    sort_by: str = typer.Option("total_ms", help="total_ms, max_ms, avg_ms or count")
+):
+    """Rank the slow query shapes recorded by the server processes."""
+    echo_json(run(slow_query_ranking(server.db, limit, hours, sort_by)))
+
+@cli.command("rebuild-leaderboard")
+def rebuild_leaderboard(
+    month: Optional[str] = typer.Option(None, help="Month as YYYY-MM, defaults to the current month"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report drift, do not repair it")
+):
+    """Recompute the monthly leaderboard from raw tasks and time entries."""
+    result = run(server.rebuild_leaderboard(month, repair=not dry_run))
+    echo_json(result)
+    if dry_run and result["drift"]:
+        raise typer.Exit(code=1)
+
+@cli.command("backfill-rollups")
+def backfill_rollups(user_id: Optional[str] = typer.Option(None, help="Only rebuild this user's rollups")):
+    """Rebuild the daily time rollups from raw time entries."""
+    echo_json(run(backfill_time_rollups(server.db, user_id)))
+
+@cli.command("backfill-change-seqs")
+def backfill_change_seqs():
+    """Assign change seqs to tasks, time entries and notifications written without one."""
+    echo_json(run(server.backfill_change_seqs()))
+
+@cli.command("migrate-time-entries")
+def migrate_time_entries(
+    storage: str = typer.Option("timeseries", help="Target storage mode; only standard to timeseries converts online"),
+    drop_legacy: bool = typer.Option(False, "--drop-legacy", help="Drop the old collection once every entry is copied")
+):
+    """Convert a standard time_entries collection to time-series storage while the app keeps running."""
+    try:
+        echo_json(run(server.migrate_time_entries(storage, drop_legacy)))
+    except ValueError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=1)
+
+@cli.command("archive")
+def archive(retention_days: int = typer.Option(ARCHIVE_RETENTION_DAYS, min=ARCHIVE_MIN_RETENTION_DAYS, help="Archive records older than N days")):
+    """Move old time entries and notifications to the Parquet archive; run daily, e.g. from cron."""
+    echo_json(run(archive_old_records(server.db, retention_days)))
+
+@cli.command("rebuild-team-stats")
+def rebuild_team_stats():
+    """Recompute the team-overview counters from raw tasks and users."""
+    echo_json(run(server.rebuild_team_stats()))
+
+@cli.command("rebalance-positions")
+def rebalance_positions(status: Optional[server.TaskStatus] = typer.Option(None, help="Only renumber this kanban column")):
+    """Renumber kanban columns to evenly spaced task positions."""
+    echo_json(run(server.rebalance_positions_route(status)))
+
+@cli.command("generate-data")
+def generate_data(
+    users: int = typer.Option(50, min=1, help="Number of users"),
+    tasks_per_user: int = typer.Option(10, min=0, help="Tasks created per user"),
+    days: int = typer.Option(30, min=1, help="Days of history to generate"),
+    entries_per_day: int = typer.Option(2, min=0, help="Time entries per user per working day"),
+    seed: int = typer.Option(42, help="Random seed; the same seed produces the same dataset")
+):
+    """Replace ALL data with a seeded synthetic dataset, e.g. --users 10000 --days 250."""
+    echo_json(run(server.generate_synthetic_data(users, tasks_per_user, days, entries_per_day, seed)))
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,188 @@
+"""
+Prometheus metrics for The Third Angle backend.
+Per-route HTTP and per-collection MongoDB command metrics, rendered in the text format at /metrics.
+Routes are labelled by their path template, so the number of series stays bounded.
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import monitoring
+
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNMATCHED_ROUTE = "unmatched"
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    def __init__(self, name: str, help_text: str, kind: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.label_names = label_names
+        self.series: Dict[tuple, Any] = {}
+        self.lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        super().__init__(name, help_text, "counter", label_names)
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self.lock:
+            series = list(self.series.items())
+        return self.header() + [f"{self.name}{_label_text(self.label_names, labels)} {value}" for labels, value in series]
+
+class Gauge(Counter):
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        Metric.__init__(self, name, help_text, "gauge", label_names)
+
+    def set(self, value: float, labels: tuple = ()):
+        with self.lock:
+            self.series[labels] = value
+
+class Histogram(Metric):
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        super().__init__(name, help_text, "histogram", label_names)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then the sum of observed values
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self.lock:
+            series = [(labels, list(values)) for labels, values in self.series.items()]
+        lines = self.header()
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                bucket_labels = _label_text(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.label_names, labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{_label_text(self.label_names, labels)} {cumulative}")
+        return lines
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"), HTTP_LATENCY_BUCKETS)
+http_response_size = Histogram("http_response_size_bytes", "HTTP response body size", ("method", "route"), RESPONSE_SIZE_BUCKETS)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled", ("method",))
+mongo_latency = Histogram("mongodb_command_duration_seconds", "MongoDB command latency", ("collection", "command"), MONGO_LATENCY_BUCKETS)
+mongo_documents = Counter("mongodb_command_documents_total", "Documents returned or written by MongoDB commands", ("collection", "command"))
+mongo_failures = Counter("mongodb_command_failures_total", "Failed MongoDB commands", ("collection", "command"))
+app_gauges = Gauge("app_state", "Background queue and cache state", ("name",))
+METRICS = [http_requests, http_latency, http_response_size, http_in_flight, mongo_latency, mongo_documents, mongo_failures, app_gauges]
+
+def command_collection(command_name: str, command: Dict[str, Any]) -> str:
+    if command_name == "getMore":
+        return str(command.get("collection", ""))
+    target = command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+def reply_document_count(reply: Dict[str, Any]) -> int:
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+    if "value" in reply:  # findAndModify
+        return 1 if reply["value"] else 0
+    return reply.get("n", 0)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records the duration and document count of every command, labelled by collection"""
+
+    def __init__(self, on_success: Optional[Callable] = None):
+        # Called with the started event, collection, duration and document count of each successful command
+        self.on_success = on_success
+        self.pending: Dict[tuple, tuple] = {}
+
+    def started(self, event):
+        labels = (command_collection(event.command_name, event.command), event.command_name)
+        self.pending[(event.connection_id, event.request_id)] = (labels, event)
+
+    def succeeded(self, event):
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        labels, started_event = started
+        duration = event.duration_micros / 1e6
+        mongo_latency.observe(labels, duration)
+        documents = reply_document_count(event.reply)
+        if documents:
+            mongo_documents.inc(labels, documents)
+        if self.on_success is not None:
+            self.on_success(started_event, labels[0], duration, documents)
+
+    def failed(self, event):
+        started = self.pending.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        labels, _ = started
+        mongo_latency.observe(labels, event.duration_micros / 1e6)
+        mongo_failures.inc(labels)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and response size per route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = defaultdict(int)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = [500]
+        size = [0]
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        self.in_flight[method] += 1
+        http_in_flight.set(self.in_flight[method], (method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight[method] -= 1
+            http_in_flight.set(self.in_flight[method], (method,))
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            http_requests.inc((method, route_path, status[0]))
+            http_latency.observe((method, route_path), elapsed)
+            http_response_size.observe((method, route_path), size[0])
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
@@ -0,0 +1,244 @@
+"""
+On-demand request profiler for The Third Angle backend.
+Send "X-Profile: 1" (or the PROFILE_TOKEN when one is set), or set a sample rate for a path prefix
+at /admin/profiler. A sampler thread records the stacks of the request's tasks every PROFILE_INTERVAL
+as folded stacks ("a;b;c count") for flamegraph.pl or speedscope.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_MAX_CONCURRENT = int(os.environ.get("PROFILE_MAX_CONCURRENT", "2"))
+PROFILE_KEEP = 50
+# Tasks a profiled request starts inherit its profile through their context
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("current_profile", default=None)
+# Profile of each task created during a profiled request, where Task.get_context() is missing
+_task_profiles: "weakref.WeakKeyDictionary[asyncio.Task, Any]" = weakref.WeakKeyDictionary()
+
+def task_profile(task: asyncio.Task):
+    get_context = getattr(task, "get_context", None)  # Python 3.12+
+    if get_context is not None:
+        return get_context().get(_current_profile)
+    return _task_profiles.get(task)
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)  # co_qualname is Python 3.11+
+    return f"{name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+def running_stack(frame, root_frame) -> List[str]:
+    """The live stack from the task's root coroutine down to the executing frame"""
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame))
+        if frame is root_frame:
+            break
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def awaiting_stack(coro) -> List[str]:
+    """The chain of coroutines a suspended task is awaiting, ending in what it waits on"""
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(frame_label(frame))
+        awaited = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        if awaited is None or not (hasattr(awaited, "cr_frame") or hasattr(awaited, "gi_frame")):
+            stack.append(f"<await {type(awaited).__name__}>" if awaited is not None else "<await>")
+            break
+        coro = awaited
+    return stack
+
+class RequestProfile:
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started = datetime.utcnow()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.status = None
+        self.stacks: Dict[str, int] = defaultdict(int)
+        self.samples = 0
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 2) if self.duration is not None else None,
+            "samples": self.samples,
+            "interval_ms": PROFILE_INTERVAL * 1000
+        }
+
+class RequestProfiler:
+    """Chooses which requests to profile and samples their tasks from a background thread"""
+
+    def __init__(self):
+        self.sample_rate = 0.0
+        self.path_prefix = "/api/"
+        self.active: List[RequestProfile] = []
+        self.profiles: Dict[str, RequestProfile] = OrderedDict()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id = None
+        self.wake = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.profiled = 0
+        self.skipped = 0
+
+    def wanted(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                return value.decode() == PROFILE_TOKEN if PROFILE_TOKEN else value == b"1"
+        return (
+            self.sample_rate > 0 and scope["path"].startswith(self.path_prefix)
+            and random.random() < self.sample_rate
+        )
+
+    def begin(self, scope) -> Optional[RequestProfile]:
+        """Start profiling the current task's request, or None when PROFILE_MAX_CONCURRENT are running"""
+        if len(self.active) >= PROFILE_MAX_CONCURRENT:
+            self.skipped += 1
+            return None
+        self._install()
+        profile = RequestProfile(scope["method"], scope["path"])
+        _task_profiles[asyncio.current_task()] = profile
+        self.active.append(profile)
+        self.profiled += 1
+        self.wake.set()
+        return profile
+
+    def finish(self, profile: RequestProfile):
+        profile.duration = time.perf_counter() - profile.start
+        self.active.remove(profile)
+        self.profiles[profile.id] = profile
+        while len(self.profiles) > PROFILE_KEEP:
+            self.profiles.popitem(last=False)
+
+    def _install(self):
+        """On first use, start the sampler thread and, where tasks' contexts cannot be read, tag new tasks"""
+        if self.thread is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        if not hasattr(asyncio.Task, "get_context"):
+            previous_factory = self.loop.get_task_factory()
+
+            def task_factory(loop, coro, **kwargs):
+                task = previous_factory(loop, coro, **kwargs) if previous_factory else asyncio.Task(coro, loop=loop, **kwargs)
+                profile = _current_profile.get()
+                if profile is not None:
+                    _task_profiles[task] = profile
+                return task
+
+            self.loop.set_task_factory(task_factory)
+        self.thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wake.wait()
+            time.sleep(PROFILE_INTERVAL)
+            profiles = list(self.active)
+            if not profiles:
+                self.wake.clear()
+                if self.active:  # A profile started while the event was being cleared
+                    self.wake.set()
+                continue
+            try:
+                self._sample(profiles)
+            except Exception:
+                logger.exception("Request profiler sample failed")
+
+    def _sample(self, profiles: List[RequestProfile]):
+        # The loop thread's live frames; the task whose root coroutine frame is among them is running
+        top_frame = sys._current_frames().get(self.loop_thread_id)
+        live_frames = set()
+        frame = top_frame
+        while frame is not None:
+            live_frames.add(frame)
+            frame = frame.f_back
+        active = set(profiles)
+        for task in asyncio.all_tasks(self.loop):
+            profile = task_profile(task)
+            if profile not in active or task.done():
+                continue
+            # Each task's stack starts at its own root coroutine, so tasks form separate trees
+            coro = task.get_coro()
+            root_frame = getattr(coro, "cr_frame", None)
+            if root_frame is not None and root_frame in live_frames and top_frame is not None:
+                stack = running_stack(top_frame, root_frame)
+            else:
+                stack = awaiting_stack(coro)
+            if stack:
+                profile.stacks[";".join(stack)] += 1
+        for profile in profiles:
+            profile.samples += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "path_prefix": self.path_prefix,
+            "interval_ms": PROFILE_INTERVAL * 1000,
+            "max_concurrent": PROFILE_MAX_CONCURRENT,
+            "active": len(self.active),
+            "profiled": self.profiled,
+            "skipped": self.skipped,
+            "profiles": [profile.summary() for profile in reversed(self.profiles.values())]
+        }
+
+request_profiler = RequestProfiler()
+
+class ProfilerMiddleware:
+    """ASGI middleware that profiles the requests the request profiler selects"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not request_profiler.wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = request_profiler.begin(scope)
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER.lower().encode(), profile.id.encode())]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _current_profile.reset(token)
+            request_profiler.finish(profile)
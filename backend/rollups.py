@@ -0,0 +1,79 @@
+"""
+Daily per-user time rollups for The Third Angle backend.
+time_rollups_daily holds one document per (user, day) with that day's totals, so readers scan at
+most one small document per user per day instead of every time entry.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from archive import day_key, hot_tier_query
+
+ROLLUP_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_day_unique", unique=True),
+    IndexModel([("user_id", ASCENDING), ("date", DESCENDING)], name="user_date"),
+    IndexModel([("date", DESCENDING)], name="date"),
+]
+
+def days_ago_start(days: int) -> datetime:
+    """Midnight (UTC) of the day `days` days ago"""
+    return datetime.combine((datetime.utcnow() - timedelta(days=days)).date(), datetime.min.time())
+
+async def record_time_rollup(db, entry: Dict[str, Any]):
+    """Add a time entry to its user's daily rollup"""
+    await db.time_rollups_daily.update_one(
+        {"user_id": entry["user_id"], "day": day_key(entry["date"])},
+        {
+            "$inc": {
+                "total_hours": entry["hours"],
+                "overtime_hours": entry["hours"] if entry.get("is_overtime") else 0,
+                "entry_count": 1,
+                "pomodoro_count": 1 if entry.get("is_pomodoro") else 0
+            },
+            "$setOnInsert": {"date": datetime.combine(entry["date"].date(), datetime.min.time())}
+        },
+        upsert=True
+    )
+
+async def backfill_time_rollups(db, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """Rebuild daily rollups from raw time entries with a server-side $merge.
+
+    Archived days keep the rollups they had when they were archived; only days after the
+    archive are rebuilt.
+    """
+    # $merge on (user_id, day) needs the unique index to exist
+    await db.time_rollups_daily.create_indexes(ROLLUP_INDEXES)
+    match = {"user_id": user_id} if user_id else {}
+    pipeline = [
+        {"$match": hot_tier_query("time_entries", match)},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}
+            },
+            "total_hours": {"$sum": "$hours"},
+            "overtime_hours": {"$sum": {"$cond": ["$is_overtime", "$hours", 0]}},
+            "entry_count": {"$sum": 1},
+            "pomodoro_count": {"$sum": {"$cond": ["$is_pomodoro", 1, 0]}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "day": "$_id.day",
+            "date": {"$dateFromString": {"dateString": "$_id.day", "format": "%Y-%m-%d"}},
+            "total_hours": 1,
+            "overtime_hours": 1,
+            "entry_count": 1,
+            "pomodoro_count": 1
+        }},
+        {"$merge": {
+            "into": "time_rollups_daily",
+            "on": ["user_id", "day"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+    await db.time_entries.aggregate(pipeline).to_list(None)
+    return {"rollups": await db.time_rollups_daily.count_documents(match)}
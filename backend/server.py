@@ -1,29 +1,52 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, Query, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateOne, ReplaceOne, DeleteOne
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 import asyncio
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from contextlib import asynccontextmanager
+import functools
+import inspect
 import json
+import base64
+import csv
+import io
+import math
+import random
+import time
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# These modules read their settings from the environment loaded above
+from archive import (  # noqa: E402
+    ARCHIVE_MIN_RETENTION_DAYS, ARCHIVE_RETENTION_DAYS, archive_old_records, archive_summary, archived_batches,
+    archived_hours_by_user, clear_archive, day_key, hot_tier_query
+)
+from metrics import MetricsMiddleware, MongoCommandMetrics, app_gauges, render_metrics  # noqa: E402
+from profiler import PROFILE_ID_HEADER, ProfilerMiddleware, request_profiler  # noqa: E402
+from rollups import ROLLUP_INDEXES, backfill_time_rollups, days_ago_start, record_time_rollup  # noqa: E402
+from slow_queries import ensure_slow_query_log, plan_stages, slow_query_log, slow_query_ranking  # noqa: E402
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics(slow_query_log.observe)])
 db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
-app = FastAPI(title="The Third Angle API", version="2.0.0")
+app = FastAPI(title="The Third Angle API", version="2.0.0", default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -87,11 +110,12 @@ class Task(BaseModel):
     due_date: Optional[datetime] = None
     completed_date: Optional[datetime] = None
     tags: List[str] = []
-    position: int = 0  # For drag-and-drop ordering
+    position: float = 0  # Fractional rank for drag-and-drop ordering
     source: Optional[str] = None  # github, notion, manual
     source_url: Optional[str] = None
     comments_count: int = 0
     watchers: List[str] = []
+    change_seq: Optional[int] = None  # Set by the server on every write, see /sync
 
 class TaskCreate(BaseModel):
     title: str
@@ -116,7 +140,12 @@ class TaskUpdate(BaseModel):
     actual_hours: Optional[float] = None
     due_date: Optional[datetime] = None
     tags: Optional[List[str]] = None
-    position: Optional[int] = None
+    position: Optional[float] = None
+
+class TaskMove(BaseModel):
+    status: Optional[TaskStatus] = None
+    after_id: Optional[str] = None  # Task that ends up directly above the moved task
+    before_id: Optional[str] = None  # Task that ends up directly below the moved task
 
 class TaskComment(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -142,6 +171,7 @@ class TimeEntry(BaseModel):
     date: datetime = Field(default_factory=datetime.utcnow)
     is_pomodoro: bool = False
     is_overtime: bool = False  # Flag for burnout detection
+    change_seq: Optional[int] = None
 
 class TimeEntryCreate(BaseModel):
     user_id: str
@@ -194,6 +224,7 @@ class Notification(BaseModel):
     created_date: datetime = Field(default_factory=datetime.utcnow)
     related_task_id: Optional[str] = None
     related_user_id: Optional[str] = None
+    change_seq: Optional[int] = None
 
 class NotificationCreate(BaseModel):
     user_id: str
@@ -220,9 +251,561 @@ class WikiPageCreate(BaseModel):
     tags: List[str] = []
     is_public: bool = True
 
+# Index management
+# Indexes every route relies on, declared per collection and created on startup.
+# List indexes end with "id" so keyset pagination on (sort field, id) is an index range scan.
+INDEX_SPECS = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("burnout_risk", ASCENDING)], name="burnout_risk"),
+        IndexModel([("joined_date", ASCENDING), ("id", ASCENDING)], name="joined_date"),
+    ],
+    "tasks": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("position", ASCENDING), ("id", ASCENDING)], name="position"),
+        IndexModel([("status", ASCENDING), ("position", ASCENDING), ("id", ASCENDING)], name="status_position"),
+        IndexModel([("assigned_to", ASCENDING), ("status", ASCENDING)], name="assigned_to_status"),
+        IndexModel([("assigned_users", ASCENDING), ("status", ASCENDING)], name="assigned_users_status"),
+        IndexModel([("project_id", ASCENDING), ("position", ASCENDING), ("id", ASCENDING)], name="project_position"),
+        IndexModel([("completed_date", ASCENDING)], name="completed_date"),
+        IndexModel([("created_date", ASCENDING), ("id", ASCENDING)], name="created_date"),
+        IndexModel([("change_seq", ASCENDING)], name="change_seq"),
+    ],
+    "time_entries": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="user_date"),
+        IndexModel([("task_id", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="task_date"),
+        IndexModel([("date", DESCENDING), ("id", DESCENDING)], name="date"),
+        IndexModel([("user_id", ASCENDING), ("change_seq", ASCENDING)], name="user_change_seq"),
+        IndexModel([("change_seq", ASCENDING)], name="change_seq"),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_date", DESCENDING)], name="user_created"),
+        IndexModel([("user_id", ASCENDING), ("read", ASCENDING), ("created_date", DESCENDING)], name="user_read_created"),
+        IndexModel([("created_date", ASCENDING)], name="created_date"),
+        IndexModel([("user_id", ASCENDING), ("change_seq", ASCENDING)], name="user_change_seq"),
+        IndexModel([("change_seq", ASCENDING)], name="change_seq"),
+    ],
+    "tombstones": [
+        IndexModel([("change_seq", ASCENDING)], name="change_seq"),
+    ],
+    "slow_queries": [
+        IndexModel([("recorded_date", ASCENDING)], name="recorded_date"),
+        IndexModel([("shape_id", ASCENDING), ("recorded_date", DESCENDING)], name="shape_recorded"),
+    ],
+    "task_comments": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("task_id", ASCENDING), ("created_date", ASCENDING), ("id", ASCENDING)], name="task_created"),
+    ],
+    "goals": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_date", ASCENDING), ("id", ASCENDING)], name="user"),
+        IndexModel([("created_date", ASCENDING), ("id", ASCENDING)], name="created_date"),
+    ],
+    "standups": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)], name="user_date"),
+        IndexModel([("date", DESCENDING), ("id", DESCENDING)], name="date"),
+    ],
+    "wiki_pages": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("is_public", ASCENDING), ("updated_date", DESCENDING), ("id", DESCENDING)], name="public_updated"),
+    ],
+    "leaderboard_monthly": [
+        IndexModel([("month", ASCENDING), ("user_id", ASCENDING)], name="month_user_unique", unique=True),
+        IndexModel([("month", ASCENDING), ("points", DESCENDING), ("user_id", ASCENDING)], name="month_points"),
+    ],
+    "time_rollups_daily": ROLLUP_INDEXES,
+}
+
+# Representative query shape of each route, used to verify index coverage with explain()
+_SHAPE_ID = "00000000-0000-0000-0000-000000000000"
+_SHAPE_DATE = datetime(2000, 1, 1)
+
+QUERY_SHAPES = [
+    {"route": "POST /users", "collection": "users", "filter": {"email": "shape@example.com"}},
+    {"route": "GET /users", "collection": "users", "filter": {}, "sort": [("joined_date", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /users/{user_id}", "collection": "users", "filter": {"id": _SHAPE_ID}},
+    {"route": "GET /tasks", "collection": "tasks", "filter": {}, "sort": [("position", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /tasks?user_id", "collection": "tasks", "filter": {"$or": [{"assigned_to": _SHAPE_ID}, {"assigned_users": {"$in": [_SHAPE_ID]}}]}},
+    {"route": "GET /tasks?status", "collection": "tasks", "filter": {"status": TaskStatus.TODO.value}, "sort": [("position", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /tasks?project_id", "collection": "tasks", "filter": {"project_id": _SHAPE_ID}, "sort": [("position", ASCENDING), ("id", ASCENDING)]},
+    {"route": "PUT /tasks/{task_id}", "collection": "tasks", "filter": {"id": _SHAPE_ID}},
+    {"route": "POST /tasks (position counter)", "collection": "tasks", "filter": {"project_id": _SHAPE_ID}, "sort": [("position", DESCENDING), ("id", DESCENDING)], "limit": 1},
+    {"route": "PUT /tasks/{task_id}/move", "collection": "tasks", "filter": {"status": TaskStatus.TODO.value}, "sort": [("position", DESCENDING), ("id", DESCENDING)], "limit": 1},
+    {"route": "GET /analytics/productivity-trends (tasks)", "collection": "tasks", "filter": {"completed_date": {"$gte": _SHAPE_DATE}, "status": TaskStatus.DONE.value}},
+    {"route": "GET /export/tasks", "collection": "tasks", "filter": {"created_date": {"$gte": _SHAPE_DATE}}, "sort": [("created_date", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /export/time-entries", "collection": "time_entries", "filter": {"date": {"$gte": _SHAPE_DATE}}, "sort": [("date", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /export/time-entries?user_id", "collection": "time_entries", "filter": {"user_id": _SHAPE_ID, "date": {"$gte": _SHAPE_DATE}}, "sort": [("date", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /time-entries", "collection": "time_entries", "filter": {}, "sort": [("date", DESCENDING), ("id", DESCENDING)]},
+    {"route": "GET /time-entries?user_id", "collection": "time_entries", "filter": {"user_id": _SHAPE_ID}, "sort": [("date", DESCENDING), ("id", DESCENDING)]},
+    {"route": "GET /time-entries?task_id", "collection": "time_entries", "filter": {"task_id": _SHAPE_ID}, "sort": [("date", DESCENDING), ("id", DESCENDING)]},
+    {"route": "GET /analytics/individual-performance (hours)", "collection": "time_entries", "filter": {"date": {"$gte": _SHAPE_DATE}}},
+    {"route": "POST /time-entries (burnout risk)", "collection": "time_rollups_daily", "filter": {"user_id": _SHAPE_ID, "date": {"$gte": _SHAPE_DATE}}},
+    {"route": "GET /analytics/productivity-trends (time)", "collection": "time_rollups_daily", "filter": {"date": {"$gte": _SHAPE_DATE}}},
+    {"route": "GET /notifications/{user_id}", "collection": "notifications", "filter": {"user_id": _SHAPE_ID}, "sort": [("created_date", DESCENDING)]},
+    {"route": "GET /notifications/{user_id}?unread_only", "collection": "notifications", "filter": {"user_id": _SHAPE_ID, "read": False}, "sort": [("created_date", DESCENDING)]},
+    {"route": "PUT /notifications/{notification_id}/read", "collection": "notifications", "filter": {"id": _SHAPE_ID}},
+    {"route": "GET /tasks/{task_id}/comments", "collection": "task_comments", "filter": {"task_id": _SHAPE_ID}, "sort": [("created_date", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /goals", "collection": "goals", "filter": {}, "sort": [("created_date", ASCENDING), ("id", ASCENDING)]},
+    {"route": "GET /goals?user_id", "collection": "goals", "filter": {"user_id": _SHAPE_ID}, "sort": [("created_date", ASCENDING), ("id", ASCENDING)]},
+    {"route": "POST /standups", "collection": "standups", "filter": {"user_id": _SHAPE_ID, "date": {"$gte": _SHAPE_DATE}}},
+    {"route": "GET /standups", "collection": "standups", "filter": {}, "sort": [("date", DESCENDING), ("id", DESCENDING)]},
+    {"route": "GET /wiki", "collection": "wiki_pages", "filter": {"is_public": True}, "sort": [("updated_date", DESCENDING), ("id", DESCENDING)]},
+    {"route": "GET /wiki/{page_id}", "collection": "wiki_pages", "filter": {"id": _SHAPE_ID}},
+    {"route": "GET /analytics/team-leaderboard", "collection": "leaderboard_monthly", "filter": {"month": "2000-01"}, "sort": [("points", DESCENDING), ("user_id", ASCENDING)]},
+    {"route": "GET /sync (tasks)", "collection": "tasks", "filter": {"change_seq": {"$gt": 0}}, "sort": [("change_seq", ASCENDING)]},
+    {"route": "GET /sync (time entries)", "collection": "time_entries", "filter": {"change_seq": {"$gt": 0}}, "sort": [("change_seq", ASCENDING)]},
+    {"route": "GET /sync?user_id (time entries)", "collection": "time_entries", "filter": {"user_id": _SHAPE_ID, "change_seq": {"$gt": 0}}, "sort": [("change_seq", ASCENDING)]},
+    {"route": "GET /sync?user_id (notifications)", "collection": "notifications", "filter": {"user_id": _SHAPE_ID, "change_seq": {"$gt": 0}}, "sort": [("change_seq", ASCENDING)]},
+    {"route": "GET /sync (tombstones)", "collection": "tombstones", "filter": {"collection": "tasks", "change_seq": {"$gt": 0}}, "sort": [("change_seq", ASCENDING)]},
+    {"route": "POST /admin/archive (time entries)", "collection": "time_entries", "filter": {"date": {"$lt": _SHAPE_DATE}}, "sort": [("date", ASCENDING)], "limit": 1},
+    {"route": "POST /admin/archive (notifications)", "collection": "notifications", "filter": {"created_date": {"$lt": _SHAPE_DATE}}, "sort": [("created_date", ASCENDING)], "limit": 1},
+    {"route": "GET /admin/slow-queries", "collection": "slow_queries", "filter": {"recorded_date": {"$gte": _SHAPE_DATE}}},
+    {"route": "GET /admin/slow-queries (latest explain)", "collection": "slow_queries", "filter": {"shape_id": "shape", "plan": {"$ne": None}}, "sort": [("recorded_date", DESCENDING)], "limit": 1},
+    {"route": "GET /analytics/team-leaderboard?around_user_id", "collection": "leaderboard_monthly", "filter": {"month": "2000-01", "$or": [{"points": {"$gt": 0}}, {"points": 0, "user_id": {"$lt": _SHAPE_ID}}]}},
+]
+
+# Server error codes for an existing index whose name matches but whose keys or options differ
+INDEX_CONFLICT_CODES = {85, 86}
+
+async def ensure_indexes():
+    """Create the declared indexes for every collection, replacing ones whose definition changed"""
+    await ensure_slow_query_log(db)
+    specs = {**INDEX_SPECS, "time_entries": time_entry_indexes(await ensure_time_entries_collection())}
+    created = {}
+    for collection_name, indexes in specs.items():
+        collection = db[collection_name]
+        try:
+            created[collection_name] = await collection.create_indexes(indexes)
+        except OperationFailure as e:
+            if e.code not in INDEX_CONFLICT_CODES:
+                # Keep starting up; the index report will show the affected routes as collection scans
+                logger.error(f"Failed to create indexes on {collection_name}: {e}")
+                created[collection_name] = []
+                continue
+            created[collection_name] = []
+            for index in indexes:
+                try:
+                    created[collection_name].extend(await collection.create_indexes([index]))
+                except OperationFailure as conflict:
+                    if conflict.code not in INDEX_CONFLICT_CODES:
+                        logger.error(f"Failed to create index {index.document['name']} on {collection_name}: {conflict}")
+                        continue
+                    logger.info(f"Recreating index {index.document['name']} on {collection_name} with its new definition")
+                    await collection.drop_index(index.document["name"])
+                    created[collection_name].extend(await collection.create_indexes([index]))
+    return created
+
+async def explain_query_shape(shape: Dict[str, Any]) -> Dict[str, Any]:
+    """Run explain() for a route's query shape and report whether it scans the whole collection"""
+    cursor = db[shape["collection"]].find(shape["filter"])
+    if shape.get("sort"):
+        cursor = cursor.sort(shape["sort"])
+    if shape.get("limit"):
+        cursor = cursor.limit(shape["limit"])
+    explanation = await cursor.explain()
+    stages = plan_stages(explanation["queryPlanner"]["winningPlan"])
+    return {
+        "route": shape["route"],
+        "collection": shape["collection"],
+        "stages": stages,
+        "collection_scan": "COLLSCAN" in stages
+    }
+
+# Pagination helpers
+# Keyset pages after an opaque (sort value, id) cursor; the next page's cursor goes in X-Next-Cursor
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(document: Dict[str, Any], sort_field: str) -> str:
+    value = document.get(sort_field)
+    is_date = isinstance(value, datetime)
+    payload = [value.isoformat() if is_date else value, is_date, document["id"]]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        value, is_date, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if is_date:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, document_id
+
+async def find_page(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    direction: int,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """Fetch one page of `collection` ordered by (sort_field, id) and set the next-page cursor header"""
+    limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    if cursor:
+        value, document_id = decode_cursor(cursor)
+        operator = "$gt" if direction == ASCENDING else "$lt"
+        after_cursor = {"$or": [
+            {sort_field: {operator: value}},
+            {sort_field: value, "id": {operator: document_id}}
+        ]}
+        query = {"$and": [query, after_cursor]} if query else after_cursor
+
+    # The cursor needs the sort key even when the caller did not ask for it
+    projection, added = require_fields(projection, [sort_field, "id"])
+    documents = await collection.find(query, projection).sort([(sort_field, direction), ("id", direction)]).limit(limit + 1).to_list(None)
+    if len(documents) > limit:
+        documents = documents[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(documents[-1], sort_field)
+    drop_fields(documents, added)
+    return documents
+
+# Read serialization
+# Reads return projected documents encoded with orjson, with fields missing from older documents
+# filled from the model's defaults; `fields=` narrows the projection
+@functools.lru_cache(maxsize=None)
+def model_projection(model) -> Dict[str, int]:
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+@functools.lru_cache(maxsize=None)
+def model_defaults(model) -> Dict[str, Any]:
+    return {
+        name: field.default for name, field in model.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    }
+
+def field_projection(model, fields: Optional[str]) -> Dict[str, int]:
+    """Projection for a `fields=` parameter: the listed fields plus id, or every field of the model"""
+    if not fields:
+        return model_projection(model)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {"_id": 0, "id": 1, **dict.fromkeys(requested, 1)}
+
+def require_fields(projection: Optional[Dict[str, int]], fields: List[str]):
+    """Add fields the server itself needs to a projection; returns it and the fields that had to be added"""
+    if projection is None:
+        return None, []
+    added = [field for field in fields if not projection.get(field)]
+    return {**projection, **dict.fromkeys(added, 1)}, added
+
+def drop_fields(documents: List[Dict[str, Any]], fields: List[str]):
+    for document in documents:
+        for field in fields:
+            document.pop(field, None)
+
+def model_rows(model, documents: List[Dict[str, Any]], projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    defaults = model_defaults(model)
+    if projection is not None:
+        defaults = {name: value for name, value in defaults.items() if projection.get(name)}
+    return [{**defaults, **document} for document in documents]
+
+def rows_response(content: Any, response: Optional[Response] = None) -> ORJSONResponse:
+    """Encode with orjson, keeping headers the route set on `response` (the page cursor)"""
+    return ORJSONResponse(content, headers=dict(response.headers) if response is not None else None)
+
+# Export helpers
+# Exports stream straight from the Motor cursor, one formatted chunk per batch. The response
+# awaits the client for every chunk, so a slow reader pauses the cursor instead of buffering rows.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def format_export_batch(documents: List[Dict[str, Any]], fields: List[str], export_format: str) -> str:
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for document in documents:
+            row = []
+            for field in fields:
+                value = export_value(document.get(field))
+                row.append(";".join(map(str, value)) if isinstance(value, list) else value)
+            writer.writerow(row)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps({field: export_value(document.get(field)) for field in fields}) + "\n"
+        for document in documents
+    )
+
+async def stream_export(collection, query: Dict[str, Any], sort: List, fields: List[str], export_format: str, archive: bool = False):
+    """Yield formatted export chunks of EXPORT_BATCH_SIZE rows; with `archive`, archived days come first"""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(fields)
+        yield buffer.getvalue()
+
+    if archive:
+        async for batch in archived_batches(collection, query, fields, EXPORT_BATCH_SIZE):
+            yield format_export_batch(batch, fields, export_format)
+        query = hot_tier_query(collection.name, query)
+
+    cursor = collection.find(query, {"_id": 0, **{field: 1 for field in fields}}).sort(sort).batch_size(EXPORT_BATCH_SIZE)
+    batch = []
+    try:
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield format_export_batch(batch, fields, export_format)
+                batch = []
+        if batch:
+            yield format_export_batch(batch, fields, export_format)
+    finally:
+        # Release the server-side cursor if the client disconnects mid-stream
+        await cursor.close()
+
+def export_response(chunks, name: str, export_format: str) -> StreamingResponse:
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Export format must be ndjson or csv")
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored dates are naive UTC; convert timezone-aware query parameters to match"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def date_range_query(field: str, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    date_range = {}
+    if start:
+        date_range["$gte"] = naive_utc(start)
+    if end:
+        date_range["$lt"] = naive_utc(end)
+    return {field: date_range} if date_range else {}
+
+# Realtime events
+# Writes publish delta events to user and board topics at /api/ws; a subscriber whose queue
+# overflows gets a single "resync" event instead
+REALTIME_QUEUE_SIZE = 256
+HEARTBEAT_INTERVAL = 25.0
+HEARTBEAT_MESSAGE = json.dumps({"type": "heartbeat"})
+RESYNC_MESSAGE = json.dumps({"type": "resync"})
+
+def user_topic(user_id: str) -> str:
+    return f"user:{user_id}"
+
+def board_topic(project_id: Optional[str]) -> str:
+    return f"board:{project_id or DEFAULT_BOARD}"
+
+class Subscriber:
+    def __init__(self, topics: List[str], max_queue: int = REALTIME_QUEUE_SIZE):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.resyncs = 0
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without waiting; on overflow replace the backlog with a resync"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_MESSAGE)
+            self.resyncs += 1
+            return False
+
+class EventBroker:
+    def __init__(self):
+        self.topics: Dict[str, set] = defaultdict(set)
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.resyncs = 0
+
+    def subscribe(self, topics: List[str], max_queue: int = REALTIME_QUEUE_SIZE) -> Subscriber:
+        subscriber = Subscriber(topics, max_queue)
+        for topic in topics:
+            self.topics[topic].add(subscriber)
+        self.subscribers += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for topic in subscriber.topics:
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.topics[topic]
+        self.subscribers -= 1
+
+    def publish(self, topics: List[str], event_type: str, data: Any):
+        """Send one event to every subscriber of any of `topics`"""
+        recipients = set()
+        for topic in topics:
+            recipients.update(self.topics.get(topic, ()))
+        self.published += 1
+        if not recipients:
+            return
+        message = json.dumps({"type": event_type, "data": jsonable_encoder(data), "ts": time.time()})
+        for subscriber in recipients:
+            if subscriber.offer(message):
+                self.delivered += 1
+            else:
+                self.resyncs += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "topics": len(self.topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "resyncs": self.resyncs,
+            "queue_size": REALTIME_QUEUE_SIZE,
+            "heartbeat_seconds": HEARTBEAT_INTERVAL
+        }
+
+event_broker = EventBroker()
+
 # Helper functions
+# Aggregation expression for the distinct set of users a task is assigned to
+# (assigned_to plus assigned_users), matching the $or filter used by the task routes
+ASSIGNEES_EXPRESSION = {
+    "$setUnion": [
+        {"$cond": [{"$ifNull": ["$assigned_to", False]}, ["$assigned_to"], []]},
+        {"$ifNull": ["$assigned_users", []]}
+    ]
+}
+
+async def find_existing_user_ids(user_ids: List[str]) -> set:
+    """Which of `user_ids` exist, checked with a single $in query"""
+    if not user_ids:
+        return set()
+    users = await db.users.find({"id": {"$in": list(user_ids)}}, {"_id": 0, "id": 1}).to_list(None)
+    return {user["id"] for user in users}
+
+class NotificationQueue:
+    """In-process queue that a background worker drains into notifications with insert_many.
+
+    Notifications for the same (user, task, type) within the dedup window are dropped, so
+    repeated assignments or mentions in quick succession produce a single notification.
+    """
+
+    def __init__(self, batch_size: int = 500, max_size: int = 10000, dedup_window: float = 60.0):
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.dedup_window = dedup_window
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.recent: Dict[tuple, float] = {}
+        self.enqueued = 0
+        self.inserted = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        if self.worker is None or self.worker.done():
+            self.queue = self.queue or asyncio.Queue(maxsize=self.max_size)
+            self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Insert everything still queued, then stop the worker"""
+        if self.queue is not None:
+            await self.queue.join()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+    @staticmethod
+    def dedup_key(document: Dict[str, Any]) -> tuple:
+        return document["user_id"], document.get("related_task_id"), document["type"]
+
+    async def enqueue(self, notification: Notification) -> bool:
+        """Queue a notification; returns False if it was dropped as a duplicate"""
+        now = time.monotonic()
+        document = notification.dict()
+        key = self.dedup_key(document)
+        last_seen = self.recent.get(key)
+        if last_seen is not None and now - last_seen < self.dedup_window:
+            self.deduplicated += 1
+            return False
+        self.recent[key] = now
+
+        self.start()
+        # Waits only when the queue is full, pushing back on the writers
+        await self.queue.put((now, document))
+        self.enqueued += 1
+        return True
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self._insert(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _insert(self, batch: List[tuple]):
+        try:
+            async with change_seqs(len(batch)) as first_seq:
+                for offset, (_, document) in enumerate(batch):
+                    document["change_seq"] = first_seq + offset
+                await db.notifications.insert_many([document for _, document in batch], ordered=False)
+            self.inserted += len(batch)
+            for _, document in batch:
+                notification = {key: value for key, value in document.items() if key != "_id"}
+                event_broker.publish([user_topic(document["user_id"])], "notification.created", notification)
+        except PyMongoError:
+            self.failed += len(batch)
+            logger.exception(f"Failed to insert {len(batch)} notifications")
+            # The batch is lost, so a retry of any of its notifications must not count as a duplicate
+            for queued_at, document in batch:
+                key = self.dedup_key(document)
+                if self.recent.get(key) == queued_at:
+                    del self.recent[key]
+
+        now = time.monotonic()
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_lag = now - batch[0][0]
+        self.max_lag = max(self.max_lag, self.last_lag)
+        self._forget_expired(now)
+
+    def _forget_expired(self, now: float):
+        if len(self.recent) > self.max_size:
+            self.recent = {key: seen for key, seen in self.recent.items() if now - seen < self.dedup_window}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "enqueued": self.enqueued,
+            "inserted": self.inserted,
+            "deduplicated": self.deduplicated,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2)
+        }
+
+notification_queue = NotificationQueue()
+
 async def create_notification(user_id: str, title: str, message: str, notification_type: NotificationType, task_id: str = None, related_user_id: str = None):
-    """Create a new notification"""
+    """Create a new notification; it is written by the notification queue's worker"""
     notification = Notification(
         user_id=user_id,
         title=title,
@@ -231,31 +814,28 @@ async def create_notification(user_id: str, title: str, message: str, notificati
         related_task_id=task_id,
         related_user_id=related_user_id
     )
-    await db.notifications.insert_one(notification.dict())
+    await notification_queue.enqueue(notification)
     return notification
 
 async def calculate_burnout_risk(user_id: str) -> str:
     """Calculate burnout risk based on working patterns"""
-    # Get last 14 days of time entries
-    two_weeks_ago = datetime.utcnow() - timedelta(days=14)
-    time_entries = await db.time_entries.find({
-        "user_id": user_id,
-        "date": {"$gte": two_weeks_ago}
-    }).to_list(1000)
-    
-    if not time_entries:
+    # Get daily hours for the last 14 days
+    rollups = await db.time_rollups_daily.find(
+        {"user_id": user_id, "date": {"$gte": days_ago_start(14)}},
+        {"_id": 0, "total_hours": 1}
+    ).to_list(None)
+
+    return burnout_risk_for([rollup["total_hours"] for rollup in rollups])
+
+def burnout_risk_for(daily_hours: List[float]) -> str:
+    """Burnout risk from a user's daily hour totals"""
+    if not daily_hours:
         return "low"
-    
-    # Calculate daily hours
-    daily_hours = defaultdict(float)
-    for entry in time_entries:
-        day = entry["date"].date()
-        daily_hours[day] += entry["hours"]
-    
+
     # Calculate metrics
-    avg_daily_hours = sum(daily_hours.values()) / len(daily_hours) if daily_hours else 0
-    max_daily_hours = max(daily_hours.values()) if daily_hours else 0
-    days_over_8_hours = sum(1 for hours in daily_hours.values() if hours > 8)
+    avg_daily_hours = sum(daily_hours) / len(daily_hours)
+    max_daily_hours = max(daily_hours)
+    days_over_8_hours = sum(1 for hours in daily_hours if hours > 8)
     
     # Burnout risk calculation
     if avg_daily_hours > 9 or max_daily_hours > 12 or days_over_8_hours > 7:
@@ -267,103 +847,1116 @@ async def calculate_burnout_risk(user_id: str) -> str:
 
 async def update_user_badges(user_id: str):
     """Update user badges based on achievements"""
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "badges": 1})
     if not user:
         return
     
-    badges = set(user.get("badges", []))
-    
-    # Check for task completion badges
+    # Check for task completion and consistency badges
     completed_tasks = await db.tasks.count_documents({
         "assigned_to": user_id,
         "status": TaskStatus.DONE
     })
+    active_days = await db.time_rollups_daily.count_documents({
+        "user_id": user_id,
+        "date": {"$gte": days_ago_start(7)}
+    })
+    badges = set(user.get("badges", [])) | earned_badges(completed_tasks, active_days)
     
+    # Update user badges
+    await db.users.update_one(
+        {"id": user_id},
+        {"$set": {"badges": list(badges)}}
+    )
+    analytics_cache.invalidate("users")
+
+def earned_badges(completed_tasks: int, active_days: int) -> set:
+    """Badges earned from tasks completed (as owner) and days active in the last week"""
+    badges = set()
     if completed_tasks >= 10:
         badges.add("task_master_10")
     if completed_tasks >= 50:
         badges.add("task_master_50")
     if completed_tasks >= 100:
         badges.add("task_master_100")
-    
-    # Check for consistency badges
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    daily_activity = await db.time_entries.aggregate([
-        {
-            "$match": {
+    if active_days >= 7:
+        badges.add("consistent_7_days")
+    return badges
+
+def completion_date_stage(status: Optional[str], completed_date: datetime) -> Dict[str, Any]:
+    """Pipeline $set fields that date a move into done; a task that was already done keeps its date"""
+    if status != TaskStatus.DONE:
+        return {}
+    return {"completed_date": {
+        "$cond": [{"$ne": ["$status", TaskStatus.DONE.value]}, {"$literal": completed_date}, "$completed_date"]
+    }}
+
+async def record_task_completion(old_task: Dict[str, Any], new_task: Dict[str, Any], completed_date: datetime) -> bool:
+    """If a write moved a task into done, date new_task and credit the assignee; returns whether it did"""
+    if new_task.get("status") != TaskStatus.DONE or old_task.get("status") == TaskStatus.DONE:
+        return False
+    new_task["completed_date"] = completed_date
+    if old_task.get("assigned_to"):
+        await db.users.update_one(
+            {"id": old_task["assigned_to"]},
+            {"$inc": {"total_tasks_completed": 1}}
+        )
+        await update_user_badges(old_task["assigned_to"])
+        await create_notification(
+            user_id=old_task["assigned_to"],
+            title="Task Completed!",
+            message=f"Great job completing: {old_task['title']}",
+            notification_type=NotificationType.TASK_COMPLETED,
+            task_id=old_task["id"]
+        )
+    return True
+
+# Burnout refresh
+# Burnout risk is recomputed in the background after time is logged. Refreshes are coalesced
+# per user: entries that arrive while one is running trigger exactly one more pass.
+_burnout_refreshes: Dict[str, asyncio.Task] = {}
+_burnout_refresh_requested = set()
+
+async def update_burnout_risk(user_id: str):
+    """Recompute a user's burnout risk and keep the team counters in step"""
+    burnout_risk = await calculate_burnout_risk(user_id)
+    previous_user = await db.users.find_one_and_update(
+        {"id": user_id},
+        {"$set": {"burnout_risk": burnout_risk}},
+        projection={"_id": 0, "burnout_risk": 1}
+    )
+    if previous_user and previous_user.get("burnout_risk") != burnout_risk:
+        await update_team_stats(burnout_stats_delta(previous_user.get("burnout_risk"), burnout_risk))
+        analytics_cache.invalidate("users")
+
+async def _run_burnout_refresh(user_id: str):
+    try:
+        while user_id in _burnout_refresh_requested:
+            _burnout_refresh_requested.discard(user_id)
+            await update_burnout_risk(user_id)
+    except Exception:
+        logger.exception(f"Burnout risk refresh failed for user {user_id}")
+    finally:
+        _burnout_refresh_requested.discard(user_id)
+        _burnout_refreshes.pop(user_id, None)
+
+def schedule_burnout_refresh(user_id: str):
+    _burnout_refresh_requested.add(user_id)
+    if user_id not in _burnout_refreshes:
+        _burnout_refreshes[user_id] = asyncio.create_task(_run_burnout_refresh(user_id))
+
+async def drain_burnout_refreshes():
+    """Wait for every scheduled burnout refresh to finish"""
+    while _burnout_refreshes:
+        await asyncio.gather(*list(_burnout_refreshes.values()), return_exceptions=True)
+
+# Task position helpers
+# Positions are fractional ranks, renumbered in the background once neighbours get too close.
+# New tasks take the next value of a per-board (project) counter in db.counters
+POSITION_STEP = 1.0
+# Smallest gap between neighbours, relative to their magnitude; a double carries about 16 significant digits
+MIN_POSITION_GAP = 1e-12
+DEFAULT_BOARD = "default"
+_position_rebalances: Dict[str, asyncio.Task] = {}
+_position_rebalance_requested = set()
+_position_counters_ready = set()
+
+def position_counter_id(project_id: Optional[str]) -> str:
+    return f"task_position:{project_id or DEFAULT_BOARD}"
+
+async def raise_position_counter(project_id: Optional[str], position: float):
+    """Make sure the board's counter is at least `position`"""
+    await db.counters.update_one(
+        {"_id": position_counter_id(project_id)},
+        {"$max": {"value": position}},
+        upsert=True
+    )
+
+async def next_task_position(project_id: Optional[str]) -> float:
+    """Atomically allocate the next bottom-of-board position"""
+    counter_id = position_counter_id(project_id)
+    if counter_id not in _position_counters_ready:
+        # Lazily start the counter at the board's current last position (an empty board
+        # starts at 0); $max makes concurrent initialisations idempotent
+        last_task = await db.tasks.find_one(
+            {"project_id": project_id},
+            {"_id": 0, "position": 1},
+            sort=[("position", DESCENDING), ("id", DESCENDING)]
+        )
+        last_position = (last_task.get("position") or 0) if last_task else -POSITION_STEP
+        await raise_position_counter(project_id, last_position)
+        _position_counters_ready.add(counter_id)
+    counter = await db.counters.find_one_and_update(
+        {"_id": counter_id},
+        {"$inc": {"value": POSITION_STEP}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["value"]
+
+def position_between(lower: Optional[float], upper: Optional[float]) -> float:
+    """A rank that sorts after `lower` and before `upper`; either bound may be open"""
+    if lower is None and upper is None:
+        return 0.0
+    if lower is None:
+        return upper - POSITION_STEP
+    if upper is None:
+        return lower + POSITION_STEP
+    return (lower + upper) / 2
+
+def positions_crowded(lower: float, upper: float) -> bool:
+    """Whether neighbours are too close to split again without losing precision"""
+    return upper - lower < max(abs(lower), abs(upper), POSITION_STEP) * MIN_POSITION_GAP
+
+async def rebalance_positions(status: str) -> Dict[str, Any]:
+    """Renumber one kanban column to evenly spaced ranks, keeping its current order.
+
+    Each write only applies if the task is still where it was read, so a card moved meanwhile
+    keeps its new place; those cards are counted as skipped and the column needs another pass.
+    """
+    tasks = await db.tasks.find(
+        {"status": status}, {"_id": 0, "id": 1, "position": 1, "project_id": 1}
+    ).sort([("position", ASCENDING), ("id", ASCENDING)]).to_list(None)
+    if not tasks:
+        return {"status": status, "tasks": 0, "rebalanced": 0, "skipped": 0}
+    start = math.floor(tasks[0].get("position") or 0)
+    moved = []
+    board_positions = {}
+    for index, task in enumerate(tasks):
+        position = start + index * POSITION_STEP
+        board_positions[task.get("project_id")] = position
+        if task.get("position") != position:
+            moved.append((task["id"], task.get("position"), position))
+    rebalanced = 0
+    if moved:
+        async with change_seqs(len(moved)) as first_seq:
+            result = await db.tasks.bulk_write([
+                UpdateOne(
+                    {"id": task_id, "status": status, "position": old_position},
+                    {"$set": {"position": position, "change_seq": first_seq + offset}}
+                )
+                for offset, (task_id, old_position, position) in enumerate(moved)
+            ], ordered=False)
+        rebalanced = result.matched_count
+        # Keep new tasks below the renumbered cards
+        await asyncio.gather(*(
+            raise_position_counter(project_id, position)
+            for project_id, position in board_positions.items()
+        ))
+    return {"status": status, "tasks": len(tasks), "rebalanced": rebalanced, "skipped": len(moved) - rebalanced}
+
+async def _run_position_rebalance(status: str):
+    try:
+        while status in _position_rebalance_requested:
+            _position_rebalance_requested.discard(status)
+            if (await rebalance_positions(status))["skipped"]:
+                # Cards moved during the pass; renumber again around their new places
+                _position_rebalance_requested.add(status)
+    except Exception:
+        logger.exception(f"Position rebalance failed for column {status}")
+    finally:
+        _position_rebalance_requested.discard(status)
+        _position_rebalances.pop(status, None)
+
+def schedule_position_rebalance(status: str):
+    _position_rebalance_requested.add(status)
+    if status not in _position_rebalances:
+        _position_rebalances[status] = asyncio.create_task(_run_position_rebalance(status))
+
+async def drain_position_rebalances():
+    """Wait for every scheduled column rebalance to finish"""
+    while _position_rebalances:
+        await asyncio.gather(*list(_position_rebalances.values()), return_exceptions=True)
+
+# Change sequence
+# Tasks, time entries and notifications carry a change_seq from one global counter; deleted
+# tasks leave a tombstone
+CHANGE_SEQ_ID = "change_seq"
+SYNC_COLLECTIONS = ("tasks", "time_entries", "notifications")
+_pending_change_seqs: Dict[int, int] = defaultdict(int)
+
+async def next_change_seq(count: int = 1) -> int:
+    """Atomically allocate `count` consecutive change seqs and return the first"""
+    counter = await db.counters.find_one_and_update(
+        {"_id": CHANGE_SEQ_ID},
+        {"$inc": {"value": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["value"] - count + 1
+
+@asynccontextmanager
+async def change_seqs(count: int = 1):
+    """Allocate seqs for a write and hold back /sync until the write has landed"""
+    first = await next_change_seq(count)
+    _pending_change_seqs[first] += 1
+    try:
+        yield first
+    finally:
+        _pending_change_seqs[first] -= 1
+        if not _pending_change_seqs[first]:
+            del _pending_change_seqs[first]
+
+async def record_tombstone(collection: str, document_id: str, change_seq: int):
+    await db.tombstones.insert_one({
+        "collection": collection,
+        "id": document_id,
+        "change_seq": change_seq,
+        "deleted_date": datetime.utcnow()
+    })
+
+async def backfill_change_seqs() -> Dict[str, int]:
+    """Give every synced document written without a change_seq (data from before sync existed) one.
+
+    Works through one chunk at a time, so memory stays flat however much data is missing a seq.
+    """
+    assigned = {}
+    for collection_name in SYNC_COLLECTIONS:
+        collection = db[collection_name]
+        assigned[collection_name] = 0
+        while True:
+            # Every pass fills the chunk it read, so the next one starts at the remaining documents
+            chunk = await collection.find({"change_seq": None}, {"_id": 0, "id": 1}).limit(SEED_CHUNK_SIZE).to_list(None)
+            if not chunk:
+                break
+            async with change_seqs(len(chunk)) as first:
+                await collection.bulk_write([
+                    UpdateOne({"id": document["id"], "change_seq": None}, {"$set": {"change_seq": first + i}})
+                    for i, document in enumerate(chunk)
+                ], ordered=False)
+            assigned[collection_name] += len(chunk)
+    return assigned
+
+_change_seq_backfill: Optional[asyncio.Task] = None
+
+async def _run_change_seq_backfill():
+    try:
+        assigned = await backfill_change_seqs()
+        if any(assigned.values()):
+            logger.info(f"Assigned change seqs to documents written without one: {assigned}")
+    except Exception:
+        logger.exception("Change seq backfill failed")
+
+def start_change_seq_backfill():
+    """Backfill change seqs in the background so startup does not wait for it"""
+    global _change_seq_backfill
+    if _change_seq_backfill is None or _change_seq_backfill.done():
+        _change_seq_backfill = asyncio.create_task(_run_change_seq_backfill())
+
+# Time entry storage
+# TIME_ENTRIES_STORAGE=timeseries creates time_entries as a time-series collection (MongoDB 7.0+)
+# with user_id as its metaField; migrate_time_entries converts an existing collection
+TIME_ENTRY_STORAGE_MODES = ("standard", "timeseries")
+TIME_ENTRIES_STORAGE = os.environ.get("TIME_ENTRIES_STORAGE", "standard")
+TIME_ENTRY_TIMESERIES_OPTIONS = {"timeField": "date", "metaField": "user_id", "granularity": "hours"}
+TIME_ENTRY_MIGRATION_BATCH = 5000
+
+async def time_entries_storage(name: str = "time_entries") -> Optional[str]:
+    """Storage mode of an existing time entries collection, or None if it does not exist yet"""
+    cursor = await db.list_collections(filter={"name": name})
+    collections = await cursor.to_list(None)
+    if not collections:
+        return None
+    return "timeseries" if collections[0].get("type") == "timeseries" else "standard"
+
+async def create_time_entries_collection(name: str, mode: str):
+    if mode == "timeseries":
+        await db.create_collection(name, timeseries=TIME_ENTRY_TIMESERIES_OPTIONS)
+    else:
+        await db.create_collection(name)
+
+async def ensure_time_entries_collection() -> str:
+    """Create time_entries in the configured storage mode if it is missing; returns the mode in use"""
+    mode = await time_entries_storage()
+    if mode is not None:
+        return mode
+    if TIME_ENTRIES_STORAGE not in TIME_ENTRY_STORAGE_MODES:
+        raise ValueError(f"TIME_ENTRIES_STORAGE must be one of {', '.join(TIME_ENTRY_STORAGE_MODES)}")
+    try:
+        await create_time_entries_collection("time_entries", TIME_ENTRIES_STORAGE)
+    except CollectionInvalid:
+        pass  # Created concurrently by another process
+    return await time_entries_storage()
+
+def time_entry_indexes(mode: str) -> List[IndexModel]:
+    """time_entries indexes for a storage mode; time-series collections get a plain id index"""
+    if mode != "timeseries":
+        return INDEX_SPECS["time_entries"]
+    indexes = [index for index in INDEX_SPECS["time_entries"] if index.document["name"] != "id_unique"]
+    return [IndexModel([("id", ASCENDING)], name="id")] + indexes
+
+async def copy_time_entries(source: str, target: str, after_seq: int) -> Dict[str, int]:
+    """Copy the entries above a change_seq watermark, oldest first, skipping ids the target already has"""
+    copied = 0
+    while True:
+        batch = await db[source].find({"change_seq": {"$gt": after_seq}}).sort("change_seq", ASCENDING).limit(TIME_ENTRY_MIGRATION_BATCH).to_list(None)
+        if not batch:
+            return {"copied": copied, "watermark": after_seq}
+        present = set(await db[target].distinct("id", {"id": {"$in": [entry["id"] for entry in batch]}}))
+        missing = [entry for entry in batch if entry["id"] not in present]
+        if missing:
+            await db[target].insert_many(missing, ordered=False)
+        copied += len(missing)
+        after_seq = batch[-1]["change_seq"]
+
+async def migrate_time_entries(mode: str, drop_legacy: bool = False) -> Dict[str, Any]:
+    """Convert a standard time_entries collection to time-series storage while the app keeps writing to it.
+
+    MongoDB cannot rename time-series collections, so the new collection is created under its
+    final name: the standard collection is renamed aside, time_entries is recreated as a
+    time-series collection that takes new writes at once, and the old entries are copied into it.
+    Until the copy finishes, raw entry reads miss the entries not yet copied. Converting a
+    time-series collection back is refused. The old collection is kept as
+    time_entries_standard_<timestamp> unless drop_legacy is set and the counts match.
+    """
+    if mode not in TIME_ENTRY_STORAGE_MODES:
+        raise ValueError(f"Storage mode must be one of {', '.join(TIME_ENTRY_STORAGE_MODES)}")
+    current = await time_entries_storage()
+    if current is None or current == mode:
+        return {"storage": await ensure_time_entries_collection(), "migrated": False}
+    if current == "timeseries":
+        raise ValueError(
+            "time_entries is a time-series collection, which MongoDB cannot rename, so it cannot be "
+            "converted back to standard storage online; export the entries and load them into a new collection instead"
+        )
+
+    # The copy walks change seqs, so entries from bulk loads need one first
+    await backfill_change_seqs()
+    legacy = f"time_entries_{current}_{datetime.utcnow():%Y%m%d%H%M%S}"
+    await db.time_entries.rename(legacy)
+    strays = []
+    while True:
+        try:
+            await create_time_entries_collection("time_entries", mode)
+            break
+        except CollectionInvalid:
+            # An insert after the rename recreated time_entries as a standard collection; set it aside too
+            strays.append(f"{legacy}_stray{len(strays) + 1}")
+            await db.time_entries.rename(strays[-1])
+    await ensure_indexes()
+    copied = 0
+    for source in [legacy, *strays]:
+        copied += (await copy_time_entries(source, "time_entries", 0))["copied"]
+    for stray in strays:
+        await db[stray].drop()
+    analytics_cache.invalidate("time_entries")
+
+    counts = {"legacy": await db[legacy].count_documents({}), "time_entries": await db.time_entries.count_documents({})}
+    dropped = drop_legacy and counts["legacy"] <= counts["time_entries"]
+    if dropped:
+        await db[legacy].drop()
+    return {"storage": mode, "migrated": True, "copied": copied, "counts": counts, "legacy_collection": None if dropped else legacy}
+
+# Leaderboard helpers
+# leaderboard_monthly holds one points document per (month, user), kept current by task
+# completions and time entries so the leaderboard is a single sorted read
+TASK_POINTS = 10
+HOUR_POINTS = 2
+LEADERBOARD_SORT = [("points", DESCENDING), ("user_id", ASCENDING)]
+
+def month_key(date: datetime) -> str:
+    return date.strftime("%Y-%m")
+
+def month_range(month: str):
+    """Start and end datetimes of a YYYY-MM month"""
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+def task_assignees(task: Dict[str, Any]) -> set:
+    assignees = set(task.get("assigned_users") or [])
+    if task.get("assigned_to"):
+        assignees.add(task["assigned_to"])
+    return assignees
+
+def leaderboard_task_key(task: Dict[str, Any]):
+    """The (month, assignees) a task scores for, or None if it scores nothing"""
+    if task.get("status") != TaskStatus.DONE or not task.get("completed_date"):
+        return None
+    return month_key(task["completed_date"]), frozenset(task_assignees(task))
+
+async def increment_leaderboard(month: str, user_ids, tasks: int = 0, hours: float = 0.0):
+    """Atomically add completed tasks and logged hours to users' monthly points"""
+    operations = [
+        UpdateOne(
+            {"month": month, "user_id": user_id},
+            {"$inc": {
+                "tasks_completed": tasks,
+                "hours_logged": hours,
+                "points": tasks * TASK_POINTS + hours * HOUR_POINTS
+            }},
+            upsert=True
+        )
+        for user_id in user_ids
+    ]
+    if operations:
+        await db.leaderboard_monthly.bulk_write(operations, ordered=False)
+
+async def update_leaderboard_for_task(old_task: Optional[Dict[str, Any]], new_task: Optional[Dict[str, Any]]):
+    """Move a task's completion points when its status, completion date or assignees change"""
+    old_key = leaderboard_task_key(old_task) if old_task else None
+    new_key = leaderboard_task_key(new_task) if new_task else None
+    if old_key == new_key:
+        return
+    if old_key:
+        await increment_leaderboard(old_key[0], old_key[1], tasks=-1)
+    if new_key:
+        await increment_leaderboard(new_key[0], new_key[1], tasks=1)
+
+def leaderboard_row(entry: Dict[str, Any], user: Dict[str, Any], rank: int) -> Dict[str, Any]:
+    return {
+        "user_id": user["id"],
+        "name": user["name"],
+        "avatar_url": user.get("avatar_url"),
+        "tasks_completed": entry.get("tasks_completed", 0),
+        "hours_logged": round(entry.get("hours_logged", 0), 1),
+        "points": round(entry.get("points", 0), 1),
+        "rank": rank,
+        "badges": user.get("badges", []),
+        "burnout_risk": user.get("burnout_risk", "low")
+    }
+
+async def rebuild_leaderboard(month: Optional[str] = None, repair: bool = True) -> Dict[str, Any]:
+    """Recompute a month's leaderboard from raw tasks and time entries, report drift and optionally repair it"""
+    month = month or month_key(datetime.utcnow())
+    start, end = month_range(month)
+
+    task_pipeline = [
+        {"$match": {"status": TaskStatus.DONE.value, "completed_date": {"$gte": start, "$lt": end}}},
+        {"$project": {"assignees": ASSIGNEES_EXPRESSION}},
+        {"$unwind": "$assignees"},
+        {"$group": {"_id": "$assignees", "tasks_completed": {"$sum": 1}}}
+    ]
+    time_pipeline = [
+        {"$match": {"date": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": "$user_id", "hours_logged": {"$sum": "$hours"}}}
+    ]
+    task_counts, hour_sums, archived_hours, stored = await asyncio.gather(
+        db.tasks.aggregate(task_pipeline).to_list(None),
+        db.time_entries.aggregate(time_pipeline).to_list(None),
+        archived_hours_by_user(db.time_entries, start, end),
+        db.leaderboard_monthly.find({"month": month}, {"_id": 0}).to_list(None)
+    )
+
+    expected = defaultdict(lambda: {"tasks_completed": 0, "hours_logged": 0.0})
+    for row in task_counts:
+        expected[row["_id"]]["tasks_completed"] = row["tasks_completed"]
+    for row in hour_sums:
+        expected[row["_id"]]["hours_logged"] = row["hours_logged"]
+    for user_id, hours in archived_hours.items():
+        expected[user_id]["hours_logged"] += hours
+    for values in expected.values():
+        values["points"] = values["tasks_completed"] * TASK_POINTS + values["hours_logged"] * HOUR_POINTS
+    stored = {entry["user_id"]: entry for entry in stored}
+
+    drift = []
+    for user_id in set(expected) | set(stored):
+        actual = stored.get(user_id, {})
+        wanted = expected.get(user_id, {"tasks_completed": 0, "hours_logged": 0.0, "points": 0.0})
+        if actual.get("tasks_completed", 0) != wanted["tasks_completed"] or \
+                abs(actual.get("points", 0) - wanted["points"]) > 1e-6:
+            drift.append({
                 "user_id": user_id,
-                "date": {"$gte": week_ago}
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": "$date"
+                "stored": {key: actual.get(key, 0) for key in ("tasks_completed", "hours_logged", "points")},
+                "expected": wanted
+            })
+
+    if repair and drift:
+        operations = [
+            ReplaceOne({"month": month, "user_id": row["user_id"]}, {"month": month, "user_id": row["user_id"], **expected[row["user_id"]]}, upsert=True)
+            if row["user_id"] in expected else DeleteOne({"month": month, "user_id": row["user_id"]})
+            for row in drift
+        ]
+        if operations:
+            await db.leaderboard_monthly.bulk_write(operations, ordered=False)
+            analytics_cache.invalidate("tasks", "time_entries")
+
+    return {"month": month, "users_checked": len(set(expected) | set(stored)), "drift": drift, "repaired": repair}
+
+# Team stats helpers
+# One counters document behind /analytics/team-overview; a missing document is recomputed on read
+TEAM_STATS_ID = "team"
+TASK_STATUS_COUNTERS = {
+    TaskStatus.DONE.value: "completed_tasks",
+    TaskStatus.IN_PROGRESS.value: "in_progress_tasks",
+    TaskStatus.BLOCKED.value: "blocked_tasks"
+}
+BURNOUT_COUNTERS = {"high": "high_burnout_users", "medium": "medium_burnout_users"}
+
+# The task fields that team counters, leaderboard points and board events are derived from
+TASK_STATE_PROJECTION = {"_id": 0, "id": 1, "project_id": 1, "status": 1, "assigned_to": 1, "assigned_users": 1, "completed_date": 1}
+
+def task_team_stats(task: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """The counters a single task contributes to"""
+    if not task:
+        return {}
+    stats = {"total_tasks": 1}
+    status_counter = TASK_STATUS_COUNTERS.get(task.get("status"))
+    if status_counter:
+        stats[status_counter] = 1
+    if task.get("assigned_to") is None:
+        stats["unassigned_tasks"] = 1
+    completed_date = task.get("completed_date")
+    if completed_date and day_key(completed_date) == day_key(datetime.utcnow()):
+        stats["completed_today"] = 1
+    return stats
+
+def task_team_stats_delta(old_task: Optional[Dict[str, Any]], new_task: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    old_stats, new_stats = task_team_stats(old_task), task_team_stats(new_task)
+    return {
+        counter: new_stats.get(counter, 0) - old_stats.get(counter, 0)
+        for counter in set(old_stats) | set(new_stats)
+    }
+
+async def update_team_stats(deltas: Dict[str, int]):
+    """Apply counter deltas in one atomic update; completed_today resets when the day rolls over"""
+    deltas = {counter: delta for counter, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    today = day_key(datetime.utcnow())
+    completed_today = deltas.pop("completed_today", 0)
+    stage = {
+        counter: {"$add": [{"$ifNull": [f"${counter}", 0]}, delta]}
+        for counter, delta in deltas.items()
+    }
+    if completed_today:
+        stage["completed_today"] = {
+            "$cond": [
+                {"$eq": ["$completed_today_date", today]},
+                {"$add": ["$completed_today", completed_today]},
+                max(completed_today, 0)
+            ]
+        }
+        stage["completed_today_date"] = today
+    await db.team_stats.update_one({"_id": TEAM_STATS_ID}, [{"$set": stage}])
+
+def burnout_stats_delta(old_risk: Optional[str], new_risk: Optional[str]) -> Dict[str, int]:
+    deltas = defaultdict(int)
+    if old_risk in BURNOUT_COUNTERS:
+        deltas[BURNOUT_COUNTERS[old_risk]] -= 1
+    if new_risk in BURNOUT_COUNTERS:
+        deltas[BURNOUT_COUNTERS[new_risk]] += 1
+    return deltas
+
+async def rebuild_team_stats() -> Dict[str, Any]:
+    """Recompute every team counter in one $facet aggregation and store the result"""
+    today = datetime.utcnow()
+    today_start = datetime.combine(today.date(), datetime.min.time())
+
+    def count_if(condition):
+        return {"$sum": {"$cond": [condition, 1, 0]}}
+
+    pipeline = [
+        {"$project": {"_id": 0, "status": 1, "assigned_to": 1, "completed_date": 1}},
+        {"$unionWith": {
+            "coll": "users",
+            "pipeline": [{"$project": {"_id": 0, "burnout_risk": 1, "is_user": {"$literal": True}}}]
+        }},
+        {"$facet": {
+            "tasks": [
+                {"$match": {"is_user": {"$exists": False}}},
+                {"$group": {
+                    "_id": None,
+                    "total_tasks": {"$sum": 1},
+                    **{
+                        counter: count_if({"$eq": ["$status", status]})
+                        for status, counter in TASK_STATUS_COUNTERS.items()
+                    },
+                    "unassigned_tasks": count_if({"$eq": [{"$ifNull": ["$assigned_to", None]}, None]}),
+                    "completed_today": count_if({"$gte": ["$completed_date", today_start]})
+                }}
+            ],
+            "users": [
+                {"$match": {"is_user": True}},
+                {"$group": {
+                    "_id": None,
+                    "team_size": {"$sum": 1},
+                    **{
+                        counter: count_if({"$eq": ["$burnout_risk", risk]})
+                        for risk, counter in BURNOUT_COUNTERS.items()
                     }
-                },
-                "count": {"$sum": 1}
-            }
+                }}
+            ]
+        }}
+    ]
+    result = (await db.tasks.aggregate(pipeline).to_list(1))[0]
+
+    stats = {
+        "team_size": 0, "total_tasks": 0, "completed_tasks": 0, "in_progress_tasks": 0,
+        "blocked_tasks": 0, "unassigned_tasks": 0, "completed_today": 0,
+        "high_burnout_users": 0, "medium_burnout_users": 0
+    }
+    for facet in ("tasks", "users"):
+        if result[facet]:
+            stats.update({k: v for k, v in result[facet][0].items() if k != "_id"})
+    stats["completed_today_date"] = day_key(today)
+
+    await db.team_stats.replace_one({"_id": TEAM_STATS_ID}, stats, upsert=True)
+    analytics_cache.invalidate("tasks", "users")
+    return stats
+
+# Analytics cache
+# In-process TTL/LRU cache of analytics responses, invalidated through per-collection versions
+# that writes bump; concurrent identical misses share one computation
+ANALYTICS_CACHE_TTL = float(os.environ.get("ANALYTICS_CACHE_TTL", "60"))
+ANALYTICS_CACHE_SIZE = int(os.environ.get("ANALYTICS_CACHE_SIZE", "256"))
+ANALYTICS_COLLECTIONS = ("users", "tasks", "time_entries")
+
+class AnalyticsCache:
+    def __init__(self, max_entries: int = ANALYTICS_CACHE_SIZE, ttl: float = ANALYTICS_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.versions: Dict[str, int] = defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.in_flight: Dict[tuple, asyncio.Task] = {}
+        self.computations = 0
+        self.coalesced: Dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def key(endpoint: str, params: Dict[str, Any]) -> tuple:
+        return (endpoint, tuple(sorted((name, str(value)) for name, value in params.items())))
+
+    def invalidate(self, *collections: str):
+        """Bump the version of each written collection; call it after the write has landed"""
+        for collection in collections:
+            self.versions[collection] += 1
+
+    def lookup(self, key: tuple):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, versions, value = entry
+        if expires_at <= time.monotonic():
+            self.expirations += 1
+        elif any(self.versions[collection] != version for collection, version in versions.items()):
+            self.invalidations += 1
+        else:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+        del self.entries[key]
+        self.misses += 1
+        return False, None
+
+    def store(self, key: tuple, versions: Dict[str, int], value: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, versions, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, endpoint: str, params: Dict[str, Any], collections, compute):
+        key = self.key(endpoint, params)
+        hit, value = self.lookup(key)
+        if hit:
+            return value
+        versions = {collection: self.versions[collection] for collection in collections}
+        # Only join a computation that read the same collection versions
+        flight_key = (key, tuple(sorted(versions.items())))
+        computation = self.in_flight.get(flight_key)
+        if computation is None:
+            # The computation runs as its own task so a disconnecting caller cannot cancel it for the rest
+            computation = asyncio.ensure_future(compute())
+            self.in_flight[flight_key] = computation
+            self.computations += 1
+            computation.add_done_callback(lambda done: self._finish(flight_key, versions, done))
+        else:
+            self.coalesced[endpoint] += 1
+        return await asyncio.shield(computation)
+
+    def _finish(self, flight_key: tuple, versions: Dict[str, int], computation: asyncio.Task):
+        self.in_flight.pop(flight_key, None)
+        if not computation.cancelled() and computation.exception() is None:
+            self.store(flight_key[0], versions, computation.result())
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "computations": self.computations,
+            "in_flight": len(self.in_flight),
+            "coalesced": sum(self.coalesced.values()),
+            "coalesced_by_endpoint": dict(self.coalesced),
+            "versions": dict(self.versions)
         }
-    ]).to_list(1000)
-    
-    if len(daily_activity) >= 7:
-        badges.add("consistent_7_days")
-    
-    # Update user badges
-    await db.users.update_one(
-        {"id": user_id},
-        {"$set": {"badges": list(badges)}}
+
+analytics_cache = AnalyticsCache()
+
+def cached_analytics(endpoint: str, collections):
+    """Serve an analytics route from analytics_cache, keyed by its query parameters.
+
+    `route.cached(compute, **params)` reads or fills the same cache entry with another way of
+    computing the result, which lets /dashboard share entries with the individual routes.
+    """
+    def decorator(handler):
+        signature = inspect.signature(handler)
+
+        def cached(compute, **params):
+            # Omitted parameters take the route's defaults, so every caller builds the same key
+            bound = signature.bind(**params)
+            bound.apply_defaults()
+            return analytics_cache.get_or_compute(endpoint, dict(bound.arguments), collections, compute)
+
+        @functools.wraps(handler)
+        async def wrapper(**params):
+            return await cached(lambda: handler(**params), **params)
+        wrapper.cached = cached
+        return wrapper
+    return decorator
+
+# User stats helpers
+async def rebuild_user_stats() -> Dict[str, Any]:
+    """Recompute every user's totals, productivity score, burnout risk and badges from tasks and daily rollups"""
+    burnout_start, badge_start = days_ago_start(14), days_ago_start(7)
+    task_pipeline = [
+        {"$match": {"status": TaskStatus.DONE.value}},
+        {"$project": {"assigned_to": 1, "assignees": ASSIGNEES_EXPRESSION}},
+        {"$unwind": "$assignees"},
+        {"$group": {
+            "_id": "$assignees",
+            "completed_tasks": {"$sum": 1},
+            "owned_tasks": {"$sum": {"$cond": [{"$eq": ["$assignees", "$assigned_to"]}, 1, 0]}}
+        }}
+    ]
+    rollup_pipeline = [
+        {"$group": {
+            "_id": "$user_id",
+            "total_hours": {"$sum": "$total_hours"},
+            "recent_hours": {"$push": {"$cond": [{"$gte": ["$date", burnout_start]}, "$total_hours", None]}},
+            "active_days": {"$sum": {"$cond": [{"$gte": ["$date", badge_start]}, 1, 0]}}
+        }}
+    ]
+    users, task_counts, rollups = await asyncio.gather(
+        db.users.find({}, {"_id": 0, "id": 1, "badges": 1}).to_list(None),
+        db.tasks.aggregate(task_pipeline).to_list(None),
+        db.time_rollups_daily.aggregate(rollup_pipeline).to_list(None)
     )
+    task_counts = {row["_id"]: row for row in task_counts}
+    rollups = {row["_id"]: row for row in rollups}
+
+    operations = []
+    for user in users:
+        tasks = task_counts.get(user["id"], {})
+        rollup = rollups.get(user["id"], {})
+        completed_tasks = tasks.get("completed_tasks", 0)
+        total_hours = rollup.get("total_hours", 0.0)
+        recent_hours = [hours for hours in rollup.get("recent_hours", []) if hours is not None]
+        badges = set(user.get("badges", [])) | earned_badges(tasks.get("owned_tasks", 0), rollup.get("active_days", 0))
+        operations.append(UpdateOne({"id": user["id"]}, {"$set": {
+            "total_tasks_completed": completed_tasks,
+            "total_hours_logged": total_hours,
+            "productivity_score": (completed_tasks * 10) + (total_hours * 0.5),
+            "burnout_risk": burnout_risk_for(recent_hours),
+            "badges": sorted(badges)
+        }}))
+    if operations:
+        await db.users.bulk_write(operations, ordered=False)
+        analytics_cache.invalidate("users")
+    return {"users": len(operations)}
+
+# Synthetic data
+# A deterministic dataset built from a seed; derived collections are rebuilt after the bulk load
+SEED_CHUNK_SIZE = 5000
+APP_COLLECTIONS = [
+    "users", "tasks", "time_entries", "goals", "standups", "notifications", "task_comments",
+    "wiki_pages", "leaderboard_monthly", "team_stats", "time_rollups_daily", "counters", "tombstones"
+]
+SYNTHETIC_ROLES = ["developer", "developer", "developer", "designer", "qa_engineer", "product_manager", "team_lead"]
+# Working patterns: share of users and the range of hours they log on a working day
+WORKLOAD_PROFILES = [
+    {"name": "burnout", "share": 0.1, "daily_hours": (9.5, 12.5), "weekend_rate": 0.5},
+    {"name": "busy", "share": 0.25, "daily_hours": (7.5, 9.5), "weekend_rate": 0.15},
+    {"name": "steady", "share": 0.65, "daily_hours": (5.0, 8.0), "weekend_rate": 0.0}
+]
+SYNTHETIC_STATUS_WEIGHTS = {TaskStatus.TODO: 0.3, TaskStatus.IN_PROGRESS: 0.25, TaskStatus.DONE: 0.35, TaskStatus.BLOCKED: 0.1}
+SYNTHETIC_COMMENT_WEIGHTS = {0: 0.5, 1: 0.25, 2: 0.15, 3: 0.1}
+
+class ChunkedInserter:
+    """Buffers documents for one collection and writes them with insert_many, one chunk in flight at a time.
+
+    Documents for synced collections get their change seqs as one block per chunk.
+    """
+
+    def __init__(self, collection, chunk_size: int = SEED_CHUNK_SIZE):
+        self.collection = collection
+        self.chunk_size = chunk_size
+        self.buffer: List[Dict[str, Any]] = []
+        self.pending: Optional[asyncio.Future] = None
+        self.inserted = 0
+
+    async def add(self, document: Dict[str, Any]):
+        self.buffer.append(document)
+        if len(self.buffer) >= self.chunk_size:
+            await self._flush()
+
+    async def _flush(self):
+        # The previous chunk is written while the next one is generated
+        if self.pending:
+            await self.pending
+            self.pending = None
+        if self.buffer:
+            self.pending = asyncio.ensure_future(self._insert(self.buffer))
+            self.inserted += len(self.buffer)
+            self.buffer = []
+
+    async def _insert(self, documents: List[Dict[str, Any]]):
+        if self.collection.name not in SYNC_COLLECTIONS:
+            await self.collection.insert_many(documents, ordered=False)
+            return
+        async with change_seqs(len(documents)) as first:
+            for offset, document in enumerate(documents):
+                if document.get("change_seq") is None:
+                    document["change_seq"] = first + offset
+            await self.collection.insert_many(documents, ordered=False)
+
+    async def close(self) -> int:
+        await self._flush()
+        if self.pending:
+            await self.pending
+            self.pending = None
+        return self.inserted
+
+async def insert_chunked(collection, documents: List[Dict[str, Any]]) -> int:
+    inserter = ChunkedInserter(collection)
+    for document in documents:
+        await inserter.add(document)
+    return await inserter.close()
+
+async def clear_app_data():
+    """Delete every document the app stores; change seqs keep counting so synced clients see new data"""
+    await asyncio.gather(*(
+        db[name].delete_many({"_id": {"$ne": CHANGE_SEQ_ID}} if name == "counters" else {})
+        for name in APP_COLLECTIONS
+    ))
+    await asyncio.to_thread(clear_archive)
+    _position_counters_ready.clear()
+    analytics_cache.invalidate(*ANALYTICS_COLLECTIONS)
+
+async def rebuild_derived_data(months: List[str]) -> Dict[str, Any]:
+    """Rebuild rollups, user stats, the given leaderboard months and the team counters after a bulk load"""
+    rollups = await backfill_time_rollups(db)
+    analytics_cache.invalidate("time_entries")
+    users = await rebuild_user_stats()
+    await asyncio.gather(*(rebuild_leaderboard(month) for month in months))
+    await rebuild_team_stats()
+    return {**rollups, **users, "leaderboard_months": months}
+
+def seeded_id(rng) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def weighted_choice(rng, weights: Dict[Any, float]):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+async def generate_synthetic_data(
+    users: int = 50,
+    tasks_per_user: int = 10,
+    days: int = 30,
+    entries_per_day: int = 2,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """Replace all data with a seeded synthetic team and rebuild everything derived from it"""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    today = days_ago_start(0)
+    await clear_app_data()
+
+    # Users, each with a working pattern that drives their logged hours
+    user_ids, profiles = [], []
+    user_inserter = ChunkedInserter(db.users)
+    for i in range(users):
+        user_ids.append(seeded_id(rng))
+        profiles.append(rng.choices(WORKLOAD_PROFILES, weights=[profile["share"] for profile in WORKLOAD_PROFILES])[0])
+        await user_inserter.add(User(
+            id=user_ids[-1],
+            name=f"Synthetic User {i}",
+            email=f"user{i}@synthetic.thirdangle.com",
+            role=rng.choice(SYNTHETIC_ROLES),
+            joined_date=today - timedelta(days=days + rng.randint(0, 365))
+        ).dict())
+
+    # Tasks with a realistic status mix, multi-assignee work, comments and notifications
+    user_tasks = defaultdict(list)
+    task_inserter = ChunkedInserter(db.tasks)
+    comment_inserter = ChunkedInserter(db.task_comments)
+    notification_inserter = ChunkedInserter(db.notifications)
+    for i in range(users * tasks_per_user):
+        task_id = seeded_id(rng)
+        status = weighted_choice(rng, SYNTHETIC_STATUS_WEIGHTS)
+        created_date = today - timedelta(days=rng.uniform(0, days))
+        assigned_to = rng.choice(user_ids) if user_ids and rng.random() > 0.1 else None
+        assigned_users = []
+        if assigned_to and len(user_ids) > 1 and rng.random() < 0.3:
+            others = [user_id for user_id in rng.sample(user_ids, k=min(len(user_ids), 4)) if user_id != assigned_to]
+            assigned_users = others[:rng.randint(1, 3)]
+        assignees = ([assigned_to] if assigned_to else []) + assigned_users
+        estimated_hours = float(rng.choice([1, 2, 3, 4, 6, 8, 12]))
+        completed_date = None
+        if status == TaskStatus.DONE:
+            completed_date = min(created_date + timedelta(days=rng.uniform(0.1, 5)), datetime.utcnow())
+
+        comment_count = weighted_choice(rng, SYNTHETIC_COMMENT_WEIGHTS) if user_ids else 0
+        for _ in range(comment_count):
+            author_id = rng.choice(assignees or user_ids)
+            mentions = [rng.choice(user_ids)] if rng.random() < 0.3 else []
+            comment_date = created_date + timedelta(hours=rng.uniform(1, 72))
+            await comment_inserter.add(TaskComment(
+                id=seeded_id(rng),
+                task_id=task_id,
+                user_id=author_id,
+                content=f"Update on task {i}." + (f" @{mentions[0]} please take a look." if mentions else ""),
+                mentions=mentions,
+                created_date=comment_date
+            ).dict())
+            for mentioned_id in mentions:
+                await notification_inserter.add(Notification(
+                    id=seeded_id(rng), user_id=mentioned_id, title="You were mentioned",
+                    message=f"You were mentioned in a comment on task: Task {i}",
+                    type=NotificationType.MENTION, read=rng.random() < 0.6,
+                    created_date=comment_date, related_task_id=task_id, related_user_id=author_id
+                ).dict())
+
+        for user_id in assignees:
+            user_tasks[user_id].append(task_id)
+            await notification_inserter.add(Notification(
+                id=seeded_id(rng), user_id=user_id, title="New Task Assigned",
+                message=f"You have been assigned to task: Task {i}",
+                type=NotificationType.TASK_ASSIGNED, read=rng.random() < 0.8,
+                created_date=created_date, related_task_id=task_id
+            ).dict())
+        if completed_date and assigned_to:
+            await notification_inserter.add(Notification(
+                id=seeded_id(rng), user_id=assigned_to, title="Task Completed!",
+                message=f"Great job completing: Task {i}",
+                type=NotificationType.TASK_COMPLETED, read=rng.random() < 0.8,
+                created_date=completed_date, related_task_id=task_id
+            ).dict())
+
+        await task_inserter.add(Task(
+            id=task_id,
+            title=f"Task {i}",
+            description=f"Synthetic task {i}",
+            status=status,
+            priority=rng.choice(list(Priority)),
+            assigned_to=assigned_to,
+            assigned_users=assigned_users,
+            estimated_hours=estimated_hours,
+            actual_hours=round(estimated_hours * rng.uniform(0.3, 1.5), 2) if status in (TaskStatus.DONE, TaskStatus.IN_PROGRESS) else None,
+            created_date=created_date,
+            completed_date=completed_date,
+            tags=rng.sample(["frontend", "backend", "design", "bug", "urgent", "research"], k=rng.randint(0, 2)),
+            position=i,
+            source=rng.choice(["manual", "manual", "github", "notion"]),
+            comments_count=comment_count
+        ).dict())
+
+    # Time entries, built as plain dicts (the TimeEntry shape) since they dominate the volume
+    entry_inserter = ChunkedInserter(db.time_entries)
+    for user_id, profile in zip(user_ids, profiles):
+        tasks = user_tasks.get(user_id, [])
+        for day in range(days):
+            date = today - timedelta(days=day)
+            if date.weekday() >= 5 and rng.random() >= profile["weekend_rate"]:
+                continue
+            target_hours = rng.uniform(*profile["daily_hours"])
+            logged = 0.0
+            for session in range(entries_per_day):
+                hours = round(target_hours / entries_per_day * rng.uniform(0.8, 1.2), 2)
+                logged += hours
+                await entry_inserter.add({
+                    "id": seeded_id(rng),
+                    "user_id": user_id,
+                    "task_id": rng.choice(tasks) if tasks and rng.random() > 0.2 else None,
+                    "description": "Focused work" if session % 2 == 0 else "Meetings and reviews",
+                    "hours": hours,
+                    "date": date + timedelta(hours=8 + session * 10 / entries_per_day, minutes=rng.randint(0, 59)),
+                    "is_pomodoro": rng.random() < 0.4,
+                    "is_overtime": logged > 8
+                })
+
+    counts = {
+        "users": await user_inserter.close(),
+        "tasks": await task_inserter.close(),
+        "task_comments": await comment_inserter.close(),
+        "notifications": await notification_inserter.close(),
+        "time_entries": await entry_inserter.close()
+    }
+    months = sorted({month_key(today - timedelta(days=day)) for day in range(max(days, 1))})
+    derived = await rebuild_derived_data(months)
+    return {"seed": seed, **counts, "derived": derived, "elapsed_seconds": round(time.perf_counter() - started, 2)}
 
 # User routes
 @api_router.post("/users", response_model=User)
 async def create_user(user_data: UserCreate):
     # Check if email already exists
-    existing_user = await db.users.find_one({"email": user_data.email})
+    existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 1})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user = User(**user_data.dict())
-    await db.users.insert_one(user.dict())
+    try:
+        await db.users.insert_one(user.dict())
+    except DuplicateKeyError:
+        # A concurrent request registered the email after the check; email_unique rejected this one
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await update_team_stats({"team_size": 1, **burnout_stats_delta(None, user.burnout_risk)})
+    analytics_cache.invalidate("users")
     return user
 
 @api_router.get("/users", response_model=List[User])
-async def get_users():
-    users = await db.users.find().to_list(1000)
-    return [User(**user) for user in users]
+async def get_users(response: Response, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    projection = field_projection(User, fields)
+    users = await find_page(db.users, {}, "joined_date", ASCENDING, response, limit, cursor, projection)
+    return rows_response(model_rows(User, users, projection), response)
 
 @api_router.get("/users/{user_id}", response_model=User)
 async def get_user(user_id: str):
-    user = await db.users.find_one({"id": user_id})
+    user = await db.users.find_one({"id": user_id}, model_projection(User))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return User(**user)
+    return rows_response(model_rows(User, [user])[0])
 
 # Enhanced Task routes
 @api_router.post("/tasks", response_model=Task)
 async def create_task(task_data: TaskCreate):
-    # Verify assigned users exist
-    if task_data.assigned_to:
-        user = await db.users.find_one({"id": task_data.assigned_to})
-        if not user:
-            raise HTTPException(status_code=404, detail="Assigned user not found")
-    
+    # Verify all assigned users exist with one $in query while the position is allocated
+    requested_ids = list(dict.fromkeys(
+        ([task_data.assigned_to] if task_data.assigned_to else []) + task_data.assigned_users
+    ))
+    existing_ids, position = await asyncio.gather(
+        find_existing_user_ids(requested_ids),
+        next_task_position(task_data.project_id)
+    )
+    if task_data.assigned_to and task_data.assigned_to not in existing_ids:
+        raise HTTPException(status_code=404, detail="Assigned user not found")
     for user_id in task_data.assigned_users:
-        user = await db.users.find_one({"id": user_id})
-        if not user:
+        if user_id not in existing_ids:
             raise HTTPException(status_code=404, detail=f"User {user_id} not found")
     
-    # Set position for new task
-    last_task = await db.tasks.find_one({}, sort=[("position", -1)])
-    position = (last_task["position"] + 1) if last_task else 0
-    
     task_dict = task_data.dict()
     task_dict["position"] = position
-    task = Task(**task_dict)
-    await db.tasks.insert_one(task.dict())
-    
+    async with change_seqs() as change_seq:
+        task = Task(**task_dict, change_seq=change_seq)
+        await db.tasks.insert_one(task.dict())
+    await update_team_stats(task_team_stats(task.dict()))
+    analytics_cache.invalidate("tasks")
+    event_broker.publish([board_topic(task.project_id)], "task.created", task.dict())
+
     # Create notifications for assigned users
     all_assigned = []
     if task_data.assigned_to:
@@ -383,10 +1976,14 @@ async def create_task(task_data: TaskCreate):
 
 @api_router.get("/tasks", response_model=List[Task])
 async def get_tasks(
-    user_id: Optional[str] = None, 
+    response: Response,
+    user_id: Optional[str] = None,
     status: Optional[TaskStatus] = None,
     project_id: Optional[str] = None,
-    unassigned: Optional[bool] = None
+    unassigned: Optional[bool] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
     query = {}
     if user_id:
@@ -402,62 +1999,206 @@ async def get_tasks(
         query["assigned_to"] = None
         query["assigned_users"] = {"$size": 0}
     
-    tasks = await db.tasks.find(query).sort("position", 1).to_list(1000)
-    return [Task(**task) for task in tasks]
+    projection = field_projection(Task, fields)
+    tasks = await find_page(db.tasks, query, "position", ASCENDING, response, limit, cursor, projection)
+    return rows_response(model_rows(Task, tasks, projection), response)
 
 @api_router.get("/tasks/kanban")
-async def get_kanban_tasks():
+async def get_kanban_tasks(fields: Optional[str] = None):
     """Get tasks organized by status for Kanban board"""
-    tasks = await db.tasks.find().sort("position", 1).to_list(1000)
-    
-    kanban_data = {
-        "todo": [],
-        "in_progress": [],
-        "done": [],
-        "blocked": []
-    }
+    return rows_response(await kanban_board(fields))
+
+async def kanban_board(fields: Optional[str] = None):
+    projection = field_projection(Task, fields)
+    query_projection, added = require_fields(projection, ["status"])
+    tasks = await db.tasks.find({}, query_projection).sort("position", 1).to_list(1000)
     
+    kanban_data = {status.value: [] for status in TaskStatus}
     for task in tasks:
-        task_obj = Task(**task)
-        kanban_data[task_obj.status].append(task_obj.dict())
+        kanban_data[task["status"]].append(task)
+    drop_fields(tasks, added)
+    kanban_data = {status: model_rows(Task, column, projection) for status, column in kanban_data.items()}
     
     return kanban_data
 
+@api_router.put("/tasks/bulk-update-positions")
+async def bulk_update_task_positions(updates: List[Dict[str, Any]]):
+    """Bulk update task positions for drag-and-drop; position-only changes go in one unordered bulk write"""
+    requests = []
+    changes = {}
+    status_updates = {}
+    for update in updates:
+        if "id" not in update or "position" not in update:
+            raise HTTPException(status_code=400, detail="Each update needs an id and a position")
+        fields = {"position": update["position"]}
+        # Only move a task between columns when the client asks for it
+        if update.get("status") is not None:
+            try:
+                fields["status"] = status_updates[update["id"]] = TaskStatus(update["status"]).value
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid status {update['status']}")
+        changes[update["id"]] = {"id": update["id"], **fields}
+    if not changes:
+        return {"message": "Task positions updated successfully"}
+
+    boards = await db.tasks.find({"id": {"$in": list(changes)}}, {"_id": 0, "id": 1, "project_id": 1}).to_list(None)
+    completed_date = datetime.utcnow()
+    async with change_seqs(len(changes)) as first_seq:
+        writes = []
+        for offset, change in enumerate(changes.values()):
+            change["change_seq"] = first_seq + offset
+            fields = {key: value for key, value in change.items() if key != "id"}
+            if change["id"] in status_updates:
+                # Status changes return the state they replaced, so each transition is counted once
+                stage = {field: {"$literal": value} for field, value in fields.items()}
+                writes.append(db.tasks.find_one_and_update(
+                    {"id": change["id"]},
+                    [{"$set": {**stage, **completion_date_stage(fields["status"], completed_date)}}],
+                    projection={**TASK_STATE_PROJECTION, "title": 1},
+                    return_document=ReturnDocument.BEFORE
+                ))
+            else:
+                requests.append(UpdateOne({"id": change["id"]}, {"$set": fields}))
+        if requests:
+            writes.append(db.tasks.bulk_write(requests, ordered=False))
+        previous_tasks = (await asyncio.gather(*writes))[:len(status_updates)]
+
+    board_changes = defaultdict(list)
+    highest_positions = {}
+    for task in boards:
+        board_changes[board_topic(task.get("project_id"))].append(changes[task["id"]])
+        position = changes[task["id"]]["position"]
+        highest_positions[task.get("project_id")] = max(position, highest_positions.get(task.get("project_id"), position))
+    # New tasks must still land below every card the client placed
+    await asyncio.gather(*(
+        raise_position_counter(project_id, position) for project_id, position in highest_positions.items()
+    ))
+
+    # Status changes move team counters and leaderboard points
+    transitions = []
+    for old_task in previous_tasks:
+        if old_task is None:
+            continue
+        new_task = {**old_task, "status": status_updates[old_task["id"]]}
+        if new_task["status"] != old_task.get("status"):
+            transitions.append((old_task, new_task))
+    completions = await asyncio.gather(*(
+        record_task_completion(old_task, new_task, completed_date) for old_task, new_task in transitions
+    ))
+    deltas = defaultdict(int)
+    leaderboard_updates = []
+    for (old_task, new_task), completed in zip(transitions, completions):
+        if completed:
+            changes[new_task["id"]]["completed_date"] = completed_date
+        for counter, delta in task_team_stats_delta(old_task, new_task).items():
+            deltas[counter] += delta
+        leaderboard_updates.append(update_leaderboard_for_task(old_task, new_task))
+    await asyncio.gather(update_team_stats(deltas), *leaderboard_updates)
+    if leaderboard_updates:
+        analytics_cache.invalidate("tasks")
+    # One event per board carrying every changed position
+    for topic, tasks in board_changes.items():
+        event_broker.publish([topic], "task.positions", {"tasks": tasks})
+
+    return {"message": "Task positions updated successfully"}
+
+@api_router.put("/tasks/{task_id}/move", response_model=Task)
+async def move_task(task_id: str, move: TaskMove):
+    """Move one task between two neighbours of a column; only the moved task is written"""
+    status = move.status.value if move.status else None
+
+    neighbour_ids = {neighbour_id for neighbour_id in (move.after_id, move.before_id) if neighbour_id}
+    neighbours = {}
+    if neighbour_ids:
+        found = await db.tasks.find({"id": {"$in": list(neighbour_ids)}}, {"_id": 0, "id": 1, "position": 1}).to_list(None)
+        neighbours = {neighbour["id"]: neighbour.get("position") or 0 for neighbour in found}
+        if len(neighbours) != len(neighbour_ids):
+            raise HTTPException(status_code=404, detail="Neighbouring task not found")
+    lower = neighbours.get(move.after_id)
+    upper = neighbours.get(move.before_id)
+    if lower is not None and upper is not None and lower > upper:
+        raise HTTPException(status_code=409, detail="Neighbouring tasks are out of order")
+    if not neighbour_ids:
+        # No neighbours given: append to the bottom of the target column. Reading the current
+        # column only places the task; counters are derived from the write below.
+        if status is None:
+            current = await db.tasks.find_one({"id": task_id}, {"_id": 0, "status": 1})
+            if not current:
+                raise HTTPException(status_code=404, detail="Task not found")
+            status = current["status"]
+        last_task = await db.tasks.find_one(
+            {"status": status, "id": {"$ne": task_id}},
+            {"_id": 0, "position": 1},
+            sort=[("position", DESCENDING), ("id", DESCENDING)]
+        )
+        lower = (last_task.get("position") or 0) if last_task else None
+
+    update_fields = {"position": position_between(lower, upper)}
+    if move.status:
+        update_fields["status"] = status
+    completed_date = datetime.utcnow()
+    async with change_seqs() as update_fields["change_seq"]:
+        stage = {field: {"$literal": value} for field, value in update_fields.items()}
+        task = await db.tasks.find_one_and_update(
+            {"id": task_id},
+            [{"$set": {**stage, **completion_date_stage(update_fields.get("status"), completed_date)}}],
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    updated_task = {**task, **update_fields}
+    if await record_task_completion(task, updated_task, completed_date):
+        update_fields["completed_date"] = completed_date
+    status = updated_task["status"]
+    if upper is None:
+        await raise_position_counter(task.get("project_id"), update_fields["position"])
+
+    if updated_task["status"] != task["status"]:
+        await asyncio.gather(
+            update_leaderboard_for_task(task, updated_task),
+            update_team_stats(task_team_stats_delta(task, updated_task))
+        )
+        analytics_cache.invalidate("tasks")
+    event_broker.publish([board_topic(updated_task.get("project_id"))], "task.updated", {"id": task_id, **update_fields})
+    if lower is not None and upper is not None and positions_crowded(lower, upper):
+        schedule_position_rebalance(status)
+    return Task(**updated_task)
+
 @api_router.put("/tasks/{task_id}", response_model=Task)
 async def update_task(task_id: str, task_update: TaskUpdate):
-    task = await db.tasks.find_one({"id": task_id})
+    update_data = {k: v for k, v in task_update.dict().items() if v is not None}
+    completed_date = datetime.utcnow()
+
+    # One atomic write that returns the state it replaced, so concurrent updates each compute
+    # their counter and points deltas from the version they actually changed
+    stage = {field: {"$literal": value} for field, value in update_data.items()}
+    stage.update(completion_date_stage(update_data.get("status"), completed_date))
+    async with change_seqs() as update_data["change_seq"]:
+        stage["change_seq"] = update_data["change_seq"]
+        task = await db.tasks.find_one_and_update(
+            {"id": task_id},
+            [{"$set": stage}],
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    
-    update_data = {k: v for k, v in task_update.dict().items() if v is not None}
-    
-    # If status is being updated to done, record completion date
-    if update_data.get("status") == TaskStatus.DONE and task["status"] != TaskStatus.DONE:
-        update_data["completed_date"] = datetime.utcnow()
-        
-        # Update user's completed tasks count and badges
-        if task.get("assigned_to"):
-            await db.users.update_one(
-                {"id": task["assigned_to"]}, 
-                {"$inc": {"total_tasks_completed": 1}}
-            )
-            await update_user_badges(task["assigned_to"])
-            
-            # Create completion notification
-            await create_notification(
-                user_id=task["assigned_to"],
-                title="Task Completed!",
-                message=f"Great job completing: {task['title']}",
-                notification_type=NotificationType.TASK_COMPLETED,
-                task_id=task_id
-            )
+    updated_task = {**task, **update_data}
+
+    # If this update moved the task to done, record completion
+    if await record_task_completion(task, updated_task, completed_date):
+        update_data["completed_date"] = completed_date
+    if "position" in update_data:
+        # New tasks must still land below an explicitly placed one
+        await raise_position_counter(updated_task.get("project_id"), update_data["position"])
     
     # Handle assignment changes
     if "assigned_to" in update_data or "assigned_users" in update_data:
         new_assigned = update_data.get("assigned_to")
         new_assigned_users = update_data.get("assigned_users", [])
         
-        # Get current assignments
+        # Previous assignments
         current_assigned = task.get("assigned_to")
         current_assigned_users = task.get("assigned_users", [])
         
@@ -474,55 +2215,62 @@ async def update_task(task_id: str, task_update: TaskUpdate):
             await create_notification(
                 user_id=user_id,
                 title="Task Assignment Updated",
-                message=f"You have been assigned to task: {task['title']}",
+                message=f"You have been assigned to task: {updated_task['title']}",
                 notification_type=NotificationType.TASK_ASSIGNED,
                 task_id=task_id
             )
     
-    await db.tasks.update_one({"id": task_id}, {"$set": update_data})
-    
-    updated_task = await db.tasks.find_one({"id": task_id})
+    await asyncio.gather(
+        update_leaderboard_for_task(task, updated_task),
+        update_team_stats(task_team_stats_delta(task, updated_task))
+    )
+    analytics_cache.invalidate("tasks")
+    event_broker.publish([board_topic(updated_task.get("project_id"))], "task.updated", {"id": task_id, **update_data})
     return Task(**updated_task)
 
-@api_router.put("/tasks/bulk-update-positions")
-async def bulk_update_task_positions(updates: List[Dict[str, Any]]):
-    """Bulk update task positions for drag-and-drop"""
-    for update in updates:
-        await db.tasks.update_one(
-            {"id": update["id"]},
-            {"$set": {"position": update["position"], "status": update.get("status", "todo")}}
-        )
-    
-    return {"message": "Task positions updated successfully"}
-
 @api_router.delete("/tasks/{task_id}")
 async def delete_task(task_id: str):
-    result = await db.tasks.delete_one({"id": task_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Task not found")
+    async with change_seqs() as change_seq:
+        task = await db.tasks.find_one_and_delete({"id": task_id}, projection=TASK_STATE_PROJECTION)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        # Clients syncing with /sync learn about the delete from its tombstone
+        await record_tombstone("tasks", task_id, change_seq)
+    await asyncio.gather(
+        update_leaderboard_for_task(task, None),
+        update_team_stats(task_team_stats_delta(task, None))
+    )
+    analytics_cache.invalidate("tasks")
+    event_broker.publish([board_topic(task.get("project_id"))], "task.deleted", {"id": task_id})
     return {"message": "Task deleted successfully"}
 
 # Task Comments routes
 @api_router.post("/tasks/{task_id}/comments", response_model=TaskComment)
 async def create_task_comment(task_id: str, comment_data: TaskCommentCreate):
     # Verify task exists
-    task = await db.tasks.find_one({"id": task_id})
+    task = await db.tasks.find_one({"id": task_id}, {"_id": 0, "title": 1})
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     comment = TaskComment(**comment_data.dict())
-    await db.task_comments.insert_one(comment.dict())
-    
-    # Update task comment count
-    await db.tasks.update_one(
-        {"id": task_id},
-        {"$inc": {"comments_count": 1}}
-    )
-    
+    mentioned_ids = list(dict.fromkeys(comment_data.mentions))
+
+    # Insert the comment and update the task comment count concurrently
+    async with change_seqs() as change_seq:
+        writes = asyncio.gather(
+            db.task_comments.insert_one(comment.dict()),
+            db.tasks.update_one(
+                {"id": task_id},
+                {"$inc": {"comments_count": 1}, "$set": {"change_seq": change_seq}}
+            )
+        )
+        # Validate every mention with one $in query
+        existing_ids = await find_existing_user_ids(mentioned_ids)
+        await writes
+
     # Create notifications for mentioned users
-    for mentioned_user_id in comment_data.mentions:
-        user = await db.users.find_one({"id": mentioned_user_id})
-        if user:
+    for mentioned_user_id in mentioned_ids:
+        if mentioned_user_id in existing_ids:
             await create_notification(
                 user_id=mentioned_user_id,
                 title="You were mentioned",
@@ -535,9 +2283,16 @@ async def create_task_comment(task_id: str, comment_data: TaskCommentCreate):
     return comment
 
 @api_router.get("/tasks/{task_id}/comments", response_model=List[TaskComment])
-async def get_task_comments(task_id: str):
-    comments = await db.task_comments.find({"task_id": task_id}).sort("created_date", 1).to_list(1000)
-    return [TaskComment(**comment) for comment in comments]
+async def get_task_comments(
+    task_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    projection = field_projection(TaskComment, fields)
+    comments = await find_page(db.task_comments, {"task_id": task_id}, "created_date", ASCENDING, response, limit, cursor, projection)
+    return rows_response(model_rows(TaskComment, comments, projection), response)
 
 # Time tracking routes
 @api_router.post("/time-entries", response_model=TimeEntry)
@@ -547,41 +2302,102 @@ async def create_time_entry(time_data: TimeEntryCreate):
     
     time_entry_dict = time_data.dict()
     time_entry_dict["is_overtime"] = is_overtime
-    time_entry = TimeEntry(**time_entry_dict)
-    await db.time_entries.insert_one(time_entry.dict())
-    
-    # Update user's total hours
-    await db.users.update_one(
-        {"id": time_data.user_id},
-        {"$inc": {"total_hours_logged": time_data.hours}}
-    )
-    
-    # Update task's actual hours if task_id provided
-    if time_data.task_id:
-        await db.tasks.update_one(
-            {"id": time_data.task_id},
-            {"$inc": {"actual_hours": time_data.hours}}
-        )
-    
-    # Update burnout risk
-    burnout_risk = await calculate_burnout_risk(time_data.user_id)
-    await db.users.update_one(
-        {"id": time_data.user_id},
-        {"$set": {"burnout_risk": burnout_risk}}
-    )
-    
+
+    # One change seq for the entry and, when the hours go to a task, one for the task
+    async with change_seqs(2 if time_data.task_id else 1) as change_seq:
+        time_entry = TimeEntry(**time_entry_dict, change_seq=change_seq)
+        entry_document = time_entry.dict()
+
+        # Every write below touches a different document, so they run concurrently
+        writes = [
+            db.time_entries.insert_one(entry_document),
+            # Update user's total hours
+            db.users.update_one(
+                {"id": time_data.user_id},
+                {"$inc": {"total_hours_logged": time_data.hours}}
+            ),
+            # Add the hours to this month's leaderboard points and the user's daily rollup
+            increment_leaderboard(month_key(time_entry.date), [time_data.user_id], hours=time_data.hours),
+            record_time_rollup(db, entry_document)
+        ]
+        # Update task's actual hours if task_id provided (new tasks store actual_hours as null, which $inc rejects)
+        if time_data.task_id:
+            writes.append(db.tasks.update_one(
+                {"id": time_data.task_id},
+                [{"$set": {
+                    "actual_hours": {"$add": [{"$ifNull": ["$actual_hours", 0]}, time_data.hours]},
+                    "change_seq": change_seq + 1
+                }}]
+            ))
+        await asyncio.gather(*writes)
+    analytics_cache.invalidate("time_entries")
+    event_broker.publish([user_topic(time_data.user_id)], "time_entry.created", time_entry.dict())
+
+    # Burnout risk reads the rollup written above; recompute it off the request path
+    schedule_burnout_refresh(time_data.user_id)
+
     return time_entry
 
 @api_router.get("/time-entries", response_model=List[TimeEntry])
-async def get_time_entries(user_id: Optional[str] = None, task_id: Optional[str] = None):
+async def get_time_entries(
+    response: Response,
+    user_id: Optional[str] = None,
+    task_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
     query = {}
     if user_id:
         query["user_id"] = user_id
     if task_id:
         query["task_id"] = task_id
     
-    entries = await db.time_entries.find(query).sort("date", -1).to_list(1000)
-    return [TimeEntry(**entry) for entry in entries]
+    projection = field_projection(TimeEntry, fields)
+    entries = await find_page(db.time_entries, query, "date", DESCENDING, response, limit, cursor, projection)
+    return rows_response(model_rows(TimeEntry, entries, projection), response)
+
+# Export routes
+@api_router.get("/export/time-entries")
+async def export_time_entries(
+    export_format: str = Query("ndjson", alias="format"),
+    user_id: Optional[str] = None,
+    task_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Stream every matching time entry, oldest first and including archived ones, as NDJSON or CSV"""
+    query = date_range_query("date", start, end)
+    if user_id:
+        query["user_id"] = user_id
+    if task_id:
+        query["task_id"] = task_id
+
+    fields = list(TimeEntry.model_fields)
+    chunks = stream_export(db.time_entries, query, [("date", ASCENDING), ("id", ASCENDING)], fields, export_format, archive=True)
+    return export_response(chunks, "time-entries", export_format)
+
+@api_router.get("/export/tasks")
+async def export_tasks(
+    export_format: str = Query("ndjson", alias="format"),
+    user_id: Optional[str] = None,
+    status: Optional[TaskStatus] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Stream every matching task, by creation date, as NDJSON or CSV"""
+    query = date_range_query("created_date", start, end)
+    if user_id:
+        query["$or"] = [
+            {"assigned_to": user_id},
+            {"assigned_users": {"$in": [user_id]}}
+        ]
+    if status:
+        query["status"] = status
+
+    fields = list(Task.model_fields)
+    chunks = stream_export(db.tasks, query, [("created_date", ASCENDING), ("id", ASCENDING)], fields, export_format)
+    return export_response(chunks, "tasks", export_format)
 
 # Goals routes
 @api_router.post("/goals", response_model=Goal)
@@ -591,13 +2407,20 @@ async def create_goal(goal_data: GoalCreate):
     return goal
 
 @api_router.get("/goals", response_model=List[Goal])
-async def get_goals(user_id: Optional[str] = None):
+async def get_goals(
+    response: Response,
+    user_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
     query = {}
     if user_id:
         query["user_id"] = user_id
     
-    goals = await db.goals.find(query).to_list(1000)
-    return [Goal(**goal) for goal in goals]
+    projection = field_projection(Goal, fields)
+    goals = await find_page(db.goals, query, "created_date", ASCENDING, response, limit, cursor, projection)
+    return rows_response(model_rows(Goal, goals, projection), response)
 
 # Standup routes
 @api_router.post("/standups", response_model=DailyStandup)
@@ -607,7 +2430,7 @@ async def create_standup(standup_data: DailyStandupCreate):
     existing = await db.standups.find_one({
         "user_id": standup_data.user_id,
         "date": {"$gte": datetime.combine(today, datetime.min.time())}
-    })
+    }, {"_id": 1})
     
     if existing:
         raise HTTPException(status_code=400, detail="Standup already exists for today")
@@ -617,7 +2440,14 @@ async def create_standup(standup_data: DailyStandupCreate):
     return standup
 
 @api_router.get("/standups", response_model=List[DailyStandup])
-async def get_standups(user_id: Optional[str] = None, date: Optional[datetime] = None):
+async def get_standups(
+    response: Response,
+    user_id: Optional[str] = None,
+    date: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
     query = {}
     if user_id:
         query["user_id"] = user_id
@@ -626,25 +2456,29 @@ async def get_standups(user_id: Optional[str] = None, date: Optional[datetime] =
         end_date = start_date + timedelta(days=1)
         query["date"] = {"$gte": start_date, "$lt": end_date}
     
-    standups = await db.standups.find(query).sort("date", -1).to_list(1000)
-    return [DailyStandup(**standup) for standup in standups]
+    projection = field_projection(DailyStandup, fields)
+    standups = await find_page(db.standups, query, "date", DESCENDING, response, limit, cursor, projection)
+    return rows_response(model_rows(DailyStandup, standups, projection), response)
 
 # Notifications routes
 @api_router.get("/notifications/{user_id}", response_model=List[Notification])
-async def get_user_notifications(user_id: str, unread_only: bool = False):
+async def get_user_notifications(user_id: str, unread_only: bool = False, fields: Optional[str] = None):
     query = {"user_id": user_id}
     if unread_only:
         query["read"] = False
     
-    notifications = await db.notifications.find(query).sort("created_date", -1).to_list(100)
-    return [Notification(**notification) for notification in notifications]
+    projection = field_projection(Notification, fields)
+    notifications = await db.notifications.find(query, projection).sort("created_date", -1).to_list(100)
+    return rows_response(model_rows(Notification, notifications, projection))
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str):
-    result = await db.notifications.update_one(
-        {"id": notification_id},
-        {"$set": {"read": True}}
-    )
+    async with change_seqs() as change_seq:
+        # Marking an already-read notification stays a 404, and leaves its change_seq alone
+        result = await db.notifications.update_one(
+            {"id": notification_id, "read": {"$ne": True}},
+            {"$set": {"read": True, "change_seq": change_seq}}
+        )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Notification not found")
     return {"message": "Notification marked as read"}
@@ -657,86 +2491,93 @@ async def create_wiki_page(page_data: WikiPageCreate):
     return page
 
 @api_router.get("/wiki", response_model=List[WikiPage])
-async def get_wiki_pages():
-    pages = await db.wiki_pages.find({"is_public": True}).sort("updated_date", -1).to_list(1000)
-    return [WikiPage(**page) for page in pages]
+async def get_wiki_pages(response: Response, limit: Optional[int] = None, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Public wiki pages; list views should pass e.g. fields=title,tags,updated_date to skip the page content"""
+    projection = field_projection(WikiPage, fields)
+    pages = await find_page(db.wiki_pages, {"is_public": True}, "updated_date", DESCENDING, response, limit, cursor, projection)
+    return rows_response(model_rows(WikiPage, pages, projection), response)
 
 @api_router.get("/wiki/{page_id}", response_model=WikiPage)
 async def get_wiki_page(page_id: str):
-    page = await db.wiki_pages.find_one({"id": page_id})
+    page = await db.wiki_pages.find_one({"id": page_id}, model_projection(WikiPage))
     if not page:
         raise HTTPException(status_code=404, detail="Wiki page not found")
-    return WikiPage(**page)
+    return rows_response(model_rows(WikiPage, [page])[0])
 
 # Enhanced Analytics routes
 @api_router.get("/analytics/team-overview")
+@cached_analytics("team-overview", ("tasks", "users"))
 async def get_team_overview():
-    # Get all users
-    users = await db.users.find().to_list(1000)
-    
-    # Get tasks stats
-    total_tasks = await db.tasks.count_documents({})
-    completed_tasks = await db.tasks.count_documents({"status": TaskStatus.DONE})
-    in_progress_tasks = await db.tasks.count_documents({"status": TaskStatus.IN_PROGRESS})
-    blocked_tasks = await db.tasks.count_documents({"status": TaskStatus.BLOCKED})
-    unassigned_tasks = await db.tasks.count_documents({"assigned_to": None})
-    
-    # Get today's productivity
-    today = datetime.utcnow().date()
-    today_tasks = await db.tasks.count_documents({
-        "completed_date": {"$gte": datetime.combine(today, datetime.min.time())}
-    })
-    
+    stats = await db.team_stats.find_one({"_id": TEAM_STATS_ID})
+    if not stats:
+        stats = await rebuild_team_stats()
+
+    total_tasks = stats["total_tasks"]
+    completed_tasks = stats["completed_tasks"]
+    today_tasks = stats["completed_today"] if stats.get("completed_today_date") == day_key(datetime.utcnow()) else 0
+
     # Calculate team productivity score
     productivity_score = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-    
-    # Get burnout risks
-    high_burnout_users = await db.users.count_documents({"burnout_risk": "high"})
-    medium_burnout_users = await db.users.count_documents({"burnout_risk": "medium"})
-    
+
     return {
-        "team_size": len(users),
+        "team_size": stats["team_size"],
         "total_tasks": total_tasks,
         "completed_tasks": completed_tasks,
-        "in_progress_tasks": in_progress_tasks,
-        "blocked_tasks": blocked_tasks,
-        "unassigned_tasks": unassigned_tasks,
+        "in_progress_tasks": stats["in_progress_tasks"],
+        "blocked_tasks": stats["blocked_tasks"],
+        "unassigned_tasks": stats["unassigned_tasks"],
         "tasks_completed_today": today_tasks,
         "team_productivity_score": round(productivity_score, 1),
         "completion_rate": round((completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 1),
-        "high_burnout_users": high_burnout_users,
-        "medium_burnout_users": medium_burnout_users
+        "high_burnout_users": stats["high_burnout_users"],
+        "medium_burnout_users": stats["medium_burnout_users"]
     }
 
 @api_router.get("/analytics/individual-performance")
+@cached_analytics("individual-performance", ("users", "tasks", "time_entries"))
 async def get_individual_performance():
-    users = await db.users.find().to_list(1000)
+    users = await db.users.find({}, {"_id": 0, "id": 1, "name": 1, "avatar_url": 1, "burnout_risk": 1, "badges": 1}).to_list(None)
+    return await individual_performance(users)
+
+async def individual_performance(users: List[Dict[str, Any]]):
+    """Per-user task completion and weekly hours for the given users"""
+    week_ago = datetime.utcnow() - timedelta(days=7)
+
+    # Per-user task counts: each task counts once for every distinct assignee
+    task_pipeline = [
+        {"$project": {"status": 1, "assignees": ASSIGNEES_EXPRESSION}},
+        {"$unwind": "$assignees"},
+        {
+            "$group": {
+                "_id": "$assignees",
+                "total_tasks": {"$sum": 1},
+                "completed_tasks": {
+                    "$sum": {"$cond": [{"$eq": ["$status", TaskStatus.DONE.value]}, 1, 0]}
+                }
+            }
+        }
+    ]
+
+    # Hours logged per user over the last 7 days
+    time_pipeline = [
+        {"$match": {"date": {"$gte": week_ago}}},
+        {"$group": {"_id": "$user_id", "hours": {"$sum": "$hours"}}}
+    ]
+
+    task_stats, time_stats = await asyncio.gather(
+        db.tasks.aggregate(task_pipeline).to_list(None),
+        db.time_entries.aggregate(time_pipeline).to_list(None)
+    )
+    task_stats = {stat["_id"]: stat for stat in task_stats}
+    hours_by_user = {stat["_id"]: stat["hours"] for stat in time_stats}
     performance_data = []
-    
+
     for user in users:
-        user_tasks = await db.tasks.count_documents({
-            "$or": [
-                {"assigned_to": user["id"]},
-                {"assigned_users": {"$in": [user["id"]]}}
-            ]
-        })
-        completed_tasks = await db.tasks.count_documents({
-            "$or": [
-                {"assigned_to": user["id"]},
-                {"assigned_users": {"$in": [user["id"]]}}
-            ],
-            "status": TaskStatus.DONE
-        })
-        
-        # Get time entries for the last 7 days
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        time_entries = await db.time_entries.find({
-            "user_id": user["id"],
-            "date": {"$gte": week_ago}
-        }).to_list(1000)
-        
-        hours_this_week = sum(entry["hours"] for entry in time_entries)
-        
+        stats = task_stats.get(user["id"], {})
+        user_tasks = stats.get("total_tasks", 0)
+        completed_tasks = stats.get("completed_tasks", 0)
+        hours_this_week = hours_by_user.get(user["id"], 0)
+
         # Calculate productivity score
         completion_rate = (completed_tasks / user_tasks * 100) if user_tasks > 0 else 0
         productivity_score = (completion_rate + min(hours_this_week * 2, 100)) / 2
@@ -759,6 +2600,7 @@ async def get_individual_performance():
     return performance_data
 
 @api_router.get("/analytics/productivity-trends")
+@cached_analytics("productivity-trends", ("tasks", "time_entries"))
 async def get_productivity_trends():
     # Get last 30 days of data
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
@@ -787,105 +2629,119 @@ async def get_productivity_trends():
     
     task_trends = await db.tasks.aggregate(pipeline).to_list(30)
     
-    # Get daily time entries
+    # Get daily logged hours from the per-user daily rollups (the last 30 days, today included)
     time_pipeline = [
         {
             "$match": {
-                "date": {"$gte": thirty_days_ago}
+                "date": {"$gte": days_ago_start(29)}
             }
         },
         {
             "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": "$date"
-                    }
-                },
-                "total_hours": {"$sum": "$hours"},
-                "overtime_hours": {
-                    "$sum": {
-                        "$cond": ["$is_overtime", "$hours", 0]
-                    }
-                }
+                "_id": "$day",
+                "total_hours": {"$sum": "$total_hours"},
+                "overtime_hours": {"$sum": "$overtime_hours"}
             }
         },
         {"$sort": {"_id": 1}}
     ]
-    
-    time_trends = await db.time_entries.aggregate(time_pipeline).to_list(30)
-    
+
+    time_trends = await db.time_rollups_daily.aggregate(time_pipeline).to_list(30)
+
     return {
         "task_completion_trends": task_trends,
         "time_logging_trends": time_trends
     }
 
 @api_router.get("/analytics/team-leaderboard")
-async def get_team_leaderboard():
-    users = await db.users.find().to_list(1000)
-    leaderboard = []
-    
-    for user in users:
-        # Get tasks completed this month
-        current_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        monthly_tasks = await db.tasks.count_documents({
-            "$or": [
-                {"assigned_to": user["id"]},
-                {"assigned_users": {"$in": [user["id"]]}}
-            ],
-            "status": TaskStatus.DONE,
-            "completed_date": {"$gte": current_month}
-        })
-        
-        # Get hours logged this month
-        time_entries = await db.time_entries.find({
-            "user_id": user["id"],
-            "date": {"$gte": current_month}
-        }).to_list(1000)
-        
-        monthly_hours = sum(entry["hours"] for entry in time_entries)
-        
-        # Calculate points (tasks completed * 10 + hours * 2)
-        points = monthly_tasks * 10 + monthly_hours * 2
-        
-        leaderboard.append({
-            "user_id": user["id"],
-            "name": user["name"],
-            "avatar_url": user.get("avatar_url"),
-            "tasks_completed": monthly_tasks,
-            "hours_logged": round(monthly_hours, 1),
-            "points": round(points, 1),
-            "rank": 0,  # Will be set after sorting
-            "badges": user.get("badges", []),
-            "burnout_risk": user.get("burnout_risk", "low")
-        })
-    
-    # Sort by points and assign ranks
-    leaderboard.sort(key=lambda x: x["points"], reverse=True)
-    for i, user in enumerate(leaderboard):
-        user["rank"] = i + 1
-    
-    return leaderboard
+@cached_analytics("team-leaderboard", ("users", "tasks", "time_entries"))
+async def get_team_leaderboard(limit: Optional[int] = None, around_user_id: Optional[str] = None, window: int = 2):
+    """This month's leaderboard: the whole team, the top `limit` users, or `window` users either side of `around_user_id`"""
+    month = month_key(datetime.utcnow())
+    user_projection = {"_id": 0, "id": 1, "name": 1, "avatar_url": 1, "badges": 1, "burnout_risk": 1}
+
+    if around_user_id:
+        return await get_leaderboard_around(month, around_user_id, max(window, 0), user_projection)
+
+    if limit:
+        entries = await db.leaderboard_monthly.find({"month": month}, {"_id": 0}).sort(LEADERBOARD_SORT).limit(limit).to_list(None)
+        users = await db.users.find({"id": {"$in": [entry["user_id"] for entry in entries]}}, user_projection).to_list(None)
+        users = {user["id"]: user for user in users}
+        entries = [entry for entry in entries if entry["user_id"] in users]
+        return [leaderboard_row(entry, users[entry["user_id"]], i + 1) for i, entry in enumerate(entries)]
+
+    return await whole_team_leaderboard(await db.users.find({}, user_projection).to_list(None))
+
+async def whole_team_leaderboard(users: List[Dict[str, Any]]):
+    """This month's leaderboard over the given users, including those with no points"""
+    entries = await db.leaderboard_monthly.find({"month": month_key(datetime.utcnow())}, {"_id": 0}).to_list(None)
+    entries = {entry["user_id"]: entry for entry in entries}
+    rows = [(entries.get(user["id"], {}), user) for user in users]
+    rows.sort(key=lambda row: (-row[0].get("points", 0), row[1]["id"]))
+    return [leaderboard_row(entry, user, i + 1) for i, (entry, user) in enumerate(rows)]
+
+async def get_leaderboard_around(month: str, user_id: str, window: int, user_projection: Dict[str, int]):
+    """Rank of a user plus the `window` users directly above and below them"""
+    user = await db.users.find_one({"id": user_id}, user_projection)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    entry = await db.leaderboard_monthly.find_one({"month": month, "user_id": user_id}, {"_id": 0}) or {}
+    points = entry.get("points", 0)
+    ahead = {"month": month, "$or": [{"points": {"$gt": points}}, {"points": points, "user_id": {"$lt": user_id}}]}
+    behind = {"month": month, "$or": [{"points": {"$lt": points}}, {"points": points, "user_id": {"$gt": user_id}}]}
+
+    rank_offset, above, below = await asyncio.gather(
+        db.leaderboard_monthly.count_documents(ahead),
+        db.leaderboard_monthly.find(ahead, {"_id": 0}).sort([("points", ASCENDING), ("user_id", DESCENDING)]).limit(window).to_list(None),
+        db.leaderboard_monthly.find(behind, {"_id": 0}).sort(LEADERBOARD_SORT).limit(window).to_list(None)
+    )
+    above.reverse()
+    rank = rank_offset + 1
+
+    neighbours = await db.users.find({"id": {"$in": [e["user_id"] for e in above + below]}}, user_projection).to_list(None)
+    neighbours = {neighbour["id"]: neighbour for neighbour in neighbours}
+    rows = [
+        leaderboard_row(e, neighbours[e["user_id"]], rank - len(above) + i)
+        for i, e in enumerate(above) if e["user_id"] in neighbours
+    ]
+    rows.append(leaderboard_row(entry, user, rank))
+    rows.extend(
+        leaderboard_row(e, neighbours[e["user_id"]], rank + 1 + i)
+        for i, e in enumerate(below) if e["user_id"] in neighbours
+    )
+    return rows
 
 @api_router.get("/analytics/burnout-analysis")
+@cached_analytics("burnout-analysis", ("users", "time_entries"))
 async def get_burnout_analysis():
     """Get burnout analysis for the team"""
-    users = await db.users.find().to_list(1000)
+    users = await db.users.find({}, {"_id": 0, "id": 1, "name": 1, "avatar_url": 1, "burnout_risk": 1}).to_list(None)
+    return await burnout_analysis(users)
+
+async def burnout_analysis(users: List[Dict[str, Any]]):
+    """Weekly hours, overtime and burnout risk for the given users"""
+    # Weekly totals per user from the daily rollups (the last 7 days, today included)
+    rollup_pipeline = [
+        {"$match": {"date": {"$gte": days_ago_start(6)}}},
+        {"$group": {
+            "_id": "$user_id",
+            "total_hours": {"$sum": "$total_hours"},
+            "overtime_hours": {"$sum": "$overtime_hours"}
+        }}
+    ]
+    weekly_totals = await db.time_rollups_daily.aggregate(rollup_pipeline).to_list(None)
+    weekly_totals = {totals["_id"]: totals for totals in weekly_totals}
     burnout_data = []
-    
+
     for user in users:
-        # Get recent activity
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        time_entries = await db.time_entries.find({
-            "user_id": user["id"],
-            "date": {"$gte": week_ago}
-        }).to_list(1000)
-        
+        totals = weekly_totals.get(user["id"], {})
+
         # Calculate metrics
-        total_hours = sum(entry["hours"] for entry in time_entries)
-        overtime_hours = sum(entry["hours"] for entry in time_entries if entry.get("is_overtime", False))
+        total_hours = totals.get("total_hours", 0)
+        overtime_hours = totals.get("overtime_hours", 0)
         avg_daily_hours = total_hours / 7 if total_hours > 0 else 0
-        
+
         burnout_data.append({
             "user_id": user["id"],
             "name": user["name"],
@@ -895,22 +2751,161 @@ async def get_burnout_analysis():
             "overtime_hours_week": round(overtime_hours, 1),
             "avg_daily_hours": round(avg_daily_hours, 1)
         })
-    
+
     return burnout_data
 
+# Sync routes
+# Pass the previous response's `next` as `since` and repeat while `has_more` is set
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 5000
+
+@api_router.get("/sync")
+async def sync_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(SYNC_DEFAULT_LIMIT, ge=1, le=SYNC_MAX_LIMIT),
+    user_id: Optional[str] = None
+):
+    """Tasks, time entries, notifications and task deletions after change seq `since`.
+    Time entries and notifications are limited to `user_id`; notifications need it."""
+    seq_range = {"$gt": since}
+    if _pending_change_seqs:
+        # Stop below writes that hold a seq but have not landed yet
+        seq_range["$lt"] = min(_pending_change_seqs)
+
+    queries = {"tasks": {"change_seq": seq_range}, "time_entries": {"change_seq": seq_range}}
+    if user_id:
+        queries["time_entries"]["user_id"] = user_id
+        queries["notifications"] = {"user_id": user_id, "change_seq": seq_range}
+    queries["tombstones"] = {"collection": "tasks", "change_seq": seq_range}
+
+    results = await asyncio.gather(*(
+        db[name].find(query, {"_id": 0}).sort("change_seq", ASCENDING).limit(limit).to_list(None)
+        for name, query in queries.items()
+    ))
+    records = dict(zip(queries, results))
+
+    # A collection that filled its limit may have more changes; stop every collection at the
+    # lowest seq reached by one of those so the next call resumes without gaps
+    full = [documents[-1]["change_seq"] for documents in results if len(documents) == limit]
+    has_more = bool(full)
+    if has_more:
+        cutoff = min(full)
+        records = {name: [document for document in documents if document["change_seq"] <= cutoff] for name, documents in records.items()}
+        next_seq = cutoff
+    else:
+        next_seq = max((documents[-1]["change_seq"] for documents in results if documents), default=since)
+
+    tombstones = records.pop("tombstones")
+    return rows_response({
+        "since": since,
+        "next": next_seq,
+        "has_more": has_more,
+        "changes": records,
+        "deleted": {"tasks": [tombstone["id"] for tombstone in tombstones]}
+    })
+
+# Realtime routes
+@api_router.websocket("/ws")
+async def realtime_events(websocket: WebSocket, user_id: Optional[str] = None, boards: Optional[str] = None):
+    """Push delta events for a user's topic and the comma-separated `boards` (default board if omitted)"""
+    board_ids = [board.strip() for board in boards.split(",") if board.strip()] if boards else [DEFAULT_BOARD]
+    topics = [board_topic(board) for board in board_ids]
+    if user_id:
+        topics.append(user_topic(user_id))
+
+    await websocket.accept()
+    subscriber = event_broker.subscribe(topics)
+    # Client messages are ignored; reading them is how a disconnect is noticed
+    receiver = asyncio.ensure_future(discard_client_messages(websocket))
+    next_message = None
+    try:
+        while True:
+            next_message = next_message or asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait({next_message, receiver}, timeout=HEARTBEAT_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                break
+            if next_message in done:
+                message, next_message = next_message.result(), None
+            else:
+                message = HEARTBEAT_MESSAGE
+            await websocket.send_text(message)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        event_broker.unsubscribe(subscriber)
+        receiver.cancel()
+        if next_message:
+            next_message.cancel()
+
+async def discard_client_messages(websocket: WebSocket):
+    """Read and drop client messages, text or binary, until the client disconnects"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+# Dashboard routes
+# Every dashboard panel in one request; paged panels put their next page's cursor under "cursors"
+DASHBOARD_PANELS = [
+    "users", "team_overview", "individual_performance", "productivity_trends",
+    "leaderboard", "kanban", "time_entries", "burnout_analysis"
+]
+
+@api_router.get("/dashboard")
+async def get_dashboard(panels: Optional[str] = None):
+    """All dashboard panels, or only the comma-separated `panels`, computed concurrently"""
+    selected = [panel.strip() for panel in panels.split(",") if panel.strip()] if panels else DASHBOARD_PANELS
+    unknown = [panel for panel in selected if panel not in DASHBOARD_PANELS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dashboard panels: {', '.join(unknown)}")
+    selected = list(dict.fromkeys(selected))
+
+    users_load = None
+
+    async def with_users(compute):
+        # The first panel that needs users starts the read; the others await the same one
+        nonlocal users_load
+        if users_load is None:
+            users_load = asyncio.ensure_future(
+                db.users.find({}, model_projection(User)).sort([("joined_date", ASCENDING), ("id", ASCENDING)]).to_list(None)
+            )
+        return await compute(await asyncio.shield(users_load))
+
+    async def users_panel(users):
+        # The analytics panels need every user anyway, so the user selector gets all of them
+        return model_rows(User, users)
+
+    cursors = {}
+
+    async def time_entries_panel():
+        page = Response()
+        entries = await find_page(db.time_entries, {}, "date", DESCENDING, page, projection=model_projection(TimeEntry))
+        if NEXT_CURSOR_HEADER in page.headers:
+            cursors["time_entries"] = page.headers[NEXT_CURSOR_HEADER]
+        return model_rows(TimeEntry, entries)
+
+    builders = {
+        "users": lambda: with_users(users_panel),
+        "team_overview": get_team_overview,
+        "individual_performance": lambda: get_individual_performance.cached(lambda: with_users(individual_performance)),
+        "productivity_trends": get_productivity_trends,
+        "leaderboard": lambda: get_team_leaderboard.cached(lambda: with_users(whole_team_leaderboard)),
+        "kanban": kanban_board,
+        "time_entries": time_entries_panel,
+        "burnout_analysis": lambda: get_burnout_analysis.cached(lambda: with_users(burnout_analysis))
+    }
+    results = await asyncio.gather(*(builders[panel]() for panel in selected))
+    dashboard = dict(zip(selected, results))
+    if cursors:
+        dashboard["cursors"] = cursors
+    return rows_response(dashboard)
+
 # Initialize with enhanced sample data
 @api_router.post("/init-sample-data")
 async def init_sample_data():
     # Clear existing data
-    await db.users.delete_many({})
-    await db.tasks.delete_many({})
-    await db.time_entries.delete_many({})
-    await db.goals.delete_many({})
-    await db.standups.delete_many({})
-    await db.notifications.delete_many({})
-    await db.task_comments.delete_many({})
-    await db.wiki_pages.delete_many({})
-    
+    await clear_app_data()
+
     # Create sample users with enhanced data
     sample_users = [
         {"name": "Alex Johnson", "email": "alex@thirdangle.com", "avatar_url": "https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=150", "role": "team_lead"},
@@ -921,11 +2916,9 @@ async def init_sample_data():
         {"name": "Lisa Zhang", "email": "lisa@thirdangle.com", "avatar_url": "https://images.unsplash.com/photo-1544005313-94ddf0286df2?w=150", "role": "qa_engineer"}
     ]
     
-    user_ids = []
-    for user_data in sample_users:
-        user = User(**user_data)
-        await db.users.insert_one(user.dict())
-        user_ids.append(user.id)
+    users = [User(**user_data).dict() for user_data in sample_users]
+    await db.users.insert_many(users)
+    user_ids = [user["id"] for user in users]
     
     # Create enhanced sample tasks
     task_templates = [
@@ -944,7 +2937,7 @@ async def init_sample_data():
     ]
     
     # Create tasks with various statuses and assignments
-    task_ids = []
+    tasks = []
     for i, template in enumerate(task_templates):
         for j in range(2):  # Create 2 tasks per template
             created_date = datetime.utcnow() - timedelta(days=30-i*2-j)
@@ -955,7 +2948,7 @@ async def init_sample_data():
                 "assigned_to": assigned_user,
                 "created_date": created_date,
                 "estimated_hours": 4.0 + (i % 5),
-                "position": len(task_ids),
+                "position": len(tasks),
                 "tags": ["development", "urgent"] if template["priority"] == Priority.HIGH else ["development"]
             }
             
@@ -975,11 +2968,12 @@ async def init_sample_data():
             if i % 3 == 0:
                 task_data["assigned_users"] = [user_ids[(i + j + 1) % len(user_ids)]]
             
-            task = Task(**task_data)
-            await db.tasks.insert_one(task.dict())
-            task_ids.append(task.id)
+            tasks.append(Task(**task_data).dict())
+    await insert_chunked(db.tasks, tasks)
+    task_ids = [task["id"] for task in tasks]
     
     # Create sample time entries with realistic patterns
+    time_entries = []
     for user_id in user_ids:
         user_index = user_ids.index(user_id)
         for day in range(30):
@@ -1006,7 +3000,7 @@ async def init_sample_data():
                     is_pomodoro=True,
                     is_overtime=morning_hours > 4
                 )
-                await db.time_entries.insert_one(morning_entry.dict())
+                time_entries.append(morning_entry.dict())
                 
                 # Afternoon session
                 afternoon_entry = TimeEntry(
@@ -1017,9 +3011,11 @@ async def init_sample_data():
                     date=date.replace(hour=14),
                     is_overtime=afternoon_hours > 4
                 )
-                await db.time_entries.insert_one(afternoon_entry.dict())
-    
+                time_entries.append(afternoon_entry.dict())
+    await insert_chunked(db.time_entries, time_entries)
+
     # Create sample comments
+    comments = []
     for i, task_id in enumerate(task_ids[:5]):  # Add comments to first 5 tasks
         comment = TaskComment(
             task_id=task_id,
@@ -1027,7 +3023,8 @@ async def init_sample_data():
             content=f"This task is progressing well. @{user_ids[(i+1) % len(user_ids)]} please review when ready.",
             mentions=[user_ids[(i+1) % len(user_ids)]]
         )
-        await db.task_comments.insert_one(comment.dict())
+        comments.append(comment.dict())
+    await db.task_comments.insert_many(comments)
     
     # Create sample wiki pages
     wiki_pages = [
@@ -1045,46 +3042,165 @@ async def init_sample_data():
         }
     ]
     
-    for page_data in wiki_pages:
-        page = WikiPage(**page_data)
-        await db.wiki_pages.insert_one(page.dict())
-    
-    # Update user statistics and calculate burnout risk
-    for user_id in user_ids:
-        completed_tasks = await db.tasks.count_documents({
-            "$or": [
-                {"assigned_to": user_id},
-                {"assigned_users": {"$in": [user_id]}}
-            ],
-            "status": TaskStatus.DONE
-        })
-        
-        total_hours = sum([
-            entry["hours"] for entry in await db.time_entries.find({
-                "user_id": user_id
-            }).to_list(1000)
-        ])
-        
-        productivity_score = (completed_tasks * 10) + (total_hours * 0.5)
-        burnout_risk = await calculate_burnout_risk(user_id)
-        
-        await db.users.update_one(
-            {"id": user_id},
-            {
-                "$set": {
-                    "total_tasks_completed": completed_tasks,
-                    "total_hours_logged": total_hours,
-                    "productivity_score": productivity_score,
-                    "burnout_risk": burnout_risk
-                }
-            }
-        )
-        
-        # Update badges
-        await update_user_badges(user_id)
-    
+    await db.wiki_pages.insert_many([WikiPage(**page_data).dict() for page_data in wiki_pages])
+
+    # Sample data is inserted directly, so rebuild rollups, user statistics (burnout risk,
+    # badges), the leaderboard and the team counters from it
+    await rebuild_derived_data([month_key(datetime.utcnow())])
+
     return {"message": "Enhanced sample data initialized successfully"}
 
+# Admin routes
+@api_router.get("/admin/index-report")
+async def get_index_report():
+    """Explain every route's query shape and report which ones still scan a whole collection"""
+    results = await asyncio.gather(*(explain_query_shape(shape) for shape in QUERY_SHAPES))
+    return {
+        "routes": results,
+        "collection_scans": [result["route"] for result in results if result["collection_scan"]]
+    }
+
+@api_router.post("/admin/ensure-indexes")
+async def create_indexes():
+    """Create any missing indexes without restarting the server"""
+    return await ensure_indexes()
+
+@api_router.get("/admin/notifications/queue")
+async def get_notification_queue_stats():
+    """Depth, throughput and lag of the notification fan-out queue"""
+    return notification_queue.stats()
+
+@api_router.post("/admin/leaderboard/rebuild")
+async def rebuild_leaderboard_route(month: Optional[str] = None, dry_run: bool = False):
+    """Recompute a month's (YYYY-MM, default current) leaderboard from raw data and report drift"""
+    try:
+        return await rebuild_leaderboard(month, repair=not dry_run)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Month must be formatted as YYYY-MM")
+
+@api_router.post("/admin/time-rollups/backfill")
+async def backfill_time_rollups_route(user_id: Optional[str] = None):
+    """Rebuild the daily time rollups from raw time entries, for one user or everyone"""
+    result = await backfill_time_rollups(db, user_id)
+    analytics_cache.invalidate("time_entries")
+    return result
+
+@api_router.get("/admin/time-entries/storage")
+async def time_entries_storage_route():
+    """Storage mode of time_entries and the size of what it stores"""
+    stats = await db.time_entries.aggregate([{"$collStats": {"storageStats": {}}}]).to_list(None)
+    storage_stats = stats[0]["storageStats"] if stats else {}
+    return {
+        "storage": await time_entries_storage(),
+        "configured": TIME_ENTRIES_STORAGE,
+        "size_bytes": storage_stats.get("size", 0),
+        "storage_size_bytes": storage_stats.get("storageSize", 0),
+        "index_size_bytes": storage_stats.get("totalIndexSize", 0)
+    }
+
+@api_router.get("/admin/archive")
+async def archive_summary_route():
+    """Days, rows and bytes held in the Parquet archive per collection"""
+    return await asyncio.to_thread(archive_summary)
+
+@api_router.post("/admin/archive")
+async def archive_old_records_route(retention_days: int = Query(ARCHIVE_RETENTION_DAYS, ge=ARCHIVE_MIN_RETENTION_DAYS)):
+    """Move time entries and notifications older than the retention horizon to the Parquet archive"""
+    results = await archive_old_records(db, retention_days)
+    analytics_cache.invalidate("time_entries")
+    return results
+
+@api_router.post("/admin/change-seqs/backfill")
+async def backfill_change_seqs_route():
+    """Assign change seqs to synced documents written without one, e.g. by a bulk import"""
+    return await backfill_change_seqs()
+
+@api_router.post("/admin/team-stats/rebuild")
+async def rebuild_team_stats_route():
+    """Recompute the team-overview counters from raw tasks and users"""
+    return await rebuild_team_stats()
+
+@api_router.post("/admin/tasks/rebalance-positions")
+async def rebalance_positions_route(status: Optional[TaskStatus] = None):
+    """Renumber kanban columns to evenly spaced positions"""
+    statuses = [status] if status else list(TaskStatus)
+    return [await rebalance_positions(column.value) for column in statuses]
+
+@api_router.post("/admin/synthetic-data")
+async def generate_synthetic_data_route(
+    users: int = Query(50, ge=1),
+    tasks_per_user: int = Query(10, ge=0),
+    days: int = Query(30, ge=1),
+    entries_per_day: int = Query(2, ge=0),
+    seed: int = 42
+):
+    """Replace all data with a seeded synthetic dataset of the given size"""
+    return await generate_synthetic_data(users, tasks_per_user, days, entries_per_day, seed)
+
+@api_router.get("/admin/analytics-cache")
+async def get_analytics_cache_stats():
+    """Hit, miss, eviction, invalidation and coalesced-request counts of the analytics response cache"""
+    return analytics_cache.stats()
+
+@api_router.post("/admin/analytics-cache/clear")
+async def clear_analytics_cache():
+    """Drop every cached analytics response"""
+    analytics_cache.clear()
+    return analytics_cache.stats()
+
+@api_router.get("/admin/realtime")
+async def get_realtime_stats():
+    """Subscriber, publish, delivery and resync counts of the realtime event broker"""
+    return event_broker.stats()
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    hours: float = Query(24, gt=0),
+    sort_by: str = Query("total_ms", pattern="^(total_ms|max_ms|avg_ms|count)$")
+):
+    """Rank recorded slow query shapes, by total time spent in them unless sort_by says otherwise"""
+    return {"settings": slow_query_log.stats(), "shapes": await slow_query_ranking(db, limit, hours, sort_by)}
+
+@api_router.put("/admin/slow-queries/settings")
+async def update_slow_query_settings(
+    threshold_ms: Optional[float] = Query(None, ge=0),
+    explain_interval: Optional[float] = Query(None, ge=0)
+):
+    """Change the slow query threshold (0 turns recording off) or explain interval of this server process"""
+    if threshold_ms is not None:
+        slow_query_log.threshold_ms = threshold_ms
+    if explain_interval is not None:
+        slow_query_log.explain_interval = explain_interval
+    return slow_query_log.stats()
+
+@api_router.get("/admin/profiler")
+async def get_profiler():
+    """Profiler settings and the profiles this server process keeps"""
+    return request_profiler.stats()
+
+@api_router.put("/admin/profiler")
+async def update_profiler(
+    sample_rate: Optional[float] = Query(None, ge=0, le=1),
+    path_prefix: Optional[str] = None
+):
+    """Profile a share of the requests under path_prefix, e.g. 0.01 of /api/analytics/team-leaderboard"""
+    if sample_rate is not None:
+        request_profiler.sample_rate = sample_rate
+    if path_prefix is not None:
+        request_profiler.path_prefix = path_prefix
+    return request_profiler.stats()
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, profile_format: str = Query("json", alias="format", pattern="^(json|folded)$")):
+    """One request profile; format=folded returns collapsed stacks for flamegraph.pl or speedscope"""
+    profile = request_profiler.profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if profile_format == "folded":
+        return PlainTextResponse(profile.folded())
+    return {**profile.summary(), "stacks": dict(profile.stacks)}
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1094,7 +3210,19 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PROFILE_ID_HEADER],
 )
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    app_gauges.set(notification_queue.stats()["queue_depth"], ("notification_queue_depth",))
+    app_gauges.set(len(analytics_cache.entries), ("analytics_cache_entries",))
+    app_gauges.set(len(analytics_cache.in_flight), ("analytics_cache_in_flight",))
+    app_gauges.set(event_broker.subscribers, ("realtime_subscribers",))
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 # Configure logging
 logging.basicConfig(
@@ -1103,6 +3231,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_client():
+    await ensure_indexes()
+    start_change_seq_backfill()
+    notification_queue.start()
+    slow_query_log.start(db)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if _change_seq_backfill:
+        _change_seq_backfill.cancel()  # Resumes from where it stopped on the next startup
+    await drain_burnout_refreshes()
+    await drain_position_rebalances()
+    await notification_queue.stop()
+    await slow_query_log.drain()
     client.close()
\ No newline at end of file
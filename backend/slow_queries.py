@@ -0,0 +1,233 @@
+"""
+Slow query log for The Third Angle backend.
+Commands slower than SLOW_QUERY_MS go to the capped slow_queries collection by normalized shape,
+with an explain("executionStats") of each shape at most once per explain interval.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import DESCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+SLOW_QUERY_LOG_BYTES = int(os.environ.get("SLOW_QUERY_LOG_BYTES", str(16 * 1024 * 1024)))
+SLOW_QUERY_MAX_PENDING = 100
+# Parts of each command that make up its shape; sort and distinct keys are kept verbatim
+SHAPE_FIELDS = {
+    "find": ("filter", "sort"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort", "update"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+VERBATIM_SHAPE_FIELDS = {"sort", "key"}
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+# Session and transport fields that explain does not accept inside the explained command
+EXPLAIN_DROPPED_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+def plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Flatten the stage names of an explain() winning plan"""
+    if "queryPlan" in plan:  # Slot-based execution engine
+        plan = plan["queryPlan"]
+    stages = [plan.get("stage", "UNKNOWN")]
+    if "inputStage" in plan:
+        stages.extend(plan_stages(plan["inputStage"]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+def normalize_shape(value: Any) -> Any:
+    """Replace literal values with "?" and collapse lists whose items share a shape ($in lists, bulk updates)"""
+    if isinstance(value, dict):
+        return {key: normalize_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = {}
+        for item in value:
+            shape = normalize_shape(item)
+            shapes.setdefault(json.dumps(shape, sort_keys=True), shape)
+        return list(shapes.values())
+    if isinstance(value, str) and value.startswith("$"):
+        return value  # Field paths and variables in aggregation expressions
+    return "?"
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        field: command[field] if field in VERBATIM_SHAPE_FIELDS else normalize_shape(command[field])
+        for field in SHAPE_FIELDS.get(command_name, ()) if field in command
+    }
+
+def explain_summary(explanation: Dict[str, Any]) -> Dict[str, Any]:
+    # Aggregations that are not pushed down entirely report the query under their $cursor stage
+    source = explanation
+    stages = explanation.get("stages")
+    if stages and "$cursor" in stages[0]:
+        source = stages[0]["$cursor"]
+    stats = source.get("executionStats", {})
+    winning_plan = source.get("queryPlanner", {}).get("winningPlan")
+    return {
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "plan": plan_stages(winning_plan) if winning_plan else None
+    }
+
+class SlowQueryLog:
+    """Receives slow commands from the command listener's threads and records them on the event loop"""
+
+    def __init__(self, threshold_ms: float, explain_interval: float):
+        self.db = None
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.pending: set = set()
+        self.last_explained: Dict[str, float] = {}
+        self.explain_lock: Optional[asyncio.Lock] = None
+        self.recorded = 0
+        self.explained = 0
+        self.dropped = 0
+
+    def start(self, db):
+        self.db = db
+        self.loop = asyncio.get_running_loop()
+        self.explain_lock = asyncio.Lock()
+
+    def observe(self, event, collection: str, duration: float, docs_returned: int):
+        """Called from the command listener for every successful command"""
+        duration_ms = duration * 1000
+        if self.loop is None or duration_ms < self.threshold_ms or self.threshold_ms <= 0:
+            return
+        if collection == SLOW_QUERY_COLLECTION or event.command_name == "explain":
+            return
+        shape = command_shape(event.command_name, event.command)
+        shape_id = hashlib.sha1(json.dumps([collection, event.command_name, shape], sort_keys=True, default=str).encode()).hexdigest()[:12]
+        record = {
+            "shape_id": shape_id,
+            "collection": collection,
+            "command": event.command_name,
+            "shape": shape,
+            "duration_ms": round(duration_ms, 2),
+            "docs_returned": docs_returned,
+            "docs_examined": None,
+            "keys_examined": None,
+            "plan": None,
+            "recorded_date": datetime.utcnow()
+        }
+        self.loop.call_soon_threadsafe(self._schedule, record, event.database_name, event.command)
+
+    def _schedule(self, record: Dict[str, Any], database_name: str, command: Dict[str, Any]):
+        if len(self.pending) >= SLOW_QUERY_MAX_PENDING:
+            self.dropped += 1
+            return
+        task = asyncio.ensure_future(self._record(record, database_name, command))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _record(self, record: Dict[str, Any], database_name: str, command: Dict[str, Any]):
+        try:
+            if self._should_explain(record):
+                await self._explain(record, database_name, command)
+            await self.db[SLOW_QUERY_COLLECTION].insert_one(record)
+            self.recorded += 1
+        except PyMongoError:
+            logger.exception(f"Failed to record slow {record['command']} on {record['collection']}")
+
+    def _should_explain(self, record: Dict[str, Any]) -> bool:
+        if record["command"] not in EXPLAINABLE_COMMANDS or self.explain_lock.locked():
+            return False
+        if any("$out" in stage or "$merge" in stage for stage in record["shape"].get("pipeline", [])):
+            return False
+        now = time.monotonic()
+        if now - self.last_explained.get(record["shape_id"], -math.inf) < self.explain_interval:
+            return False
+        self.last_explained[record["shape_id"]] = now
+        return True
+
+    async def _explain(self, record: Dict[str, Any], database_name: str, command: Dict[str, Any]):
+        explained = {key: value for key, value in command.items() if key not in EXPLAIN_DROPPED_FIELDS and not key.startswith("$")}
+        async with self.explain_lock:
+            try:
+                explanation = await self.db.client[database_name].command({"explain": explained, "verbosity": "executionStats"})
+            except OperationFailure as e:
+                logger.warning(f"Could not explain slow {record['command']} on {record['collection']}: {e}")
+                return
+        record.update(explain_summary(explanation))
+        self.explained += 1
+
+    async def drain(self):
+        while self.pending:
+            await asyncio.gather(*list(self.pending), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_interval_seconds": self.explain_interval,
+            "recorded": self.recorded,
+            "explained": self.explained,
+            "dropped": self.dropped,
+            "pending": len(self.pending)
+        }
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.environ.get("SLOW_QUERY_MS", "100")),
+    explain_interval=float(os.environ.get("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+)
+
+async def ensure_slow_query_log(db):
+    """Create the capped slow query collection; ensure_indexes would otherwise create it uncapped"""
+    try:
+        await db.create_collection(SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_LOG_BYTES)
+    except CollectionInvalid:
+        pass  # Already exists
+
+async def slow_query_ranking(db, limit: int, hours: float, sort_by: str) -> List[Dict[str, Any]]:
+    """Slow query shapes recorded in the last `hours`, slowest first, each with its latest explained plan"""
+    pipeline = [
+        {"$match": {"recorded_date": {"$gte": datetime.utcnow() - timedelta(hours=hours)}}},
+        {"$group": {
+            "_id": "$shape_id",
+            "collection": {"$first": "$collection"},
+            "command": {"$first": "$command"},
+            "shape": {"$first": "$shape"},
+            "count": {"$sum": 1},
+            "total_ms": {"$sum": "$duration_ms"},
+            "avg_ms": {"$avg": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "avg_docs_returned": {"$avg": "$docs_returned"},
+            "max_docs_examined": {"$max": "$docs_examined"},
+            "max_keys_examined": {"$max": "$keys_examined"},
+            "last_seen": {"$max": "$recorded_date"}
+        }},
+        {"$sort": {sort_by: -1, "_id": 1}},
+        {"$limit": limit}
+    ]
+    shapes = await db[SLOW_QUERY_COLLECTION].aggregate(pipeline).to_list(None)
+    explained = await asyncio.gather(*(
+        db[SLOW_QUERY_COLLECTION].find_one(
+            {"shape_id": shape["_id"], "plan": {"$ne": None}},
+            {"_id": 0, "plan": 1, "docs_examined": 1, "keys_examined": 1, "duration_ms": 1, "recorded_date": 1},
+            sort=[("recorded_date", DESCENDING)]
+        )
+        for shape in shapes
+    ))
+    return [
+        {
+            "shape_id": shape.pop("_id"),
+            **shape,
+            "total_ms": round(shape["total_ms"], 2),
+            "avg_ms": round(shape["avg_ms"], 2),
+            "avg_docs_returned": round(shape["avg_docs_returned"] or 0, 1),
+            "latest_explain": latest
+        }
+        for shape, latest in zip(shapes, explained)
+    ]
@@ -0,0 +1,102 @@
+"""
+Shared helpers for the backend benchmarks.
+Benchmarks run against a scratch database on a local mongod (MONGO_URL, default
+mongodb://localhost:27017) and never touch the application's DB_NAME.
+"""
+
+import os
+import sys
+import time
+import random
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "third_angle_bench")
+
+import server  # noqa: E402
+
+db = server.db
+
+CHUNK_SIZE = 5000
+
+async def reset_database():
+    await server.client.drop_database(db.name)
+    await server.ensure_indexes()
+
+async def insert_chunked(collection, documents: List[Dict]):
+    for start in range(0, len(documents), CHUNK_SIZE):
+        await collection.insert_many(documents[start:start + CHUNK_SIZE], ordered=False)
+
+async def seed_team(user_count: int, tasks_per_user: int = 5, days: int = 14, entries_per_day: int = 2, seed: int = 42):
+    """Seed users, tasks and time entries with bulk inserts"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(user_count)]
+
+    users = [
+        server.User(id=user_id, name=f"User {i}", email=f"user{i}@bench.local").dict()
+        for i, user_id in enumerate(user_ids)
+    ]
+    await insert_chunked(db.users, users)
+
+    tasks = []
+    for i in range(user_count * tasks_per_user):
+        status = rng.choice(list(server.TaskStatus))
+        tasks.append(server.Task(
+            title=f"Task {i}",
+            assigned_to=rng.choice(user_ids),
+            assigned_users=rng.sample(user_ids, k=min(len(user_ids), rng.randint(0, 2))),
+            status=status,
+            position=i,
+            completed_date=now - timedelta(days=rng.randint(0, days)) if status == server.TaskStatus.DONE else None
+        ).dict())
+    await insert_chunked(db.tasks, tasks)
+
+    entries = []
+    for user_id in user_ids:
+        for day in range(days):
+            for _ in range(entries_per_day):
+                hours = round(rng.uniform(0.5, 6.0), 2)
+                entries.append(server.TimeEntry(
+                    user_id=user_id,
+                    description="Benchmark work",
+                    hours=hours,
+                    date=now - timedelta(days=day, hours=rng.randint(0, 8)),
+                    is_overtime=hours > 4
+                ).dict())
+        if len(entries) >= CHUNK_SIZE:
+            await insert_chunked(db.time_entries, entries)
+            entries = []
+    await insert_chunked(db.time_entries, entries)
+    return user_ids
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0
+    }
+
+async def time_calls(fn: Callable[[], Awaitable], runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
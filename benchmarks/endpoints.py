@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite for the /api routes.
+Runs the FastAPI app in-process (httpx ASGITransport) against a scratch database on a local
+mongod, seeds a synthetic dataset, drives every route with concurrent clients and reports
+throughput and p50/p95/p99 per route as JSON.
+
+Save a run with --save-baseline; later runs given --baseline exit non-zero when a route's p95
+regresses past the tolerance or a route starts returning unexpected status codes.
+
+Usage:
+  python benchmarks/endpoints.py [--users 1000] [--requests 200] [--concurrency 20] [--save-baseline FILE]
+  python benchmarks/endpoints.py --baseline FILE [--tolerance 0.25] [--routes analytics]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi.routing import APIRoute
+
+from common import db, insert_chunked, reset_database, server, summarize
+
+# Routes that replace the whole dataset; benchmarking them would invalidate every other route
+EXCLUDED_ROUTES = {"POST /api/init-sample-data", "POST /api/admin/synthetic-data"}
+# Routes where a non-200 answer is part of normal traffic
+EXPECTED_STATUSES = {"POST /standups": {200, 400}, "GET /admin/profiles/{profile_id}": {404}}
+# Regressions smaller than this are noise regardless of the relative tolerance
+MIN_REGRESSION_MS = 2.0
+
+class Fixtures:
+    """Ids from the seeded dataset that requests draw from"""
+
+    def __init__(self, rng, user_ids, task_ids, notification_ids, page_ids):
+        self.rng = rng
+        self.user_ids = user_ids
+        self.task_ids = task_ids
+        self.notification_ids = notification_ids
+        self.page_ids = page_ids
+        # Deleted tasks come from the end of the list, away from the ones other routes use
+        self.deletable_task_ids = task_ids[len(task_ids) // 2:]
+        self.standup_user_ids = list(user_ids)
+        rng.shuffle(self.standup_user_ids)
+
+    def user(self):
+        return self.rng.choice(self.user_ids)
+
+    def task(self):
+        return self.rng.choice(self.task_ids[:len(self.task_ids) // 2])
+
+    def take(self, pool, fallback):
+        """An id that no earlier request used; once the pool runs out, reuse `fallback()`"""
+        return pool.pop() if pool else fallback()
+
+def route_specs(f: Fixtures):
+    """Route name -> factory of one request as (method, path, params, json body)"""
+    week_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
+    return {
+        "POST /users": lambda: ("POST", "/users", None, {"name": "Bench User", "email": f"bench-{f.rng.getrandbits(64)}@bench.local"}),
+        "GET /users": lambda: ("GET", "/users", None, None),
+        "GET /users/{user_id}": lambda: ("GET", f"/users/{f.user()}", None, None),
+        "POST /tasks": lambda: ("POST", "/tasks", None, {"title": "Bench task", "assigned_to": f.user(), "assigned_users": [f.user()]}),
+        "GET /tasks": lambda: ("GET", "/tasks", None, None),
+        "GET /tasks?user_id": lambda: ("GET", "/tasks", {"user_id": f.user()}, None),
+        "GET /tasks?status": lambda: ("GET", "/tasks", {"status": "in_progress"}, None),
+        "GET /tasks?fields": lambda: ("GET", "/tasks", {"fields": "title,status,priority,assigned_to"}, None),
+        "GET /tasks/kanban": lambda: ("GET", "/tasks/kanban", None, None),
+        "PUT /tasks/bulk-update-positions": lambda: ("PUT", "/tasks/bulk-update-positions", None, [
+            {"id": f.task(), "position": f.rng.uniform(0, 1000)} for _ in range(20)
+        ]),
+        "PUT /tasks/{task_id}/move": lambda: ("PUT", f"/tasks/{f.task()}/move", None, {"after_id": f.task(), "before_id": None}),
+        "PUT /tasks/{task_id}": lambda: ("PUT", f"/tasks/{f.task()}", None, {"priority": f.rng.choice(["high", "medium", "low"])}),
+        "POST /tasks/{task_id}/comments": lambda: _comment(f),
+        "GET /tasks/{task_id}/comments": lambda: ("GET", f"/tasks/{f.task()}/comments", None, None),
+        "POST /time-entries": lambda: ("POST", "/time-entries", None, {"user_id": f.user(), "task_id": f.task(), "description": "Bench", "hours": 0.42, "is_pomodoro": True}),
+        "GET /time-entries": lambda: ("GET", "/time-entries", None, None),
+        "GET /time-entries?user_id": lambda: ("GET", "/time-entries", {"user_id": f.user()}, None),
+        "GET /export/time-entries": lambda: ("GET", "/export/time-entries", {"user_id": f.user(), "start": week_ago}, None),
+        "GET /export/tasks": lambda: ("GET", "/export/tasks", {"format": "csv", "start": week_ago}, None),
+        "POST /goals": lambda: ("POST", "/goals", None, {"user_id": f.user(), "title": "Bench goal", "goal_type": "task_based", "target_value": 10}),
+        "GET /goals": lambda: ("GET", "/goals", {"user_id": f.user()}, None),
+        "POST /standups": lambda: ("POST", "/standups", None, {"user_id": f.take(f.standup_user_ids, f.user), "what_i_did": "Benchmarks", "what_ill_do": "More benchmarks"}),
+        "GET /standups": lambda: ("GET", "/standups", None, None),
+        "GET /notifications/{user_id}": lambda: ("GET", f"/notifications/{f.user()}", None, None),
+        "PUT /notifications/{notification_id}/read": lambda: ("PUT", f"/notifications/{f.take(f.notification_ids, lambda: f.rng.choice(f.user_ids))}/read", None, None),
+        "POST /wiki": lambda: ("POST", "/wiki", None, {"title": "Bench page", "content": "# Bench", "author_id": f.user()}),
+        "GET /wiki": lambda: ("GET", "/wiki", None, None),
+        "GET /wiki?fields": lambda: ("GET", "/wiki", {"fields": "title,tags,updated_date"}, None),
+        "GET /wiki/{page_id}": lambda: ("GET", f"/wiki/{f.rng.choice(f.page_ids)}", None, None),
+        "GET /analytics/team-overview": lambda: ("GET", "/analytics/team-overview", None, None),
+        "GET /analytics/individual-performance": lambda: ("GET", "/analytics/individual-performance", None, None),
+        "GET /analytics/productivity-trends": lambda: ("GET", "/analytics/productivity-trends", None, None),
+        "GET /analytics/team-leaderboard": lambda: ("GET", "/analytics/team-leaderboard", {"limit": 20}, None),
+        "GET /analytics/team-leaderboard?around_user_id": lambda: ("GET", "/analytics/team-leaderboard", {"around_user_id": f.user()}, None),
+        "GET /analytics/burnout-analysis": lambda: ("GET", "/analytics/burnout-analysis", None, None),
+        "GET /sync": lambda: ("GET", "/sync", {"since": 0, "limit": 200}, None),
+        "GET /sync?user_id": lambda: ("GET", "/sync", {"since": 0, "limit": 200, "user_id": f.user()}, None),
+        "GET /dashboard": lambda: ("GET", "/dashboard", None, None),
+        "GET /dashboard?panels": lambda: ("GET", "/dashboard", {"panels": "team_overview,individual_performance,leaderboard"}, None),
+        "GET /admin/index-report": lambda: ("GET", "/admin/index-report", None, None),
+        "POST /admin/ensure-indexes": lambda: ("POST", "/admin/ensure-indexes", None, None),
+        "GET /admin/notifications/queue": lambda: ("GET", "/admin/notifications/queue", None, None),
+        "POST /admin/leaderboard/rebuild": lambda: ("POST", "/admin/leaderboard/rebuild", {"dry_run": True}, None),
+        "POST /admin/time-rollups/backfill": lambda: ("POST", "/admin/time-rollups/backfill", {"user_id": f.user()}, None),
+        "POST /admin/change-seqs/backfill": lambda: ("POST", "/admin/change-seqs/backfill", None, None),
+        "GET /admin/time-entries/storage": lambda: ("GET", "/admin/time-entries/storage", None, None),
+        "GET /admin/archive": lambda: ("GET", "/admin/archive", None, None),
+        "POST /admin/archive": lambda: ("POST", "/admin/archive", {"retention_days": 3650}, None),
+        "POST /admin/team-stats/rebuild": lambda: ("POST", "/admin/team-stats/rebuild", None, None),
+        "POST /admin/tasks/rebalance-positions": lambda: ("POST", "/admin/tasks/rebalance-positions", {"status": "blocked"}, None),
+        "GET /admin/analytics-cache": lambda: ("GET", "/admin/analytics-cache", None, None),
+        "POST /admin/analytics-cache/clear": lambda: ("POST", "/admin/analytics-cache/clear", None, None),
+        "GET /admin/slow-queries": lambda: ("GET", "/admin/slow-queries", None, None),
+        "PUT /admin/slow-queries/settings": lambda: ("PUT", "/admin/slow-queries/settings", None, None),
+        "GET /admin/profiler": lambda: ("GET", "/admin/profiler", None, None),
+        "PUT /admin/profiler": lambda: ("PUT", "/admin/profiler", None, None),
+        "GET /admin/profiles/{profile_id}": lambda: ("GET", "/admin/profiles/not-kept", None, None),
+        "GET /admin/realtime": lambda: ("GET", "/admin/realtime", None, None),
+        # Deletes run last so every other route sees the full dataset
+        "DELETE /tasks/{task_id}": lambda: ("DELETE", f"/tasks/{f.take(f.deletable_task_ids, f.task)}", None, None),
+    }
+
+def _comment(f: Fixtures):
+    task_id, mentioned = f.task(), f.user()
+    return ("POST", f"/tasks/{task_id}/comments", None, {
+        "task_id": task_id, "user_id": f.user(), "content": f"Looks good @{mentioned}", "mentions": [mentioned]
+    })
+
+def uncovered_routes(specs) -> list:
+    """/api routes that neither have a spec nor are excluded"""
+    covered = {f"{name.split(' ')[0]} /api{name.split(' ')[1].split('?')[0]}" for name in specs}
+    declared = {
+        f"{method} {route.path}"
+        for route in server.app.routes if isinstance(route, APIRoute) and route.path.startswith("/api")
+        for method in route.methods
+    }
+    return sorted(declared - covered - EXCLUDED_ROUTES)
+
+async def seed(users, tasks_per_user, days, entries_per_day, seed_value):
+    await reset_database()
+    summary = await server.generate_synthetic_data(users, tasks_per_user, days, entries_per_day, seed_value)
+    rng = random.Random(seed_value)
+    user_ids = [user["id"] for user in await db.users.find({}, {"_id": 0, "id": 1}).to_list(None)]
+    pages = [
+        server.WikiPage(title=f"Page {i}", content="# Notes\n" * 20, author_id=rng.choice(user_ids)).dict()
+        for i in range(max(users // 10, 1))
+    ]
+    goals = [
+        server.Goal(user_id=user_id, title="Ship it", goal_type=server.GoalType.TASK_BASED, target_value=10).dict()
+        for user_id in user_ids
+    ]
+    await insert_chunked(db.wiki_pages, pages)
+    await insert_chunked(db.goals, goals)
+
+    task_ids = [task["id"] for task in await db.tasks.find({}, {"_id": 0, "id": 1}).to_list(None)]
+    notification_ids = [
+        notification["id"]
+        for notification in await db.notifications.find({"read": False}, {"_id": 0, "id": 1}).to_list(None)
+    ]
+    fixtures = Fixtures(rng, user_ids, task_ids, notification_ids, [page["id"] for page in pages])
+    return summary, fixtures
+
+async def run_route(client, name, factory, requests, concurrency):
+    expected = EXPECTED_STATUSES.get(name, {200})
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    errors = {}
+
+    async def call():
+        method, path, params, body = factory()
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, params=params, json=body)
+            samples.append(time.perf_counter() - start)
+        if response.status_code not in expected:
+            errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {**summarize(samples), "throughput_rps": round(requests / elapsed, 1), "errors": errors}
+
+def compare(results, baseline, tolerance):
+    """Routes whose p95 regressed past the tolerance, or that now return errors"""
+    regressions = []
+    for name, result in results["routes"].items():
+        if result["errors"]:
+            regressions.append({"route": name, "reason": "errors", "errors": result["errors"]})
+        previous = baseline.get("routes", {}).get(name)
+        if not previous:
+            continue
+        limit = previous["p95_ms"] * (1 + tolerance)
+        if result["p95_ms"] > limit and result["p95_ms"] - previous["p95_ms"] > MIN_REGRESSION_MS:
+            regressions.append({
+                "route": name,
+                "reason": "p95",
+                "baseline_p95_ms": previous["p95_ms"],
+                "p95_ms": result["p95_ms"],
+                "change_pct": round((result["p95_ms"] / previous["p95_ms"] - 1) * 100, 1) if previous["p95_ms"] else None
+            })
+    return regressions
+
+async def main(args):
+    summary, fixtures = await seed(args.users, args.tasks_per_user, args.days, args.entries_per_day, args.seed)
+    specs = route_specs(fixtures)
+    selected = {name: factory for name, factory in specs.items() if not args.routes or any(part in name for part in args.routes)}
+
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline")},
+        "dataset": summary,
+        "routes": {},
+        "uncovered_routes": uncovered_routes(specs)
+    }
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench/api", timeout=None) as client:
+        for name, factory in selected.items():
+            # Warm caches and connection pools before timing
+            await run_route(client, name, factory, min(args.warmup, args.requests), args.concurrency)
+            results["routes"][name] = await run_route(client, name, factory, args.requests, args.concurrency)
+            print(f"{name}: p95 {results['routes'][name]['p95_ms']} ms", file=sys.stderr)
+
+    await server.notification_queue.stop()
+    await server.drain_burnout_refreshes()
+    await server.drain_position_rebalances()
+    await server.client.drop_database(db.name)
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            results["regressions"] = compare(results, json.load(baseline_file), args.tolerance)
+        failed = bool(results["regressions"])
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, default=str)
+    print(json.dumps(results, indent=2, default=str))
+    if results["uncovered_routes"]:
+        print(f"Routes without a benchmark: {', '.join(results['uncovered_routes'])}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tasks-per-user", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--entries-per-day", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per route")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per route before timing")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--routes", nargs="*", help="Only run routes whose name contains one of these strings")
+    parser.add_argument("--baseline", help="Compare against a saved run and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p95 increase over the baseline")
+    parser.add_argument("--save-baseline", help="Write this run's results to a baseline file")
+    sys.exit(asyncio.run(main(parser.parse_args())))
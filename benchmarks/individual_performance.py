@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GET /api/analytics/individual-performance.
+Compares the previous per-user loop (3N+1 round trips) against the single-pass
+aggregation at several team sizes.
+
+Usage: python benchmarks/individual_performance.py [--sizes 10 1000 10000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from common import db, reset_database, seed_team, server, summarize, time_calls
+
+async def legacy_individual_performance():
+    """The per-user implementation this endpoint used before the aggregation rewrite"""
+    users = await db.users.find().to_list(None)
+    performance_data = []
+    for user in users:
+        assignee_filter = {
+            "$or": [
+                {"assigned_to": user["id"]},
+                {"assigned_users": {"$in": [user["id"]]}}
+            ]
+        }
+        user_tasks = await db.tasks.count_documents(assignee_filter)
+        completed_tasks = await db.tasks.count_documents({**assignee_filter, "status": server.TaskStatus.DONE})
+        week_ago = datetime.utcnow() - timedelta(days=7)
+        time_entries = await db.time_entries.find({
+            "user_id": user["id"],
+            "date": {"$gte": week_ago}
+        }).to_list(None)
+        hours_this_week = sum(entry["hours"] for entry in time_entries)
+        completion_rate = (completed_tasks / user_tasks * 100) if user_tasks > 0 else 0
+        performance_data.append({
+            "user_id": user["id"],
+            "total_tasks": user_tasks,
+            "completed_tasks": completed_tasks,
+            "hours_this_week": round(hours_this_week, 1),
+            "completion_rate": round(completion_rate, 1)
+        })
+    return performance_data
+
+async def aggregated_individual_performance():
+    """The route's computation without the analytics cache, which would serve every run after the first"""
+    users = await db.users.find({}, {"_id": 0, "id": 1, "name": 1, "avatar_url": 1, "burnout_risk": 1, "badges": 1}).to_list(None)
+    return await server.individual_performance(users)
+
+async def main(sizes, runs, legacy_limit):
+    results = []
+    for size in sizes:
+        await reset_database()
+        await seed_team(size)
+
+        result = {"users": size, "aggregation": summarize(await time_calls(aggregated_individual_performance, runs))}
+        if size <= legacy_limit:
+            result["legacy_loop"] = summarize(await time_calls(legacy_individual_performance, runs))
+
+            # The rewrite must return the same numbers as the loop it replaces
+            legacy = {row["user_id"]: row for row in await legacy_individual_performance()}
+            for row in await aggregated_individual_performance():
+                expected = legacy[row["user_id"]]
+                assert all(row[key] == expected[key] for key in expected), f"Mismatch for {row['user_id']}"
+        results.append(result)
+        print(json.dumps(result))
+
+    await server.client.drop_database(db.name)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--legacy-limit", type=int, default=10000, help="Skip the legacy loop above this many users")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.runs, args.legacy_limit))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Fan-out benchmark for the realtime event broker behind /api/ws.
+Connects N clients to one board, publishes task events and reports the publisher's cost per
+event and the publish-to-receive latency across all clients.
+
+By default clients subscribe to the broker in-process, which isolates the broker's own cost
+and needs no database. With --websocket the app is served by uvicorn on a local port and every
+client is a real WebSocket connection (needs the `websockets` package).
+
+Usage: python benchmarks/realtime_fanout.py [--clients 1000] [--events 200] [--interval-ms 5] [--websocket]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from common import server, summarize
+
+BOARD = server.DEFAULT_BOARD
+
+async def consume_queue(subscriber, events, latencies, resyncs):
+    received = 0
+    while received < events:
+        message = json.loads(await subscriber.queue.get())
+        if message["type"] == "resync":
+            resyncs.append(1)
+            return
+        latencies.append(time.time() - message["ts"])
+        received += 1
+
+async def consume_socket(socket, events, latencies, resyncs):
+    received = 0
+    while received < events:
+        message = json.loads(await socket.recv())
+        if message["type"] == "heartbeat":
+            continue
+        if message["type"] == "resync":
+            resyncs.append(1)
+            return
+        latencies.append(time.time() - message["ts"])
+        received += 1
+
+async def publish_events(events, interval):
+    publish_samples = []
+    for i in range(events):
+        start = time.perf_counter()
+        server.event_broker.publish(
+            [server.board_topic(None)],
+            "task.updated",
+            {"id": f"bench-task-{i}", "position": float(i), "status": "in_progress"}
+        )
+        publish_samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return publish_samples
+
+async def run_in_process(clients, events, interval):
+    subscribers = [server.event_broker.subscribe([server.board_topic(None)]) for _ in range(clients)]
+    latencies, resyncs = [], []
+    consumers = [asyncio.ensure_future(consume_queue(subscriber, events, latencies, resyncs)) for subscriber in subscribers]
+    publish_samples = await publish_events(events, interval)
+    await asyncio.gather(*consumers)
+    for subscriber in subscribers:
+        server.event_broker.unsubscribe(subscriber)
+    return publish_samples, latencies, resyncs
+
+async def run_websocket(clients, events, interval, port):
+    import uvicorn
+    import websockets
+
+    config = uvicorn.Config(server.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    http_server = uvicorn.Server(config)
+    serving = asyncio.ensure_future(http_server.serve())
+    while not http_server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"ws://127.0.0.1:{port}/api/ws?boards={BOARD}"
+    sockets = await asyncio.gather(*(websockets.connect(url, max_queue=None) for _ in range(clients)))
+    while server.event_broker.subscribers < clients:
+        await asyncio.sleep(0.05)
+
+    latencies, resyncs = [], []
+    consumers = [asyncio.ensure_future(consume_socket(socket, events, latencies, resyncs)) for socket in sockets]
+    publish_samples = await publish_events(events, interval)
+    await asyncio.gather(*consumers)
+
+    await asyncio.gather(*(socket.close() for socket in sockets))
+    http_server.should_exit = True
+    await serving
+    return publish_samples, latencies, resyncs
+
+async def main(clients, events, interval_ms, websocket, port):
+    interval = interval_ms / 1000
+    if websocket:
+        publish_samples, latencies, resyncs = await run_websocket(clients, events, interval, port)
+    else:
+        publish_samples, latencies, resyncs = await run_in_process(clients, events, interval)
+
+    results = {
+        "mode": "websocket" if websocket else "in_process",
+        "clients": clients,
+        "events": events,
+        "interval_ms": interval_ms,
+        "publish": summarize(publish_samples),
+        "delivery_latency": summarize(latencies),
+        "deliveries": len(latencies),
+        "resynced_clients": len(resyncs),
+        "broker": server.event_broker.stats()
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="Pause between published events")
+    parser.add_argument("--websocket", action="store_true", help="Serve the app with uvicorn and connect real WebSocket clients")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.events, args.interval_ms, args.websocket, args.port))
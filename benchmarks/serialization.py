@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+CPU microbenchmark for serializing list responses.
+Encodes the same stored documents through the previous read path (a model per row, then
+FastAPI's response_model validation and JSONResponse) and the current one (projected raw
+documents with model defaults, encoded by ORJSONResponse), and reports the cost per row.
+Needs no database.
+
+Usage: python benchmarks/serialization.py [--rows 1000] [--runs 50]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from common import server, summarize
+
+def stored_tasks(rows: int, rng: random.Random) -> List[dict]:
+    now = datetime.utcnow()
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(50)]
+    tasks = []
+    for i in range(rows):
+        task = server.Task(
+            title=f"Task {i}",
+            description="Benchmark task " * rng.randint(1, 20),
+            status=rng.choice(list(server.TaskStatus)),
+            assigned_to=rng.choice(user_ids),
+            assigned_users=rng.sample(user_ids, k=rng.randint(0, 3)),
+            tags=rng.sample(["frontend", "backend", "bug", "infra", "design"], k=rng.randint(0, 3)),
+            position=float(i),
+            due_date=now + timedelta(days=rng.randint(1, 30)),
+            change_seq=i + 1
+        ).dict()
+        tasks.append({"_id": ObjectId(), **task})
+    return tasks
+
+def stored_time_entries(rows: int, rng: random.Random) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {"_id": ObjectId(), **server.TimeEntry(
+            user_id=str(uuid.uuid4()),
+            description="Benchmark work",
+            hours=round(rng.uniform(0.5, 6.0), 2),
+            date=now - timedelta(hours=i),
+            change_seq=i + 1
+        ).dict()}
+        for i in range(rows)
+    ]
+
+def project(documents: List[dict], model) -> List[dict]:
+    """What Mongo returns for the read routes' projection"""
+    fields = server.model_projection(model)
+    return [{key: value for key, value in document.items() if fields.get(key)} for document in documents]
+
+async def before(model, documents: List[dict], field) -> bytes:
+    rows = [model(**document) for document in documents]
+    content = await serialize_response(field=field, response_content=rows, is_coroutine=True)
+    return JSONResponse(content).body
+
+async def after(model, documents: List[dict], field) -> bytes:
+    return server.rows_response(server.model_rows(model, documents)).body
+
+async def measure(path, model, documents, field, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = await path(model, documents, field)
+        samples.append(time.perf_counter() - start)
+    summary = summarize(samples)
+    summary["per_row_us"] = round(summary["p50_ms"] * 1000 / len(documents), 2)
+    summary["bytes"] = len(body)
+    return summary, body
+
+async def main(rows: int, runs: int, seed: int):
+    rng = random.Random(seed)
+    datasets = {
+        "tasks": (server.Task, stored_tasks(rows, rng)),
+        "time_entries": (server.TimeEntry, stored_time_entries(rows, rng))
+    }
+    results = {"rows": rows, "runs": runs}
+    for name, (model, documents) in datasets.items():
+        field = create_response_field(name=f"Response_{name}", type_=List[model], mode="serialization")
+        before_summary, before_body = await measure(before, model, documents, field, runs)
+        after_summary, after_body = await measure(after, model, project(documents, model), field, runs)
+        results[name] = {
+            "before_model_validation": before_summary,
+            "after_orjson_rows": after_summary,
+            "speedup": round(before_summary["p50_ms"] / max(after_summary["p50_ms"], 1e-6), 1),
+            "same_output": json.loads(before_body) == json.loads(after_body)
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.runs, args.seed))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Load test for POST /api/tasks under concurrent creation.
+Creates tasks concurrently through the previous path (max-position lookup plus one user
+lookup per assignee) and the current one (atomic per-board counter plus one $in lookup),
+then reports latency, throughput and how many positions were handed out twice.
+
+Usage: python benchmarks/task_creation.py [--users 50] [--requests 2000] [--concurrency 100]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+from common import db, reset_database, seed_team, server, summarize
+
+async def legacy_create_task(task_data):
+    """The position and validation path create_task used before the counter was introduced"""
+    if task_data.assigned_to:
+        if not await db.users.find_one({"id": task_data.assigned_to}):
+            raise RuntimeError("Assigned user not found")
+    for user_id in task_data.assigned_users:
+        if not await db.users.find_one({"id": user_id}):
+            raise RuntimeError(f"User {user_id} not found")
+
+    last_task = await db.tasks.find_one({}, sort=[("position", -1)])
+    position = (last_task["position"] + 1) if last_task else 0
+    task = server.Task(**task_data.dict(), position=position)
+    await db.tasks.insert_one(task.dict())
+    await server.update_team_stats(server.task_team_stats(task.dict()))
+    return task
+
+async def run_load(handler, payloads, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    positions = []
+
+    async def timed(payload):
+        async with semaphore:
+            start = time.perf_counter()
+            task = await handler(payload)
+            samples.append(time.perf_counter() - start)
+            positions.append((payload.project_id, task.position))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(payload) for payload in payloads))
+    elapsed = time.perf_counter() - start
+    duplicates = sum(count - 1 for count in Counter(positions).values() if count > 1)
+    return {**summarize(samples), "throughput_rps": round(len(payloads) / elapsed, 1), "duplicate_positions": duplicates}
+
+async def main(users, requests, concurrency, seed):
+    await reset_database()
+    user_ids = await seed_team(users, tasks_per_user=0, days=0, seed=seed)
+    await server.rebuild_team_stats()
+
+    rng = random.Random(seed)
+    payloads = [
+        server.TaskCreate(
+            title=f"Load task {i}",
+            assigned_to=rng.choice(user_ids),
+            assigned_users=rng.sample(user_ids, k=min(len(user_ids), 3)),
+            source="benchmark"
+        )
+        for i in range(requests)
+    ]
+
+    results = {"users": users, "requests": requests, "concurrency": concurrency}
+    results["before_max_position"] = await run_load(legacy_create_task, payloads, concurrency)
+    await db.tasks.delete_many({})
+    await db.counters.delete_many({})
+    server._position_counters_ready.clear()
+    results["after_counter"] = await run_load(server.create_task, payloads, concurrency)
+    await server.notification_queue.stop()
+    print(json.dumps(results, indent=2))
+
+    await server.client.drop_database(db.name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.requests, args.concurrency, args.seed))
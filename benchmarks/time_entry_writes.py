@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for POST /api/time-entries under burst load.
+Fires bursts of concurrent time entries (as Pomodoro clients do) through the previous
+sequential write path and the current concurrent one, and reports p50/p99 per request.
+
+Usage: python benchmarks/time_entry_writes.py [--users 50] [--requests 2000] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from common import db, reset_database, seed_team, server, summarize
+from rollups import record_time_rollup
+
+async def legacy_create_time_entry(time_data):
+    """The sequential write path this endpoint used before it was restructured"""
+    time_entry_dict = time_data.dict()
+    time_entry_dict["is_overtime"] = time_data.hours > 8
+    time_entry = server.TimeEntry(**time_entry_dict)
+    await db.time_entries.insert_one(time_entry.dict())
+    await db.users.update_one({"id": time_data.user_id}, {"$inc": {"total_hours_logged": time_data.hours}})
+    if time_data.task_id:
+        # Same null-safe update as the current path, so both sides do identical work per write
+        await db.tasks.update_one(
+            {"id": time_data.task_id},
+            [{"$set": {"actual_hours": {"$add": [{"$ifNull": ["$actual_hours", 0]}, time_data.hours]}}}]
+        )
+    await server.increment_leaderboard(server.month_key(time_entry.date), [time_data.user_id], hours=time_data.hours)
+    await record_time_rollup(db, time_entry.dict())
+    await server.update_burnout_risk(time_data.user_id)
+    return time_entry
+
+async def run_burst(handler, payloads, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def timed(payload):
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(payload)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(payload) for payload in payloads))
+    elapsed = time.perf_counter() - start
+    return {**summarize(samples), "throughput_rps": round(len(payloads) / elapsed, 1)}
+
+async def main(users, requests, concurrency, seed):
+    await reset_database()
+    user_ids = await seed_team(users, seed=seed)
+    task_ids = [task["id"] for task in await db.tasks.find({}, {"id": 1}).to_list(None)]
+
+    rng = random.Random(seed)
+    payloads = [
+        server.TimeEntryCreate(
+            user_id=rng.choice(user_ids),
+            task_id=rng.choice(task_ids),
+            description="Pomodoro",
+            hours=0.42,
+            is_pomodoro=True
+        )
+        for _ in range(requests)
+    ]
+
+    results = {"users": users, "requests": requests, "concurrency": concurrency}
+    results["before_sequential"] = await run_burst(legacy_create_time_entry, payloads, concurrency)
+    results["after_concurrent"] = await run_burst(server.create_time_entry, payloads, concurrency)
+    await server.drain_burnout_refreshes()
+    print(json.dumps(results, indent=2))
+
+    await server.client.drop_database(db.name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.requests, args.concurrency, args.seed))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Storage and trend-query benchmark for time_entries as a regular vs a time-series collection.
+Loads the same generated entries into one collection of each storage mode (with the indexes
+ensure_indexes gives that mode), then reports their data, storage and index sizes and the
+latency of the raw-entry trend aggregations the server runs: team hours per day over 30 days
+(the rollup backfill's shape), hours per user over the last week (individual performance) and
+one user's daily hours over 90 days.
+
+Usage: python benchmarks/time_series.py [--entries 5000000] [--users 10000] [--days 250] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from common import CHUNK_SIZE, db, insert_chunked, server, summarize, time_calls
+
+MODES = {mode: f"time_entries_{mode}" for mode in server.TIME_ENTRY_STORAGE_MODES}
+
+def generate_entries(count: int, user_ids, days: int, rng: random.Random):
+    """Entries in chunks, shaped like stored TimeEntry documents"""
+    now = datetime.utcnow()
+    chunk = []
+    for i in range(count):
+        hours = round(rng.uniform(0.25, 6.0), 2)
+        chunk.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "user_id": rng.choice(user_ids),
+            "task_id": None,
+            "description": "Benchmark work",
+            "hours": hours,
+            "date": now - timedelta(days=rng.randint(0, days - 1), minutes=rng.randint(0, 600)),
+            "is_pomodoro": hours < 0.5,
+            "is_overtime": hours > 4,
+            "change_seq": i + 1
+        })
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def trend_queries(user_id: str):
+    now = datetime.utcnow()
+    day = {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}
+    return {
+        "team_daily_30d": [
+            {"$match": {"date": {"$gte": now - timedelta(days=30)}}},
+            {"$group": {"_id": day, "hours": {"$sum": "$hours"}}}
+        ],
+        "hours_per_user_7d": [
+            {"$match": {"date": {"$gte": now - timedelta(days=7)}}},
+            {"$group": {"_id": "$user_id", "hours": {"$sum": "$hours"}}}
+        ],
+        "user_daily_90d": [
+            {"$match": {"user_id": user_id, "date": {"$gte": now - timedelta(days=90)}}},
+            {"$group": {"_id": day, "hours": {"$sum": "$hours"}}}
+        ]
+    }
+
+async def storage_stats(name: str):
+    stats = (await db[name].aggregate([{"$collStats": {"storageStats": {}}}]).to_list(None))[0]["storageStats"]
+    return {
+        "size_mb": round(stats.get("size", 0) / 2**20, 1),
+        "storage_size_mb": round(stats.get("storageSize", 0) / 2**20, 1),
+        "index_size_mb": round(stats.get("totalIndexSize", 0) / 2**20, 1)
+    }
+
+async def main(entries: int, users: int, days: int, runs: int, seed: int):
+    rng = random.Random(seed)
+    user_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(users)]
+    for mode, name in MODES.items():
+        await db[name].drop()
+        await server.create_time_entries_collection(name, mode)
+    for chunk in generate_entries(entries, user_ids, days, rng):
+        await asyncio.gather(*(insert_chunked(db[name], [dict(entry) for entry in chunk]) for name in MODES.values()))
+    for mode, name in MODES.items():
+        await db[name].create_indexes(server.time_entry_indexes(mode))
+
+    results = {"entries": entries, "users": users, "days": days, "runs": runs}
+    queries = trend_queries(rng.choice(user_ids))
+    for mode, name in MODES.items():
+        results[mode] = {"storage": await storage_stats(name)}
+        for query, pipeline in queries.items():
+            await db[name].aggregate(pipeline).to_list(None)  # Warm the cache
+            samples = await time_calls(lambda: db[name].aggregate(pipeline).to_list(None), runs)
+            results[mode][query] = summarize(samples)
+    print(json.dumps(results, indent=2))
+
+    for name in MODES.values():
+        await db[name].drop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries, args.users, args.days, args.runs, args.seed))
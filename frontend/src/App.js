@@ -33,17 +33,8 @@ const App = () => {
       // Initialize sample data first
       await axios.post(`${API}/init-sample-data`);
       
-      // Then fetch all data
-      await Promise.all([
-        fetchUsers(),
-        fetchTeamOverview(),
-        fetchIndividualPerformance(),
-        fetchProductivityTrends(),
-        fetchLeaderboard(),
-        fetchKanbanTasks(),
-        fetchTimeEntries(),
-        fetchBurnoutAnalysis()
-      ]);
+      // Then fetch every panel in one request
+      await fetchDashboard();
       
       setLoading(false);
     } catch (error) {
@@ -52,18 +43,36 @@ const App = () => {
     }
   };
 
-  const fetchUsers = async () => {
+  const fetchDashboard = async () => {
     try {
-      const response = await axios.get(`${API}/users`);
-      setUsers(response.data);
-      if (response.data.length > 0 && !selectedUser) {
-        setSelectedUser(response.data[0].id);
+      const response = await axios.get(`${API}/dashboard`);
+      const dashboard = response.data;
+      setUsers(dashboard.users);
+      if (dashboard.users.length > 0 && !selectedUser) {
+        setSelectedUser(dashboard.users[0].id);
       }
+      setTeamOverview(dashboard.team_overview);
+      setIndividualPerformance(dashboard.individual_performance);
+      setProductivityTrends(dashboard.productivity_trends);
+      setLeaderboard(dashboard.leaderboard);
+      setKanbanTasks(dashboard.kanban);
+      setTimeEntries(await fetchRemainingPages(`${API}/time-entries`, dashboard.time_entries, dashboard.cursors?.time_entries));
+      setBurnoutAnalysis(dashboard.burnout_analysis);
     } catch (error) {
-      console.error("Error fetching users:", error);
+      console.error("Error fetching dashboard:", error);
     }
   };
 
+  // List endpoints return one page and the next page's cursor in X-Next-Cursor
+  const fetchRemainingPages = async (url, rows, cursor) => {
+    while (cursor) {
+      const response = await axios.get(url, { params: { cursor } });
+      rows = rows.concat(response.data);
+      cursor = response.headers["x-next-cursor"];
+    }
+    return rows;
+  };
+
   const fetchTeamOverview = async () => {
     try {
       const response = await axios.get(`${API}/analytics/team-overview`);
@@ -73,33 +82,6 @@ const App = () => {
     }
   };
 
-  const fetchIndividualPerformance = async () => {
-    try {
-      const response = await axios.get(`${API}/analytics/individual-performance`);
-      setIndividualPerformance(response.data);
-    } catch (error) {
-      console.error("Error fetching individual performance:", error);
-    }
-  };
-
-  const fetchProductivityTrends = async () => {
-    try {
-      const response = await axios.get(`${API}/analytics/productivity-trends`);
-      setProductivityTrends(response.data);
-    } catch (error) {
-      console.error("Error fetching productivity trends:", error);
-    }
-  };
-
-  const fetchLeaderboard = async () => {
-    try {
-      const response = await axios.get(`${API}/analytics/team-leaderboard`);
-      setLeaderboard(response.data);
-    } catch (error) {
-      console.error("Error fetching leaderboard:", error);
-    }
-  };
-
   const fetchKanbanTasks = async () => {
     try {
       const response = await axios.get(`${API}/tasks/kanban`);
@@ -109,15 +91,6 @@ const App = () => {
     }
   };
 
-  const fetchTimeEntries = async () => {
-    try {
-      const response = await axios.get(`${API}/time-entries`);
-      setTimeEntries(response.data);
-    } catch (error) {
-      console.error("Error fetching time entries:", error);
-    }
-  };
-
   const fetchNotifications = async (userId) => {
     try {
       const response = await axios.get(`${API}/notifications/${userId}`);
@@ -127,15 +100,6 @@ const App = () => {
     }
   };
 
-  const fetchBurnoutAnalysis = async () => {
-    try {
-      const response = await axios.get(`${API}/analytics/burnout-analysis`);
-      setBurnoutAnalysis(response.data);
-    } catch (error) {
-      console.error("Error fetching burnout analysis:", error);
-    }
-  };
-
   // Drag and Drop handlers
   const handleDragStart = (e, task) => {
     setDraggedTask(task);
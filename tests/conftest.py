@@ -0,0 +1,36 @@
+"""
+Shared fixtures for the backend unit tests.
+Tests import backend/server.py directly and swap its database for an in-memory mongomock one,
+so they run without a mongod. Run from the repository root with `python -m pytest tests`.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = "third_angle_test"
+os.environ.setdefault("ARCHIVE_DIR", tempfile.mkdtemp(prefix="third_angle_archive_"))
+
+import archive  # noqa: E402
+import server  # noqa: E402
+
+def run(coro):
+    return asyncio.run(coro)
+
+@pytest.fixture
+def db(monkeypatch):
+    database = AsyncMongoMockClient()["third_angle_test"]
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+@pytest.fixture
+def archive_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path)
+    return tmp_path
@@ -0,0 +1,152 @@
+import asyncio
+
+import server
+
+from tests.conftest import run
+
+def counting_compute(results):
+    async def compute():
+        results.append(len(results) + 1)
+        return results[-1]
+    return compute
+
+def test_hits_until_a_read_collection_is_written():
+    cache = server.AnalyticsCache()
+    computed = []
+
+    async def scenario():
+        values = [await cache.get_or_compute("trends", {}, ("tasks",), counting_compute(computed)) for _ in range(2)]
+        cache.invalidate("users")  # Not read by this entry
+        values.append(await cache.get_or_compute("trends", {}, ("tasks",), counting_compute(computed)))
+        cache.invalidate("tasks")
+        values.append(await cache.get_or_compute("trends", {}, ("tasks",), counting_compute(computed)))
+        return values
+
+    assert run(scenario()) == [1, 1, 1, 2]
+    assert (cache.hits, cache.invalidations) == (2, 1)
+
+def test_entries_are_keyed_by_parameters():
+    cache = server.AnalyticsCache()
+    computed = []
+
+    async def scenario():
+        first = await cache.get_or_compute("leaderboard", {"limit": 10}, ("tasks",), counting_compute(computed))
+        other = await cache.get_or_compute("leaderboard", {"limit": 20}, ("tasks",), counting_compute(computed))
+        again = await cache.get_or_compute("leaderboard", {"limit": "10"}, ("tasks",), counting_compute(computed))
+        return first, other, again
+
+    assert run(scenario()) == (1, 2, 1)
+
+def test_expired_and_evicted_entries_are_recomputed():
+    cache = server.AnalyticsCache(max_entries=1, ttl=0)
+    computed = []
+
+    async def scenario():
+        await cache.get_or_compute("trends", {}, ("tasks",), counting_compute(computed))
+        return await cache.get_or_compute("trends", {}, ("tasks",), counting_compute(computed))
+
+    assert run(scenario()) == 2
+    assert cache.expirations == 1
+
+def test_a_write_during_the_computation_leaves_the_result_stale():
+    cache = server.AnalyticsCache()
+    computed = []
+
+    async def scenario():
+        async def compute_during_a_write():
+            cache.invalidate("tasks")  # Lands after the computation read its versions
+            return await counting_compute(computed)()
+
+        first = await cache.get_or_compute("trends", {}, ("tasks",), compute_during_a_write)
+        return first, await cache.get_or_compute("trends", {}, ("tasks",), counting_compute(computed))
+
+    assert run(scenario()) == (1, 2)
+
+def test_cached_routes_are_invalidated_by_writes(db, monkeypatch):
+    cache = server.AnalyticsCache()
+    monkeypatch.setattr(server, "analytics_cache", cache)
+
+    async def scenario():
+        await server.create_user(server.UserCreate(name="Ada", email="ada@example.com"))
+        first, cached = await server.get_burnout_analysis(), await server.get_burnout_analysis()
+        await server.create_user(server.UserCreate(name="Grace", email="grace@example.com"))
+        return first, cached, await server.get_burnout_analysis()
+
+    first, cached, after = run(scenario())
+    assert cached is first
+    assert [row["name"] for row in after] == ["Ada", "Grace"]
+    assert (cache.hits, cache.invalidations) == (1, 1)
+
+def test_identical_misses_share_one_computation():
+    cache = server.AnalyticsCache()
+    started = []
+
+    async def compute():
+        started.append(True)
+        await asyncio.sleep(0.01)
+        return {"rows": len(started)}
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("trends", {}, ("tasks",), compute) for _ in range(5)))
+
+    results = run(scenario())
+    assert started == [True]
+    assert all(result is results[0] for result in results)
+    assert (cache.computations, cache.coalesced["trends"]) == (1, 4)
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_computation():
+    cache = server.AnalyticsCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_compute("trends", {}, ("tasks",), compute))
+        second = asyncio.ensure_future(cache.get_or_compute("trends", {}, ("tasks",), compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert run(scenario()) == "done"
+    assert cache.computations == 1
+
+def test_a_miss_after_a_write_does_not_join_the_older_computation():
+    cache = server.AnalyticsCache()
+    computed = []
+
+    async def compute():
+        computed.append(True)
+        number = len(computed)
+        await asyncio.sleep(0.01)
+        return number
+
+    async def scenario():
+        before = asyncio.ensure_future(cache.get_or_compute("trends", {}, ("tasks",), compute))
+        await asyncio.sleep(0)
+        cache.invalidate("tasks")
+        after = await cache.get_or_compute("trends", {}, ("tasks",), compute)
+        return await before, after
+
+    assert run(scenario()) == (1, 2)
+    assert cache.computations == 2
+
+def test_a_failed_computation_is_not_cached():
+    cache = server.AnalyticsCache()
+    attempts = []
+
+    async def compute():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise RuntimeError("aggregation failed")
+        return "recovered"
+
+    async def scenario():
+        try:
+            await cache.get_or_compute("trends", {}, ("tasks",), compute)
+        except RuntimeError:
+            pass
+        return await cache.get_or_compute("trends", {}, ("tasks",), compute)
+
+    assert run(scenario()) == "recovered"
+    assert not cache.in_flight
@@ -0,0 +1,97 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import archive
+import rollups
+import server
+
+from tests.conftest import run
+
+async def read_body(response) -> str:
+    return "".join([chunk async for chunk in response.body_iterator])
+
+async def seed_entries(db, days_ago):
+    now = datetime.utcnow()
+    for days in days_ago:
+        await db.time_entries.insert_one(server.TimeEntry(
+            user_id="user-a", description="Archived work", hours=2.0, date=now - timedelta(days=days)
+        ).model_dump())
+
+def test_export_with_aware_start_reads_both_tiers(db, archive_dir):
+    async def scenario():
+        await seed_entries(db, [120, 100, 1])
+        archived = await archive.archive_old_records(db, 90)
+        response = await server.export_time_entries(
+            export_format="ndjson", user_id=None, task_id=None,
+            start=datetime(2020, 1, 1, tzinfo=timezone.utc), end=None
+        )
+        return archived, [json.loads(line) for line in (await read_body(response)).splitlines()]
+
+    archived, rows = run(scenario())
+    assert archived["time_entries"]["archived"] == 2
+    assert len(rows) == 3
+    assert [row["date"] for row in rows] == sorted(row["date"] for row in rows)
+
+def test_export_with_aware_end_excludes_hot_entries(db, archive_dir):
+    async def scenario():
+        await seed_entries(db, [120, 1])
+        await archive.archive_old_records(db, 90)
+        end = (datetime.utcnow() - timedelta(days=30)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=5)))
+        response = await server.export_time_entries(export_format="ndjson", user_id=None, task_id=None, start=None, end=end)
+        return (await read_body(response)).splitlines()
+
+    assert len(run(scenario())) == 1
+
+def test_archive_filters_translate_export_queries():
+    start, end = datetime(2024, 1, 1), datetime(2024, 2, 1)
+    query = {"date": {"$gte": start, "$lt": end}, "user_id": "user-a"}
+    assert archive.archive_filters(query, "date") == [("date", ">=", start), ("date", "<", end), ("user_id", "==", "user-a")]
+
+def test_archive_filters_reject_operators_parquet_cannot_apply():
+    with pytest.raises(ValueError):
+        archive.archive_filters({"user_id": {"$in": ["user-a"]}}, "date")
+
+def test_archived_days_select_the_overlapping_days(archive_dir):
+    manifest = {"collection": "time_entries", "date_field": "date", "days": {
+        day: {"files": [f"day={day}/part-0000.parquet"], "rows": 1} for day in ("2024-01-01", "2024-01-02", "2024-01-03")
+    }}
+    (archive_dir / "time_entries").mkdir()
+    archive.write_archive_manifest("time_entries", manifest)
+
+    assert list(archive.archived_days("time_entries")) == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert list(archive.archived_days("time_entries", datetime(2024, 1, 2), datetime(2024, 1, 3))) == ["2024-01-02"]
+    assert list(archive.archived_days("time_entries", datetime(2024, 1, 2, 12), datetime(2024, 1, 3, 6))) == ["2024-01-02", "2024-01-03"]
+    assert archive.archive_boundary("time_entries") == datetime(2024, 1, 4)
+
+def test_interrupted_archive_run_is_not_counted_twice(db, archive_dir, monkeypatch):
+    collection_class = type(db.time_entries)
+    delete_many = collection_class.delete_many
+
+    async def crash_before_delete(self, *args, **kwargs):
+        if self.name == "time_entries":
+            raise RuntimeError("crashed after writing the manifest")
+        return await delete_many(self, *args, **kwargs)
+
+    async def scenario():
+        month_start = rollups.days_ago_start(120).replace(day=1)
+        for day in (2, 3):
+            await db.time_entries.insert_one(server.TimeEntry(
+                user_id="user-a", description="Archived work", hours=2.0, date=month_start + timedelta(days=day)
+            ).model_dump())
+        monkeypatch.setattr(collection_class, "delete_many", crash_before_delete)
+        with pytest.raises(RuntimeError):
+            await archive.archive_old_records(db, 90)
+        monkeypatch.setattr(collection_class, "delete_many", delete_many)
+        response = await server.export_time_entries(export_format="ndjson", user_id=None, task_id=None, start=None, end=None)
+        rows = (await read_body(response)).splitlines()
+        month = server.month_key(month_start)
+        return rows, await server.rebuild_leaderboard(month, repair=False), await db.time_entries.count_documents({})
+
+    rows, rebuilt, hot = run(scenario())
+    # The first day's file is in the manifest and its entry is still in Mongo
+    assert archive.archive_manifest("time_entries")["days"]
+    assert hot == 2
+    assert len(rows) == 2
+    assert [row["expected"]["hours_logged"] for row in rebuilt["drift"]] == [4.0]
@@ -0,0 +1,27 @@
+import server
+
+from tests.conftest import run
+
+def test_backfill_assigns_unique_seqs_in_chunks(db, monkeypatch):
+    monkeypatch.setattr(server, "SEED_CHUNK_SIZE", 5)
+
+    async def scenario():
+        await db.time_entries.insert_many([
+            server.TimeEntry(user_id="user-a", description="Imported", hours=1.0).model_dump() for _ in range(12)
+        ])
+        assigned = await server.backfill_change_seqs()
+        return assigned, await db.time_entries.distinct("change_seq")
+
+    assigned, seqs = run(scenario())
+    assert assigned == {"tasks": 0, "time_entries": 12, "notifications": 0}
+    assert sorted(seqs) == list(range(1, 13))
+
+def test_chunked_inserts_stamp_synced_collections(db):
+    async def scenario():
+        await server.insert_chunked(db.tasks, [server.Task(title=f"Task {i}").model_dump() for i in range(3)])
+        await server.insert_chunked(db.goals, [{"id": "goal", "title": "Unsynced"}])
+        return await db.tasks.distinct("change_seq"), await db.goals.find_one({"id": "goal"})
+
+    task_seqs, goal = run(scenario())
+    assert sorted(task_seqs) == [1, 2, 3]
+    assert "change_seq" not in goal
@@ -0,0 +1,31 @@
+import json
+from datetime import datetime, timedelta
+
+import server
+
+from tests.conftest import run
+
+def test_dashboard_returns_every_user_and_a_time_entries_cursor(db, monkeypatch):
+    monkeypatch.setattr(server, "DEFAULT_PAGE_SIZE", 5)
+    now = datetime.utcnow()
+
+    async def scenario():
+        await db.users.insert_many([
+            server.User(name=f"User {i}", email=f"user{i}@example.com").model_dump() for i in range(12)
+        ])
+        await db.time_entries.insert_many([
+            server.TimeEntry(user_id="user-a", description="Work", hours=1.0, date=now - timedelta(hours=i)).model_dump()
+            for i in range(8)
+        ])
+        first = json.loads((await server.get_dashboard("users,time_entries")).body)
+        page = server.Response()
+        rest = await server.find_page(
+            db.time_entries, {}, "date", server.DESCENDING, page, cursor=first["cursors"]["time_entries"]
+        )
+        return first, rest
+
+    first, rest = run(scenario())
+    assert len(first["users"]) == 12
+    assert len(first["time_entries"]) == 5
+    assert len(rest) == 3
+    assert not {entry["id"] for entry in first["time_entries"]} & {entry["id"] for entry in rest}
@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import archive
+import server
+
+from tests.conftest import run
+
+async def read_chunks(response):
+    return [chunk async for chunk in response.body_iterator]
+
+def test_csv_export_streams_both_tiers_in_batches(db, archive_dir, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_BATCH_SIZE", 2)
+    now = datetime.utcnow()
+
+    async def scenario():
+        await db.time_entries.insert_many([
+            server.TimeEntry(user_id=user_id, description=f"{days} days ago", hours=1.0, date=now - timedelta(days=days)).model_dump()
+            for days in (150, 120, 100, 10, 5, 1) for user_id in ("user-a", "user-b")
+        ])
+        await archive.archive_old_records(db, 90)
+        response = await server.export_time_entries(export_format="csv", user_id="user-a", task_id=None, start=None, end=None)
+        return response, await read_chunks(response)
+
+    response, chunks = run(scenario())
+    assert response.media_type == "text/csv"
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert [row["description"] for row in rows] == [f"{days} days ago" for days in (150, 120, 100, 10, 5, 1)]
+    assert {row["user_id"] for row in rows} == {"user-a"}
+    # A header, one chunk per archived day and the hot entries in batches of two
+    assert len(chunks) == 1 + 3 + 2
+
+def test_ndjson_task_export_filters_by_assignee_and_status(db):
+    async def scenario():
+        await db.tasks.insert_many([
+            server.Task(title=title, assigned_users=assigned_users, status=status).model_dump()
+            for title, assigned_users, status in [("Mine", ["user-a"], "done"), ("Open", ["user-a"], "todo"), ("Theirs", ["user-b"], "done")]
+        ])
+        response = await server.export_tasks(export_format="ndjson", user_id="user-a", status=server.TaskStatus.DONE, start=None, end=None)
+        return await read_chunks(response)
+
+    rows = [json.loads(line) for line in "".join(run(scenario())).splitlines()]
+    assert [row["title"] for row in rows] == ["Mine"]
+    assert set(rows[0]) == set(server.Task.model_fields)
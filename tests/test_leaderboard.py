@@ -0,0 +1,26 @@
+from datetime import datetime
+
+import server
+
+from tests.conftest import run
+
+def test_leaderboard_task_key_scores_only_completed_tasks():
+    completed = datetime(2024, 3, 15)
+    task = {"status": "done", "completed_date": completed, "assigned_to": "user-a", "assigned_users": ["user-b"]}
+    assert server.leaderboard_task_key(task) == ("2024-03", frozenset({"user-a", "user-b"}))
+    assert server.leaderboard_task_key({**task, "status": "in_progress"}) is None
+    assert server.leaderboard_task_key({**task, "completed_date": None}) is None
+
+def test_reopening_a_task_takes_its_points_back(db):
+    task = {"status": "todo", "completed_date": None, "assigned_to": "user-a", "assigned_users": []}
+    done = {**task, "status": "done", "completed_date": datetime(2024, 3, 15)}
+
+    async def scenario():
+        await server.update_leaderboard_for_task(task, done)
+        completed = await db.leaderboard_monthly.find_one({"month": "2024-03", "user_id": "user-a"})
+        await server.update_leaderboard_for_task(done, {**done, "status": "in_progress"})
+        return completed, await db.leaderboard_monthly.find_one({"month": "2024-03", "user_id": "user-a"})
+
+    completed, reopened = run(scenario())
+    assert (completed["tasks_completed"], completed["points"]) == (1, server.TASK_POINTS)
+    assert (reopened["tasks_completed"], reopened["points"]) == (0, 0)
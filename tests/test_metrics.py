@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import metrics
+
+def series(metric, labels):
+    return metric.series.get(labels)
+
+def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(metrics.MetricsMiddleware)
+    client = TestClient(app)
+    before = series(metrics.http_requests, ("GET", "/items/{item_id}", 200)) or 0
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/nowhere")
+
+    assert series(metrics.http_requests, ("GET", "/items/{item_id}", 200)) == before + 2
+    assert series(metrics.http_requests, ("GET", metrics.UNMATCHED_ROUTE, 404)) >= 1
+    assert not any(labels[1] in ("/items/1", "/items/2") for labels in metrics.http_requests.series)
+    assert "/items/{item_id}" in metrics.render_metrics()
+
+def command_event(command_name, command, request_id, **fields):
+    return SimpleNamespace(command_name=command_name, command=command, connection_id=("localhost", 27017), request_id=request_id, **fields)
+
+def test_mongo_commands_are_labelled_by_collection_and_command(monkeypatch):
+    monkeypatch.setattr(metrics, "mongo_latency", metrics.Histogram("latency", "", ("collection", "command"), (0.001, 1.0)))
+    monkeypatch.setattr(metrics, "mongo_documents", metrics.Counter("documents", "", ("collection", "command")))
+    monkeypatch.setattr(metrics, "mongo_failures", metrics.Counter("failures", "", ("collection", "command")))
+    observed = []
+    listener = metrics.MongoCommandMetrics(lambda event, collection, duration, documents: observed.append((collection, documents)))
+
+    listener.started(command_event("find", {"find": "tasks", "filter": {}}, 1))
+    listener.succeeded(command_event("find", None, 1, duration_micros=500, reply={"cursor": {"firstBatch": [{}, {}]}}))
+    listener.started(command_event("getMore", {"getMore": 7, "collection": "tasks"}, 2))
+    listener.succeeded(command_event("getMore", None, 2, duration_micros=2000, reply={"cursor": {"nextBatch": [{}]}}))
+    listener.started(command_event("insert", {"insert": "time_entries"}, 3))
+    listener.failed(command_event("insert", None, 3, duration_micros=100))
+
+    assert metrics.mongo_documents.series == {("tasks", "find"): 2, ("tasks", "getMore"): 1}
+    assert metrics.mongo_failures.series == {("time_entries", "insert"): 1}
+    assert set(metrics.mongo_latency.series) == {("tasks", "find"), ("tasks", "getMore"), ("time_entries", "insert")}
+    assert not listener.pending
+    assert observed == [("tasks", 2), ("tasks", 1)]
+
+def test_histograms_render_cumulative_buckets_with_escaped_labels():
+    histogram = metrics.Histogram("latency_seconds", "Latency", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(('/say "hi"',), value)
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/say \\"hi\\"",le="0.1"} 1',
+        'latency_seconds_bucket{route="/say \\"hi\\"",le="1.0"} 2',
+        'latency_seconds_bucket{route="/say \\"hi\\"",le="+Inf"} 3',
+        'latency_seconds_sum{route="/say \\"hi\\""} 5.55',
+        'latency_seconds_count{route="/say \\"hi\\""} 3'
+    ]
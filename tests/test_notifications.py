@@ -0,0 +1,99 @@
+import pytest
+from pymongo.errors import AutoReconnect
+
+import server
+
+from tests.conftest import run
+
+def notification(user_id="user-a", task_id="task-a", notification_type=server.NotificationType.TASK_ASSIGNED):
+    return server.Notification(user_id=user_id, title="Assigned", message="You have a task", type=notification_type, related_task_id=task_id)
+
+@pytest.fixture
+def failing_inserts(db, monkeypatch):
+    """Make the next `failures` notification inserts fail as if the server were unreachable"""
+    collection_class = type(db.notifications)
+    insert_many = collection_class.insert_many
+    failures = []
+
+    async def flaky_insert_many(self, documents, **kwargs):
+        if self.name == "notifications" and failures:
+            failures.pop()
+            raise AutoReconnect("connection closed")
+        return await insert_many(self, documents, **kwargs)
+
+    monkeypatch.setattr(collection_class, "insert_many", flaky_insert_many)
+    return failures
+
+def test_failed_batch_does_not_suppress_retries(db, failing_inserts):
+    queue = server.NotificationQueue()
+    failing_inserts.append(True)
+
+    async def scenario():
+        assert await queue.enqueue(notification())
+        await queue.stop()
+        retried = await queue.enqueue(notification())
+        await queue.stop()
+        return retried, await db.notifications.count_documents({})
+
+    retried, stored = run(scenario())
+    assert retried
+    assert stored == 1
+    assert (queue.failed, queue.inserted) == (1, 1)
+
+def test_repeats_within_the_window_are_dropped(db):
+    queue = server.NotificationQueue()
+
+    async def scenario():
+        accepted = [
+            await queue.enqueue(notification()),
+            await queue.enqueue(notification()),
+            await queue.enqueue(notification(task_id="task-b")),
+            await queue.enqueue(notification(notification_type=server.NotificationType.TASK_COMPLETED)),
+            await queue.enqueue(notification(user_id="user-b"))
+        ]
+        await queue.stop()
+        return accepted, await db.notifications.count_documents({})
+
+    accepted, stored = run(scenario())
+    assert accepted == [True, False, True, True, True]
+    assert stored == 4
+    assert queue.deduplicated == 1
+
+def test_repeats_after_the_window_are_kept(db):
+    queue = server.NotificationQueue(dedup_window=0)
+
+    async def scenario():
+        accepted = [await queue.enqueue(notification()) for _ in range(2)]
+        await queue.stop()
+        return accepted
+
+    assert run(scenario()) == [True, True]
+
+def test_queued_notifications_are_written_in_batches(db):
+    queue = server.NotificationQueue(batch_size=2)
+
+    async def scenario():
+        for i in range(5):
+            await queue.enqueue(notification(task_id=f"task-{i}"))
+        await queue.stop()
+        return await db.notifications.distinct("change_seq")
+
+    seqs = run(scenario())
+    assert (queue.inserted, queue.batches, queue.last_batch_size) == (5, 3, 1)
+    assert sorted(seqs) == [1, 2, 3, 4, 5]
+
+def test_marking_a_read_notification_again_is_not_found(db):
+    stored = notification().dict()
+
+    async def scenario():
+        await db.notifications.insert_one({**stored, "change_seq": 0})
+        await server.mark_notification_read(stored["id"])
+        marked = await db.notifications.find_one({"id": stored["id"]})
+        with pytest.raises(server.HTTPException) as again:
+            await server.mark_notification_read(stored["id"])
+        return marked, again.value, await db.notifications.find_one({"id": stored["id"]})
+
+    marked, error, unchanged = run(scenario())
+    assert marked["read"] and marked["change_seq"] > 0
+    assert error.status_code == 404
+    assert unchanged["change_seq"] == marked["change_seq"]
@@ -0,0 +1,54 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+from tests.conftest import run
+
+def test_cursor_round_trips_dates_and_ids():
+    date = datetime(2024, 5, 1, 12, 30)
+    cursor = server.encode_cursor({"id": "task-1", "created_date": date}, "created_date")
+    assert server.decode_cursor(cursor) == (date, "task-1")
+    cursor = server.encode_cursor({"id": "task-2", "position": 1.5}, "position")
+    assert server.decode_cursor(cursor) == (1.5, "task-2")
+
+def test_invalid_cursor_is_a_bad_request():
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+def test_unpaged_list_returns_the_old_default(db):
+    joined = datetime.utcnow()
+
+    async def scenario():
+        await db.users.insert_many([
+            server.User(name=f"User {i}", email=f"user{i}@example.com", joined_date=joined + timedelta(seconds=i)).model_dump()
+            for i in range(150)
+        ])
+        response = server.Response()
+        body = json.loads((await server.get_users(response)).body)
+        return body, response
+
+    users, response = run(scenario())
+    assert len(users) == 150
+    assert server.NEXT_CURSOR_HEADER not in response.headers
+
+def test_pages_follow_the_cursor_without_overlap(db):
+    async def scenario():
+        await db.users.insert_many([
+            server.User(name=f"User {i}", email=f"user{i}@example.com", joined_date=datetime(2024, 1, 1)).model_dump()
+            for i in range(7)
+        ])
+        seen, cursor = [], None
+        while True:
+            response = server.Response()
+            seen.extend(user["id"] for user in json.loads((await server.get_users(response, limit=3, cursor=cursor)).body))
+            cursor = response.headers.get(server.NEXT_CURSOR_HEADER)
+            if not cursor:
+                return seen
+
+    seen = run(scenario())
+    assert len(seen) == 7 and len(set(seen)) == 7
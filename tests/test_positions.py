@@ -0,0 +1,58 @@
+import server
+
+from tests.conftest import run
+
+def test_position_between_open_and_closed_bounds():
+    assert server.position_between(None, None) == 0.0
+    assert server.position_between(None, 3.0) == 3.0 - server.POSITION_STEP
+    assert server.position_between(3.0, None) == 3.0 + server.POSITION_STEP
+    assert 1.0 < server.position_between(1.0, 2.0) < 2.0
+
+def test_crowded_positions_are_relative_to_their_magnitude():
+    assert not server.positions_crowded(1.0, 1.0 + 1e-9)
+    assert server.positions_crowded(1.0, 1.0 + 1e-13)
+    # At large ranks an absolute gap would stay "wide" long after the midpoint stops moving
+    assert server.positions_crowded(1e9, 1e9 + 1e-4)
+    assert not server.positions_crowded(1e9, 1e9 + 1e-2)
+    assert not server.positions_crowded(-1.0, 1.0)
+
+async def seed_column(db, positions):
+    tasks = [server.Task(title=f"Task {i}", position=position).model_dump() for i, position in enumerate(positions)]
+    await db.tasks.insert_many(tasks)
+    return [task["id"] for task in tasks]
+
+async def column_order(db):
+    tasks = await db.tasks.find({"status": "todo"}).sort([("position", 1), ("id", 1)]).to_list(None)
+    return [task["id"] for task in tasks], [task["position"] for task in tasks]
+
+def test_rebalance_spreads_a_crowded_column_and_keeps_its_order(db):
+    async def scenario():
+        ids = await seed_column(db, [1.0, 1.0 + 1e-10, 1.0 + 2e-10, 4.0])
+        result = await server.rebalance_positions("todo")
+        return ids, result, await column_order(db)
+
+    ids, result, (order, positions) = run(scenario())
+    assert result == {"status": "todo", "tasks": 4, "rebalanced": 2, "skipped": 0}
+    assert order == ids
+    assert positions == [1.0, 2.0, 3.0, 4.0]
+
+def test_rebalance_does_not_overwrite_a_concurrent_move(db, monkeypatch):
+    moved_position = 0.5
+
+    async def scenario():
+        ids = await seed_column(db, [1.0, 1.0 + 1e-10, 1.0 + 2e-10])
+        allocate = server.next_change_seq
+
+        async def move_then_allocate(count: int = 1) -> int:
+            # Another request moves a card after the rebalance has read the column
+            await db.tasks.update_one({"id": ids[2]}, {"$set": {"position": moved_position}})
+            monkeypatch.setattr(server, "next_change_seq", allocate)
+            return await allocate(count)
+
+        monkeypatch.setattr(server, "next_change_seq", move_then_allocate)
+        result = await server.rebalance_positions("todo")
+        return ids, result, await db.tasks.find_one({"id": ids[2]})
+
+    ids, result, moved = run(scenario())
+    assert result["skipped"] == 1
+    assert moved["position"] == moved_position
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+import profiler
+from tests.conftest import run
+
+@pytest.fixture
+def request_profiler(monkeypatch):
+    request_profiler = profiler.RequestProfiler()
+    monkeypatch.setattr(profiler, "request_profiler", request_profiler)
+    return request_profiler
+
+def busy_wait(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+async def child_work():
+    await asyncio.sleep(0.05)
+    busy_wait(0.1)
+
+async def app(scope, receive, send):
+    await asyncio.gather(child_work(), asyncio.sleep(0.1))
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+def profiled_request(path: str):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [(b"x-profile", b"1")]}
+    run(profiler.ProfilerMiddleware(app)(scope, None, send))
+    return sent
+
+def test_profiles_the_tasks_a_request_starts(request_profiler):
+    sent = profiled_request("/api/profiled")
+    profile = next(iter(request_profiler.profiles.values()))
+    assert (b"x-profile-id", profile.id.encode()) in sent[0]["headers"]
+    assert profile.samples > 0
+    # The child task spawned by gather is sampled while it runs, in its own tree
+    assert any(stack.startswith("child_work") and "busy_wait" in stack for stack in profile.stacks)
+    assert any(stack.startswith("ProfilerMiddleware.__call__") for stack in profile.stacks)
+
+def test_ignores_tasks_outside_profiled_requests(request_profiler):
+    async def unprofiled():
+        await asyncio.sleep(0.02)
+        busy_wait(0.05)
+
+    async def send(message):
+        pass
+
+    async def main():
+        # Started before the request, so it does not carry the request's profile
+        other = asyncio.create_task(unprofiled())
+        scope = {"type": "http", "method": "GET", "path": "/api/profiled", "headers": [(b"x-profile", b"1")]}
+        await profiler.ProfilerMiddleware(app)(scope, None, send)
+        await other
+
+    run(main())
+    profile = next(iter(request_profiler.profiles.values()))
+    assert profile.samples > 0
+    assert not any(stack.startswith("test_ignores_tasks_outside_profiled_requests.<locals>.unprofiled") for stack in profile.stacks)
+
+def test_frame_label_without_qualname():
+    class Code:
+        co_name = "handler"
+        co_filename = "/srv/backend/server.py"
+        co_firstlineno = 12
+
+    class Frame:
+        f_code = Code()
+
+    assert profiler.frame_label(Frame()) == "handler (server.py:12)"
@@ -0,0 +1,29 @@
+from fastapi import WebSocket
+
+import server
+from tests.conftest import run
+
+async def connected_websocket(client_messages):
+    """An accepted WebSocket that receives `client_messages` from the client"""
+    messages = [{"type": "websocket.connect"}, *client_messages]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    websocket = WebSocket({"type": "websocket", "path": "/api/ws", "headers": []}, receive, send)
+    await websocket.accept()
+    return websocket
+
+def test_discard_client_messages_ignores_binary_frames():
+    async def main():
+        websocket = await connected_websocket([
+            {"type": "websocket.receive", "bytes": b"\x00\x01"},
+            {"type": "websocket.receive", "text": "ping"},
+            {"type": "websocket.disconnect", "code": 1000}
+        ])
+        await server.discard_client_messages(websocket)
+
+    run(main())
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+import rollups
+
+from tests.conftest import run
+
+def test_days_ago_start_is_midnight():
+    start = rollups.days_ago_start(3)
+    assert (start.hour, start.minute, start.second, start.microsecond) == (0, 0, 0, 0)
+    assert start.date() == (datetime.utcnow() - timedelta(days=3)).date()
+
+def test_time_entries_add_up_in_their_days_rollup(db):
+    morning, evening = datetime(2024, 3, 15, 9), datetime(2024, 3, 15, 21)
+    entries = [
+        {"user_id": "user-a", "date": morning, "hours": 2.0, "is_pomodoro": True},
+        {"user_id": "user-a", "date": evening, "hours": 9.0, "is_overtime": True},
+        {"user_id": "user-a", "date": morning + timedelta(days=1), "hours": 1.0}
+    ]
+
+    async def scenario():
+        for entry in entries:
+            await rollups.record_time_rollup(db, entry)
+        return await db.time_rollups_daily.find({}, {"_id": 0}).sort("day", 1).to_list(None)
+
+    first_day, second_day = run(scenario())
+    assert first_day == {
+        "user_id": "user-a", "day": "2024-03-15", "date": datetime(2024, 3, 15),
+        "total_hours": 11.0, "overtime_hours": 9.0, "entry_count": 2, "pomodoro_count": 1
+    }
+    assert (second_day["day"], second_day["total_hours"]) == ("2024-03-16", 1.0)
@@ -0,0 +1,35 @@
+import asyncio
+from types import SimpleNamespace
+
+import slow_queries
+from tests.conftest import run
+
+def test_normalize_shape_hides_literals_and_collapses_lists():
+    command = {"id": {"$in": ["a", "b", "c"]}, "status": "todo", "$expr": {"$gt": ["$hours", 8]}}
+    assert slow_queries.normalize_shape(command) == {"id": {"$in": ["?"]}, "status": "?", "$expr": {"$gt": ["$hours", "?"]}}
+
+def test_command_shape_keeps_only_the_shape_fields():
+    shape = slow_queries.command_shape("find", {"find": "tasks", "filter": {"id": "abc"}, "sort": {"position": 1}, "lsid": {"id": "session"}})
+    assert shape == {"filter": {"id": "?"}, "sort": {"position": 1}}
+
+def test_slow_commands_with_the_same_shape_share_a_shape_id(db):
+    log = slow_queries.SlowQueryLog(threshold_ms=50, explain_interval=300)
+
+    def event(task_id):
+        command = {"update": "tasks", "updates": [{"q": {"id": task_id}, "u": {"$set": {"status": "done"}}}]}
+        return SimpleNamespace(command_name="update", command=command, database_name="test")
+
+    async def scenario():
+        log.start(db)
+        log.observe(event("a"), "tasks", 0.2, 1)
+        log.observe(event("b"), "tasks", 0.3, 1)
+        log.observe(event("c"), "tasks", 0.01, 1)
+        await asyncio.sleep(0)
+        await log.drain()
+        return await db[slow_queries.SLOW_QUERY_COLLECTION].find({}, {"_id": 0}).to_list(None)
+
+    records = run(scenario())
+    assert [record["duration_ms"] for record in records] == [200.0, 300.0]
+    assert records[0]["shape_id"] == records[1]["shape_id"]
+    assert records[0]["shape"] == {"updates": [{"q": {"id": "?"}, "u": {"$set": {"status": "?"}}}]}
+    assert log.stats()["recorded"] == 2
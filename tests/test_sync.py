@@ -0,0 +1,59 @@
+import json
+
+import server
+
+from tests.conftest import run
+
+async def sync(since: int, limit: int, user_id=None):
+    return json.loads((await server.sync_changes(since=since, limit=limit, user_id=user_id)).body)
+
+async def sync_all(limit: int):
+    """Follow `next` until has_more is false, applying changes like a client would"""
+    tasks, deleted, since, calls = {}, set(), 0, 0
+    while True:
+        page = await sync(since, limit)
+        calls += 1
+        for task in page["changes"]["tasks"]:
+            tasks[task["id"]] = task
+        for task_id in page["deleted"]["tasks"]:
+            tasks.pop(task_id, None)
+            deleted.add(task_id)
+        assert page["next"] >= since
+        since = page["next"]
+        if not page["has_more"]:
+            return tasks, deleted, calls
+
+def test_sync_pages_through_changes_and_tombstones(db):
+    async def scenario():
+        created = [await server.create_task(server.TaskCreate(title=f"Task {i}")) for i in range(5)]
+        await server.delete_task(created[1].id)
+        await server.update_task(created[3].id, server.TaskUpdate(title="Renamed"))
+        return created, await sync_all(limit=2)
+
+    created, (tasks, deleted, calls) = run(scenario())
+    assert set(tasks) == {task.id for index, task in enumerate(created) if index != 1}
+    assert deleted == {created[1].id}
+    assert tasks[created[3].id]["title"] == "Renamed"
+    assert calls > 1
+
+def test_sync_stops_below_writes_still_in_flight(db):
+    async def scenario():
+        await server.create_task(server.TaskCreate(title="Landed"))
+        async with server.change_seqs() as pending_seq:
+            page = await sync(0, 100)
+        return pending_seq, page
+
+    pending_seq, page = run(scenario())
+    assert page["next"] < pending_seq
+    assert [task["title"] for task in page["changes"]["tasks"]] == ["Landed"]
+
+def test_sync_time_entries_are_limited_to_the_user(db):
+    async def scenario():
+        await server.insert_chunked(db.time_entries, [
+            server.TimeEntry(user_id=user_id, description="Work", hours=1.0).model_dump() for user_id in ("user-a", "user-b")
+        ])
+        return await sync(0, 100, user_id="user-a")
+
+    page = run(scenario())
+    assert [entry["user_id"] for entry in page["changes"]["time_entries"]] == ["user-a"]
+    assert page["changes"]["notifications"] == []
@@ -0,0 +1,64 @@
+import pytest
+
+import rollups
+import server
+
+from tests.conftest import run
+
+@pytest.fixture
+def derived_months(monkeypatch):
+    """Skip the derived-data rebuild, whose $merge stages mongomock cannot run, and record its months"""
+    months = []
+
+    async def rebuild_derived_data(rebuilt_months):
+        months.extend(rebuilt_months)
+        return {}
+
+    monkeypatch.setattr(server, "rebuild_derived_data", rebuild_derived_data)
+    return months
+
+async def snapshot(db):
+    """Every generated document, except completion times capped at the moment of generation"""
+    today = rollups.days_ago_start(0)
+    return {
+        name: [
+            {field: value for field, value in document.items() if not (field in ("completed_date", "created_date") and value and value >= today)}
+            for document in await db[name].find({}, {"_id": 0, "change_seq": 0}).sort("id", 1).to_list(None)
+        ]
+        for name in ("users", "tasks", "task_comments", "notifications", "time_entries")
+    }
+
+def test_same_seed_generates_the_same_data(db, archive_dir, derived_months):
+    async def scenario():
+        first = await server.generate_synthetic_data(users=6, tasks_per_user=3, days=10, entries_per_day=2, seed=7)
+        first_data = await snapshot(db)
+        second = await server.generate_synthetic_data(users=6, tasks_per_user=3, days=10, entries_per_day=2, seed=7)
+        return first, second, first_data, await snapshot(db)
+
+    first, second, first_data, second_data = run(scenario())
+    assert (first["users"], first["tasks"]) == (6, 18)
+    assert first["time_entries"] > 0
+    assert {key: value for key, value in first.items() if key != "elapsed_seconds"} == \
+        {key: value for key, value in second.items() if key != "elapsed_seconds"}
+    # The second run replaced the first instead of adding to it
+    assert first_data == second_data
+    assert derived_months and derived_months == sorted(derived_months)
+
+def test_different_seeds_generate_different_teams(db, archive_dir, derived_months):
+    async def scenario():
+        await server.generate_synthetic_data(users=3, tasks_per_user=1, days=2, seed=1)
+        first = await db.users.distinct("id")
+        await server.generate_synthetic_data(users=3, tasks_per_user=1, days=2, seed=2)
+        return first, await db.users.distinct("id")
+
+    first, second = run(scenario())
+    assert len(second) == 3 and set(first).isdisjoint(second)
+
+def test_chunked_inserter_writes_in_chunks(db):
+    async def scenario():
+        inserter = server.ChunkedInserter(db.goals, chunk_size=4)
+        for i in range(10):
+            await inserter.add({"id": f"goal-{i}"})
+        return await inserter.close(), await db.goals.count_documents({})
+
+    assert run(scenario()) == (10, 10)
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+import server
+
+from tests.conftest import run
+
+@pytest.fixture
+def interleaved(monkeypatch):
+    """Yield to the event loop before every write, so concurrent requests interleave as they do against a real server"""
+    allocate = server.next_change_seq
+
+    async def next_change_seq(count: int = 1) -> int:
+        await asyncio.sleep(0)
+        return await allocate(count)
+
+    monkeypatch.setattr(server, "next_change_seq", next_change_seq)
+
+async def create_task(**fields):
+    return await server.create_task(server.TaskCreate(title="Write tests", **fields))
+
+def test_concurrent_completion_counts_once(db, interleaved):
+    async def scenario():
+        user = await server.create_user(server.UserCreate(name="Ada", email="ada@example.com"))
+        task = await create_task(assigned_to=user.id)
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        done = server.TaskUpdate(status=server.TaskStatus.DONE)
+        await asyncio.gather(server.update_task(task.id, done), server.update_task(task.id, done))
+        return (
+            await db.team_stats.find_one({"_id": server.TEAM_STATS_ID}),
+            await db.users.find_one({"id": user.id}),
+            await db.leaderboard_monthly.find({}).to_list(None)
+        )
+
+    team_stats, user, leaderboard = run(scenario())
+    assert team_stats["completed_tasks"] == 1
+    assert team_stats["completed_today"] == 1
+    assert user["total_tasks_completed"] == 1
+    assert [entry["tasks_completed"] for entry in leaderboard] == [1]
+
+def test_concurrent_moves_count_once(db, interleaved):
+    async def scenario():
+        task = await create_task()
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        move = server.TaskMove(status=server.TaskStatus.BLOCKED)
+        moved = await asyncio.gather(server.move_task(task.id, move), server.move_task(task.id, move))
+        return moved, await db.team_stats.find_one({"_id": server.TEAM_STATS_ID})
+
+    moved, team_stats = run(scenario())
+    assert {task.status for task in moved} == {server.TaskStatus.BLOCKED}
+    assert team_stats["blocked_tasks"] == 1
+
+def test_concurrent_bulk_status_changes_count_once(db, interleaved):
+    async def scenario():
+        moved, other = await create_task(), await create_task()
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        updates = [{"id": moved.id, "position": 5.0, "status": "done"}, {"id": other.id, "position": 6.0}]
+        await asyncio.gather(server.bulk_update_task_positions(updates), server.bulk_update_task_positions(updates))
+        return await db.team_stats.find_one({"_id": server.TEAM_STATS_ID}), await db.tasks.find_one({"id": other.id})
+
+    team_stats, other = run(scenario())
+    assert team_stats["completed_tasks"] == 1
+    assert other["position"] == 6.0
+
+def test_new_task_lands_below_bulk_reordered_cards(db):
+    async def scenario():
+        first, second = await create_task(), await create_task()
+        await server.bulk_update_task_positions([{"id": first.id, "position": 5000.0}, {"id": second.id, "position": 4000.0}])
+        return await create_task()
+
+    assert run(scenario()).position > 5000.0
+
+def completion_state(db, task_id: str, user_id: str):
+    async def read():
+        return (
+            await db.tasks.find_one({"id": task_id}),
+            await db.team_stats.find_one({"_id": server.TEAM_STATS_ID}),
+            await db.users.find_one({"id": user_id}),
+            await db.leaderboard_monthly.find({"user_id": user_id}).to_list(None)
+        )
+    return read()
+
+def assert_completed(task, team_stats, user, leaderboard):
+    assert task["completed_date"] is not None
+    assert team_stats["completed_today"] == 1
+    assert user["total_tasks_completed"] == 1
+    assert [entry["tasks_completed"] for entry in leaderboard] == [1]
+
+def test_moving_a_task_into_done_records_the_completion(db):
+    async def scenario():
+        user = await server.create_user(server.UserCreate(name="Ada", email="ada@example.com"))
+        task = await create_task(assigned_to=user.id)
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        moved = await server.move_task(task.id, server.TaskMove(status=server.TaskStatus.DONE))
+        return moved, await completion_state(db, task.id, user.id)
+
+    moved, state = run(scenario())
+    assert moved.completed_date is not None
+    assert_completed(*state)
+
+def test_bulk_status_change_into_done_records_the_completion(db):
+    async def scenario():
+        user = await server.create_user(server.UserCreate(name="Ada", email="ada@example.com"))
+        task = await create_task(assigned_to=user.id)
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        await server.bulk_update_task_positions([{"id": task.id, "position": 1.0, "status": "done"}])
+        return await completion_state(db, task.id, user.id)
+
+    assert_completed(*run(scenario()))
+
+def test_new_tasks_land_below_an_explicitly_positioned_task(db):
+    async def scenario():
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        first = await create_task()
+        await create_task()
+        await server.update_task(first.id, server.TaskUpdate(position=500.0))
+        return await create_task()
+
+    assert run(scenario()).position > 500.0
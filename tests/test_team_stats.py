@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import server
+
+from tests.conftest import run
+
+def test_task_team_stats_delta_for_a_completion():
+    old_task = {"status": "in_progress", "assigned_to": "user-a"}
+    new_task = {"status": "done", "assigned_to": "user-a", "completed_date": datetime.utcnow()}
+    assert {counter: delta for counter, delta in server.task_team_stats_delta(old_task, new_task).items() if delta} == {
+        "in_progress_tasks": -1, "completed_tasks": 1, "completed_today": 1
+    }
+
+def test_task_team_stats_delta_for_create_and_delete():
+    task = {"status": "blocked", "assigned_to": None}
+    assert server.task_team_stats_delta(None, task) == {"total_tasks": 1, "blocked_tasks": 1, "unassigned_tasks": 1}
+    assert server.task_team_stats_delta(task, None) == {"total_tasks": -1, "blocked_tasks": -1, "unassigned_tasks": -1}
+
+def test_task_writes_keep_the_counters_current(db):
+    async def scenario():
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        first = await server.create_task(server.TaskCreate(title="First"))
+        second = await server.create_task(server.TaskCreate(title="Second"))
+        await server.update_task(first.id, server.TaskUpdate(status=server.TaskStatus.BLOCKED))
+        await server.delete_task(second.id)
+        return await db.team_stats.find_one({"_id": server.TEAM_STATS_ID})
+
+    team_stats = run(scenario())
+    assert (team_stats["total_tasks"], team_stats["blocked_tasks"], team_stats["unassigned_tasks"]) == (1, 1, 1)
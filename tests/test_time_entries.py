@@ -0,0 +1,48 @@
+import asyncio
+
+import server
+
+from tests.conftest import run
+
+def test_burnout_risk_thresholds():
+    assert server.burnout_risk_for([]) == "low"
+    assert server.burnout_risk_for([6.0] * 10) == "low"
+    assert server.burnout_risk_for([8.0] * 10) == "medium"
+    assert server.burnout_risk_for([7.0, 13.0]) == "high"
+    assert server.burnout_risk_for([8.5] * 8) == "high"
+
+def test_concurrent_entries_all_add_their_hours(db):
+    async def scenario():
+        user = await server.create_user(server.UserCreate(name="Ada", email="ada@example.com"))
+        task = await server.create_task(server.TaskCreate(title="Write tests"))
+        entry = server.TimeEntryCreate(user_id=user.id, task_id=task.id, description="Pomodoro", hours=0.5, is_pomodoro=True)
+        await asyncio.gather(*(server.create_time_entry(entry) for _ in range(10)))
+        await server.drain_burnout_refreshes()
+        return await db.users.find_one({"id": user.id}), await db.tasks.find_one({"id": task.id}), await db.time_entries.count_documents({})
+
+    user, task, entries = run(scenario())
+    assert entries == 10
+    assert user["total_hours_logged"] == 5.0
+    assert task["actual_hours"] == 5.0
+
+def test_burnout_refreshes_coalesce_per_user(monkeypatch):
+    refreshed = []
+
+    async def update_burnout_risk(user_id: str):
+        refreshed.append(user_id)
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(server, "update_burnout_risk", update_burnout_risk)
+
+    async def scenario():
+        for _ in range(5):
+            server.schedule_burnout_refresh("user-a")
+        server.schedule_burnout_refresh("user-b")
+        await asyncio.sleep(0)
+        # Entries logged while the first pass runs ask for exactly one more
+        server.schedule_burnout_refresh("user-a")
+        server.schedule_burnout_refresh("user-a")
+        await server.drain_burnout_refreshes()
+
+    run(scenario())
+    assert sorted(refreshed) == ["user-a", "user-a", "user-b"]
@@ -0,0 +1,88 @@
+import pytest
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+import server
+from tests.conftest import run
+
+@pytest.fixture
+def catalog(db, monkeypatch):
+    """Storage mode per collection name, refusing renames of time-series collections as MongoDB does"""
+    modes = {}
+
+    async def time_entries_storage(name="time_entries"):
+        if name not in await db.list_collection_names():
+            return None
+        return modes.get(name, "standard")
+
+    async def create_time_entries_collection(name, mode):
+        await db.create_collection(name)
+        modes[name] = mode
+
+    collection_class = type(db.time_entries)
+    rename = collection_class.rename
+
+    async def rename_collection(self, new_name, **kwargs):
+        if modes.get(self.name) == "timeseries":
+            raise OperationFailure("Cannot rename a time-series collection", code=72)
+        await rename(self, new_name, **kwargs)
+        modes[new_name] = modes.pop(self.name, "standard")
+
+    async def ensure_indexes():
+        return {}
+
+    monkeypatch.setattr(server, "time_entries_storage", time_entries_storage)
+    monkeypatch.setattr(server, "create_time_entries_collection", create_time_entries_collection)
+    monkeypatch.setattr(collection_class, "rename", rename_collection)
+    monkeypatch.setattr(server, "ensure_indexes", ensure_indexes)
+    return modes
+
+def time_entries(count: int):
+    return [server.TimeEntry(user_id="user-a", description="Work", hours=1.0).model_dump() for _ in range(count)]
+
+def test_migrates_to_timeseries_without_renaming_a_timeseries_collection(db, catalog):
+    async def scenario():
+        await db.time_entries.insert_many(time_entries(7))
+        result = await server.migrate_time_entries("timeseries")
+        return result, await db.time_entries.count_documents({})
+
+    result, count = run(scenario())
+    assert catalog["time_entries"] == "timeseries"
+    assert count == 7
+    assert result["migrated"] and result["copied"] == 7
+    assert result["counts"] == {"legacy": 7, "time_entries": 7}
+    assert catalog[result["legacy_collection"]] == "standard"
+
+def test_migration_keeps_writes_that_recreate_the_collection(db, catalog, monkeypatch):
+    create = server.create_time_entries_collection
+    racing_write = {**time_entries(1)[0], "change_seq": 1000}
+
+    async def create_after_a_write(name, mode):
+        # The first attempt races an insert that recreates time_entries as a standard collection
+        if racing_write.get("_id") is None:
+            await db.time_entries.insert_one(racing_write)
+            raise CollectionInvalid(f"collection {name} already exists")
+        await create(name, mode)
+
+    monkeypatch.setattr(server, "create_time_entries_collection", create_after_a_write)
+
+    async def scenario():
+        await db.time_entries.insert_many(time_entries(3))
+        result = await server.migrate_time_entries("timeseries", drop_legacy=True)
+        return result, await db.time_entries.distinct("id"), await db.list_collection_names()
+
+    result, ids, collections = run(scenario())
+    assert catalog["time_entries"] == "timeseries"
+    assert racing_write["id"] in ids and len(ids) == 4
+    assert result["legacy_collection"] is None
+    assert [name for name in collections if name.startswith("time_entries_")] == []
+
+def test_refuses_to_convert_a_timeseries_collection(db, catalog):
+    async def scenario():
+        await server.create_time_entries_collection("time_entries", "timeseries")
+        await db.time_entries.insert_many(time_entries(2))
+        with pytest.raises(ValueError, match="cannot rename"):
+            await server.migrate_time_entries("standard")
+        return await db.time_entries.count_documents({})
+
+    assert run(scenario()) == 2
+    assert catalog["time_entries"] == "timeseries"
@@ -0,0 +1,27 @@
+import pytest
+from fastapi import HTTPException
+
+import server
+from tests.conftest import run
+
+def test_concurrent_registration_of_an_email_is_rejected(db, monkeypatch):
+    collection_class = type(db.users)
+    find_one = collection_class.find_one
+
+    async def missed_concurrent_insert(self, *args, **kwargs):
+        # The other request inserts between this request's check and its insert
+        return None if self.name == "users" else await find_one(self, *args, **kwargs)
+
+    async def scenario():
+        await db.team_stats.insert_one({"_id": server.TEAM_STATS_ID})
+        await db.users.create_indexes(server.INDEX_SPECS["users"])
+        await server.create_user(server.UserCreate(name="Ada", email="ada@example.com"))
+        monkeypatch.setattr(collection_class, "find_one", missed_concurrent_insert)
+        with pytest.raises(HTTPException) as error:
+            await server.create_user(server.UserCreate(name="Ada L", email="ada@example.com"))
+        return error.value, await db.users.count_documents({}), await db.team_stats.find_one({"_id": server.TEAM_STATS_ID})
+
+    error, users, stats = run(scenario())
+    assert (error.status_code, error.detail) == (400, "Email already registered")
+    assert users == 1
+    assert stats["team_size"] == 1